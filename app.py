@@ -286,19 +286,24 @@ def dashboard():
 
     # Filtres
     status_filter = request.args.get('status', None)
+    presence_filter = request.args.get('presence', '')  # 'active', 'removed' ou tout
     search_query = request.args.get('search', '')
     sort_by = request.args.get('sort', 'created_at')
     sort_order = request.args.get('order', 'desc')
 
     if not is_db_connected():
         flash('Base de données non configurée.', 'error')
-        return render_template('dashboard.html', listings=[], stats={'total': 0, 'nouveau': 0, 'interesse': 0, 'pas_interesse': 0, 'visite': 0})
+        return render_template('dashboard.html', listings=[], stats={'total': 0, 'nouveau': 0, 'interesse': 0, 'pas_interesse': 0, 'visite': 0, 'retirees': 0})
 
     try:
         query = db.table('listings').select('*').eq('user_id', user_id)
 
         if status_filter:
             query = query.eq('status', status_filter)
+        if presence_filter == 'active':
+            query = query.is_('removed_at', 'null')
+        elif presence_filter == 'removed':
+            query = query.not_is_('removed_at', 'null')
 
         query = query.order(sort_by, desc=(sort_order == 'desc'))
         result = query.execute()
@@ -309,7 +314,7 @@ def dashboard():
             listings = [l for l in listings if search_lower in l.get('title', '').lower() or search_lower in l.get('location', '').lower()]
 
         # Statistiques basées sur toutes les annonces (pas filtrées)
-        all_result = db.table('listings').select('status').eq('user_id', user_id).execute()
+        all_result = db.table('listings').select('status,removed_at').eq('user_id', user_id).execute()
         all_listings = all_result.data
 
         stats = {
@@ -318,18 +323,20 @@ def dashboard():
             'interesse': len([l for l in all_listings if l.get('status') == 'Intéressé']),
             'pas_interesse': len([l for l in all_listings if l.get('status') == 'Pas intéressé']),
             'visite': len([l for l in all_listings if l.get('status') == 'Visité']),
+            'retirees': len([l for l in all_listings if l.get('removed_at')]),
         }
 
         return render_template('dashboard.html',
                              listings=listings,
                              stats=stats,
                              current_status=status_filter,
+                             current_presence=presence_filter,
                              search_query=search_query,
                              sort_by=sort_by,
                              sort_order=sort_order)
     except Exception as e:
         flash(f'Erreur: {e}', 'error')
-        return render_template('dashboard.html', listings=[], stats={'total': 0, 'nouveau': 0, 'interesse': 0, 'pas_interesse': 0, 'visite': 0})
+        return render_template('dashboard.html', listings=[], stats={'total': 0, 'nouveau': 0, 'interesse': 0, 'pas_interesse': 0, 'visite': 0, 'retirees': 0})
 
 # ============================================================================
 # LISTING MANAGEMENT
@@ -380,6 +387,11 @@ def update_status(listing_id):
         if result.data:
             db.update_listing_status(listing_id, user_id, new_status)
             flash(f'Statut mis à jour: {new_status}', 'success')
+
+            # Annonce suivie: ses détails passent en priorité
+            if new_status == 'Intéressé':
+                from scrapers.detail_fetcher import detail_fetcher
+                detail_fetcher.schedule(db, user_id)
         else:
             flash('Annonce introuvable', 'error')
     except Exception as e:
@@ -433,7 +445,7 @@ def delete_all_listings():
 # SCRAPING
 # ============================================================================
 
-def run_scraping_task(user_id, ville, rayon, sites, lat=None, lon=None):
+def run_scraping_task(user_id, ville, rayon, sites, lat=None, lon=None, force_refresh=False):
     """Tâche de scraping exécutée en arrière-plan"""
     try:
         # Si coordonnées GPS fournies, les afficher
@@ -451,8 +463,20 @@ def run_scraping_task(user_id, ville, rayon, sites, lat=None, lon=None):
         )
 
         # Import des modules de scraping
-        from utils.validator import validate_listing, deduplicate_by_url, deduplicate_by_signature, filter_agencies, filter_by_location
+        from utils.validator import ListingPipeline
+        from utils.listing import Listing
+        from utils.rejects import RejectRegistry
+        from utils.near_duplicates import NearDuplicateMerger
+        from scrapers.photo_matcher import photo_matcher
         from scrapers.site_config import SiteManager, get_profile
+        from scrapers.watermark import make_scope
+        from scrapers.seen_index import seen_index
+        from scrapers.presence import presence
+        from utils.canonical_url import canonical_url
+        from scrapers.result_cache import fetch_shared, result_cache
+        from scrapers.browser_pool import browser_pool
+        from scrapers.parse_pool import parse_pool
+        from scrapers.detail_fetcher import detail_fetcher
 
         # Si coordonnées GPS fournies, pré-remplir le cache de géolocalisation
         geo_override = None
@@ -481,6 +505,10 @@ def run_scraping_task(user_id, ville, rayon, sites, lat=None, lon=None):
 
         all_listings = []
         total_sites = len(sites)
+        watermark_scope = make_scope(user_id, ville, rayon)
+        used_scrapers = []
+        cache_info = {}
+        rejects = RejectRegistry()  # Rejets du job, par étape, site et motif
 
         # Scraper chaque site sélectionné
         for i, site_name in enumerate(sites):
@@ -505,6 +533,15 @@ def run_scraping_task(user_id, ville, rayon, sites, lat=None, lon=None):
                 profile = get_profile(site_name)
                 scraper = None
 
+                # Résultats récents en cache (TTL = list_refresh_min du site)
+                if not force_refresh:
+                    cached = result_cache.get(site_name, ville, rayon, profile.list_refresh_min)
+                    if cached:
+                        print(f"  💾 {site_name}: {len(cached.listings)} annonces en cache ({cached.age_minutes} min), pas de requête")
+                        cache_info[site_name] = {'hit': True, 'age_min': cached.age_minutes}
+                        all_listings.extend(seen_index.drop_known(user_id, cached.listings))
+                        continue
+
                 if site_name == 'pap':
                     from scrapers.pap import PapScraper
                     scraper = PapScraper()
@@ -532,12 +569,21 @@ def run_scraping_task(user_id, ville, rayon, sites, lat=None, lon=None):
                     if geo_override:
                         scraper._geo_cache[ville] = geo_override
 
+                    # Scraping incrémental: s'arrête aux annonces déjà vues, sauf un
+                    # passage sur PRESENCE_SWEEP_EVERY (toutes les pages, annonces retirées)
+                    scraper.use_watermark(watermark_scope, sweep=presence.plan_run(watermark_scope, site_name))
+                    scraper.use_seen_index(user_id)
+                    scraper.track_rejects(rejects)
+                    used_scrapers.append(scraper)
+
                     # Utiliser le max_pages du profil du site
                     max_pages = profile.max_pages
                     print(f"  📊 Profil {site_name}: RPS={profile.rps}, max_pages={max_pages}, strict={profile.strict_location}")
 
-                    listings = scraper.scrape(ville, rayon, max_pages=max_pages)
+                    # Un seul fetch pour les recherches identiques en cours (autres utilisateurs)
+                    listings, shared = fetch_shared(scraper, ville, rayon, max_pages, user_id=user_id)
                     all_listings.extend(listings)
+                    cache_info[site_name] = {'hit': False, 'age_min': 0, 'shared': shared}
             except Exception as e:
                 print(f"Erreur scraping {site_name}: {e}")
                 # Enregistrer l'échec pour le circuit breaker si applicable
@@ -549,15 +595,21 @@ def run_scraping_task(user_id, ville, rayon, sites, lat=None, lon=None):
             message='Validation et filtrage des annonces...'
         )
 
-        valid_listings = [l for l in all_listings if validate_listing(l)]
-        particulier_listings = filter_agencies(valid_listings)
-
-        # Filtrer par département (évite les résultats de mauvaises localisations)
+        # Validation, agences, département et doublons en un seul passage
         departement = geo_override.get('departement') if geo_override else None
-        location_filtered = filter_by_location(particulier_listings, ville, departement)
+        pipeline = ListingPipeline(ville, departement, rejects=rejects)
+        final_listings = pipeline.run(all_listings)
+        print(f"🧹 {len(all_listings)} annonces → {len(final_listings)} retenues ({rejects.summary()})")
+
+        # Quasi-doublons entre sites: une annonce par bien, avec toutes ses sources
+        merger = NearDuplicateMerger()
+        final_listings = merger.merge(final_listings)
+
+        # Doublons par photo (optionnel): même première photo sur plusieurs sites
+        final_listings = photo_matcher.merge(user_id, final_listings)
 
-        dedup_url = deduplicate_by_url(location_filtered)
-        final_listings = deduplicate_by_signature(dedup_url)
+        # Enregistrements compacts: métadonnées du pipeline (_geo_*, _scraper...) à part
+        final_listings = [Listing.from_dict(l) for l in final_listings]
 
         # Insertion en base de données
         update_scraping_status(user_id,
@@ -565,15 +617,61 @@ def run_scraping_task(user_id, ville, rayon, sites, lat=None, lon=None):
             message='Enregistrement en base de données...'
         )
 
-        inserted = 0
-        updated = 0
-        if final_listings:
-            try:
-                result = db.insert_listings(user_id, final_listings)
-                inserted = result.get('inserted', 0) if result else 0
-                updated = result.get('updated', 0) if result else 0
-            except Exception as e:
-                print(f"Erreur insertion DB: {e}")
+        # Écriture différée par lots, en fin de job: la validation et les doublons entre
+        # sites ont besoin de toutes les annonces. Les statistiques sont calculées pendant l'envoi
+        db.queue_listings(user_id, final_listings)
+
+        # Économies du cache HTTP conditionnel
+        http_cache_stats = {'pages': 0, 'cached_pages': 0, 'bytes_saved': 0, 'parse_ms_saved': 0.0}
+        for scraper in used_scrapers:
+            for key, value in scraper.get_cache_stats().items():
+                http_cache_stats[key] += value
+
+        # Chargements Playwright (politique de blocage par site)
+        load_stats = {'pages': 0, 'load_ms': 0.0, 'requests': 0, 'bytes': 0, 'blocked': 0}
+        for scraper in used_scrapers:
+            for key, value in scraper.get_load_stats().items():
+                load_stats[key] += value
+
+        # Pipeline de pagination (parsing recouvert par les délais humains)
+        pipeline_stats = {'pages': 0, 'parse_ms': 0.0, 'overlap_ms': 0.0, 'pace_ms': 0.0, 'known': 0}
+        for scraper in used_scrapers:
+            for key, value in scraper.get_pipeline_stats().items():
+                pipeline_stats[key] += value
+
+        # Fin du job: attendre l'écriture de toutes les annonces
+        result = db.flush_listings(user_id)
+        added, duplicates = result.added, result.duplicates
+        saved = db.connected and not result.failed
+        if result.failed:
+            print(f"Erreur insertion DB: {result.failed} annonces non enregistrées")
+
+        # Annonces revues (last_seen_at, une requête) et retirées depuis plusieurs passages complets
+        presence_stats = {'touched': 0, 'removed': 0}
+        if saved:
+            seen_keys = {l.key for l in final_listings}
+            seen_urls = [link for l in final_listings for link in l.source_links()]  # Lignes sans url_key
+            removed_keys = []
+            for scraper in used_scrapers:
+                links = scraper.seen_links
+                seen_keys.update(canonical_url(link) for link in links)
+                seen_urls.extend(links)
+                if scraper.complete_run:
+                    removed_keys.extend(presence.observe(watermark_scope, scraper.site_key, links))
+            presence_stats['touched'] = db.touch_listings(user_id, list(seen_keys), seen_urls)
+            presence_stats['removed'] = db.mark_listings_removed(user_id, removed_keys)
+
+        # Mémoriser les annonces vues pour le prochain passage (si sauvegardées)
+        if saved:
+            for scraper in used_scrapers:
+                scraper.commit_watermark()
+
+            # Annonces enregistrées (et leurs autres sources): écartées dès l'extraction aux prochains passages
+            seen_index.add(user_id, [link for l in final_listings for link in l.source_links()])
+
+        # Pages de détail (téléphone, description) des annonces nouvelles ou périmées, en arrière-plan
+        if saved:
+            detail_fetcher.schedule(db, user_id)
 
         # Terminé
         update_scraping_status(user_id,
@@ -583,12 +681,25 @@ def run_scraping_task(user_id, ville, rayon, sites, lat=None, lon=None):
             finished_at=datetime.now().isoformat(),
             results={
                 'total_scraped': len(all_listings),
-                'valid': len(valid_listings),
-                'particuliers': len(particulier_listings),
-                'location_filtered': len(location_filtered),
+                'valid': pipeline.stages['valid'],
+                'particuliers': pipeline.stages['particuliers'],
+                'location_filtered': pipeline.stages['location_filtered'],
                 'final': len(final_listings),
-                'inserted': inserted,
-                'updated': updated
+                'rejects': rejects.get_stats(),
+                'near_duplicates': merger.get_stats(),
+                'photos': photo_matcher.get_stats(),
+                'seen_index': seen_index.get_stats(),
+                'added': added,
+                'duplicates': duplicates,
+                'db_writes': db.writer.get_stats(),
+                'presence': presence_stats,
+                'cache': cache_info,
+                'http_cache': http_cache_stats,
+                'page_loads': load_stats,
+                'pipeline': pipeline_stats,
+                'selectors': {s.site_key: s.ad_plan.get_stats() for s in used_scrapers if s.ad_plan},
+                'browser_pool': browser_pool.get_stats(),
+                'parse_pool': parse_pool.get_stats()
             }
         )
 
@@ -613,7 +724,17 @@ def scrape_page():
     if is_db_connected():
         preferences = db.get_search_preferences(user_id)
 
-    return render_template('scrape.html', scraping_status=status, preferences=preferences)
+    # Âge des résultats en cache pour la dernière recherche
+    cache_ages = {}
+    if preferences:
+        from scrapers.result_cache import result_cache
+        from scrapers.site_config import SITE_PROFILES
+        for site_key, profile in SITE_PROFILES.items():
+            age = result_cache.age_minutes(site_key, preferences.get('ville') or '', preferences.get('rayon') or 10, profile.list_refresh_min)
+            if age is not None:
+                cache_ages[site_key] = age
+
+    return render_template('scrape.html', scraping_status=status, preferences=preferences, cache_ages=cache_ages)
 
 @app.route('/scrape/run', methods=['POST'])
 @login_required
@@ -631,6 +752,7 @@ def run_scrape():
     ville = request.form.get('ville', 'Paris')
     rayon = int(request.form.get('rayon', 10))
     sites = request.form.getlist('sites')
+    force_refresh = request.form.get('force_refresh') == '1'
 
     # Récupérer les coordonnées GPS (optionnel)
     lat = request.form.get('lat')
@@ -660,7 +782,7 @@ def run_scrape():
     thread = threading.Thread(
         target=run_scraping_task,
         args=(user_id, ville, rayon, sites),
-        kwargs={'lat': lat, 'lon': lon}
+        kwargs={'lat': lat, 'lon': lon, 'force_refresh': force_refresh}
     )
     thread.daemon = True
     thread.start()
@@ -733,6 +855,13 @@ def api_stats():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/parser-health')
+@login_required
+def api_parser_health():
+    """API de santé des parsers: sélecteur d'annonces gagnant par site"""
+    from scrapers.selector_plan import get_selector_stats
+    return jsonify({'success': True, 'selectors': get_selector_stats()})
+
 # ============================================================================
 # PWA
 # ============================================================================
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Renseigne url_key des annonces enregistrées avant la colonne (migration).
+
+Usage:
+    python backfill_url_keys.py [--batch-size 500]
+
+À lancer une fois après ALTER TABLE listings ADD COLUMN url_key (voir
+database_schema.sql). La clé est calculée par utils/canonical_url.py,
+comme pour les nouvelles annonces: sans elle les lignes anciennes ne sont
+reconnues ni par l'upsert (repli annonce par annonce) ni par
+touch_listings / mark_listings_removed.
+
+Une ligne dont la clé existe déjà pour son utilisateur (même annonce
+enregistrée deux fois sous des URL différentes) garde url_key NULL et est
+comptée en conflit. Relancer le script ne reprend que les lignes restantes.
+"""
+
+import argparse
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=500, help="Lignes lues par requête (défaut: 500)")
+    args = parser.parse_args()
+
+    from database.manager import DatabaseManager
+    db = DatabaseManager()
+    if not db.connected:
+        print(f"❌ Base indisponible: {db.connection_error}")
+        return 1
+
+    counts = db.backfill_url_keys(batch_size=max(1, args.batch_size))
+    print(f"✅ {counts['updated']} clés renseignées, {counts['conflicts']} doublons laissés à NULL")
+    if counts['failed']:
+        print(f"⚠️ {counts['failed']} lignes en échec (sans URL ou erreur), relancer le script")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
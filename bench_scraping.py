@@ -0,0 +1,722 @@
+#!/usr/bin/env python3
+"""
+Benchmarks du pipeline de scraping (hors réseau).
+
+Usage:
+    python bench_scraping.py parsing [--fixtures DIR] [--repeat N]
+    python bench_scraping.py embedded_json [--repeat N]
+    python bench_scraping.py selectors [--repeat N]
+    python bench_scraping.py extraction [--repeat N]
+    python bench_scraping.py pagination [--pages N] [--delay S] [--latency S]
+    python bench_scraping.py parse_pool [--pages N]
+    python bench_scraping.py plans [--site SITE] [--repeat N]
+    python bench_scraping.py validation [--count N] [--repeat N]
+    python bench_scraping.py keywords [--count N] [--repeat N]
+    python bench_scraping.py near_duplicates [--count N]
+    python bench_scraping.py seen_index [--count N]
+    python bench_scraping.py listing_memory [--count N]
+    python bench_scraping.py db_writes [--count N] [--latency S]
+
+Les pages de résultats sont générées (balisage de chaque site + ~400 Ko
+de navigation/scripts autour). Avec --fixtures, des pages réelles
+enregistrées sous DIR/<site>.html sont utilisées à la place.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+
+LOCATION = {
+    'ville': 'Lyon',
+    'code_postal': '69003',
+    'departement': '69',
+    'lat': 45.76,
+    'lon': 4.84,
+    'slug': 'lyon',
+    'search_terms': ['Lyon'],
+}
+
+# Balisage d'une annonce par site (conforme aux sélecteurs des scrapers)
+AD_TEMPLATES = {
+    'pap': (
+        '<div class="search-list-item"><a href="/annonces/maison-lyon-r{i}">'
+        '<h2>Maison {p} pièces {s} m²</h2></a><span class="item-price">{prix} €</span>'
+        '<p class="item-description">Lyon 3E (69003) - proche métro</p>'
+        '<img src="https://cdn.pap.fr/photos/{i}.jpg"></div>'
+    ),
+    'paruvendu': (
+        '<div class="ergov3-annonce"><a href="/immobilier/vente/maison/{i}">'
+        '<h3>Maison {s} m² {p} pièces</h3></a><div class="ergov3-prix">{prix} €</div>'
+        '<span>69003 Lyon</span><img src="/photos/{i}.jpg"></div>'
+    ),
+    'entreparticuliers': (
+        '<article class="annonce-card"><a href="/annonce/vente-maison-{i}">'
+        '<h2>Maison {p} pièces</h2></a><span class="price">{prix} €</span>'
+        '<span>Lyon (69003) - {s} m²</span><img src="https://img.ep.com/{i}.jpg"></article>'
+    ),
+    'moteurimmo': (
+        '<div class="result-item"><a href="/annonce/{i}"><h2>Appartement {p} pièces {s} m²</h2></a>'
+        '<span class="price">{prix} €</span><span>Lyon (69003)</span></div>'
+    ),
+    'figaro': (
+        '<article><a href="/annonces/annonce-{i}.html"><h2>Appartement {p} pièces</h2></a>'
+        '<span class="price">{prix} €</span><span>Lyon 69003 - {s} m²</span></article>'
+    ),
+    'leboncoin': (
+        '<a data-qa-id="aditem_container" href="/ad/ventes_immobilieres/{i}">'
+        '<p data-qa-id="aditem_title">Maison {p} pièces {s} m²</p>'
+        '<span data-qa-id="aditem_price">{prix} €</span>'
+        '<p data-qa-id="aditem_location">Lyon 69003</p>'
+        '<img src="https://img.leboncoin.fr/{i}.jpg"></a>'
+    ),
+}
+
+SCRAPERS = {
+    'pap': ('scrapers.pap', 'PapScraper'),
+    'paruvendu': ('scrapers.paruvendu', 'ParuvenduScraper'),
+    'entreparticuliers': ('scrapers.entreparticuliers', 'EntreParticuliersScraper'),
+    'moteurimmo': ('scrapers.moteurimmo', 'MoteurImmoScraper'),
+    'figaro': ('scrapers.figaro_immo', 'FigaroImmoScraper'),
+    'leboncoin': ('scrapers.leboncoin', 'LeboncoinScraper'),
+}
+
+
+def make_page(site: str, n_ads: int = 25, filler_kb: int = 400) -> str:
+    """Page de résultats synthétique: annonces + navigation, scripts, footer."""
+    ads = ''.join(
+        AD_TEMPLATES[site].format(i=100000 + i, p=2 + i % 5, s=40 + i * 3, prix=150000 + i * 7500)
+        for i in range(n_ads)
+    )
+    nav = ''.join(
+        f'<li class="menu-entry"><a href="/rubrique/{i}">Rubrique {i}</a>'
+        f'<ul class="submenu"><li><a href="/rubrique/{i}/a">A</a></li><li><a href="/rubrique/{i}/b">B</a></li></ul></li>'
+        for i in range(200)
+    )
+    script = '<script>window.__CONFIG__ = {' + ','.join(f'"k{i}": "{"x" * 40}"' for i in range(300)) + '};</script>'
+    filler = ''
+    block = (
+        '<div class="seo-block"><p>Achetez votre bien immobilier entre particuliers, '
+        'sans frais d\'agence, partout en France.</p><span class="tag">vente</span></div>'
+    )
+    while len(filler) < filler_kb * 1024:
+        filler += block
+    return (
+        f'<!DOCTYPE html><html><head><title>Résultats</title>{script}</head><body>'
+        f'<header><nav><ul>{nav}</ul></nav></header>'
+        f'<main><section class="results">{ads}</section></main>'
+        f'<footer>{filler}</footer></body></html>'
+    )
+
+
+def load_scraper(site: str):
+    module, classname = SCRAPERS[site]
+    mod = __import__(module, fromlist=[classname])
+    return getattr(mod, classname)()
+
+
+def measure(fn, repeat: int):
+    """Meilleur temps (ms) et pic mémoire (Ko) d'une fonction."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1024, result
+
+
+def bench_parsing(args):
+    """html.parser sur la page entière vs lxml restreint à la zone des annonces."""
+    print(f"{'site':<18} {'Ko':>5} {'avant ms':>9} {'après ms':>9} {'avant Ko':>9} {'après Ko':>9}  annonces")
+
+    for site in SCRAPERS:
+        path = os.path.join(args.fixtures, f'{site}.html') if args.fixtures else None
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                html = f.read()
+        else:
+            html = make_page(site).encode('utf-8')
+
+        scraper = load_scraper(site)
+        if site == 'leboncoin':
+            extract = lambda ad: scraper._extract_listing_html(ad, LOCATION['ville'])
+        else:
+            extract = lambda ad: scraper._extract_listing(ad, LOCATION)
+
+        def before():
+            soup = BeautifulSoup(html, 'html.parser')
+            ads = scraper._find_ads(soup)
+            return [l for l in (extract(ad) for ad in ads) if l]
+
+        def after():
+            soup, ads = scraper._parse_ads(html)
+            listings = [l for l in (extract(ad) for ad in ads) if l]
+            soup.decompose()
+            return listings
+
+        t_before, m_before, l_before = measure(before, args.repeat)
+        t_after, m_after, l_after = measure(after, args.repeat)
+        same = [l['lien'] for l in l_before] == [l['lien'] for l in l_after]
+
+        print(
+            f"{site:<18} {len(html) // 1024:>5} {t_before:>9.1f} {t_after:>9.1f} "
+            f"{m_before:>9.0f} {m_after:>9.0f}  {len(l_after)}{'' if same else ' ⚠️ différent'}"
+        )
+
+
+def make_next_data_page(n_ads: int = 35, filler_kb: int = 400) -> str:
+    """Page Next.js synthétique (leboncoin): annonces dans __NEXT_DATA__."""
+    ads = [
+        {
+            'list_id': 2000000 + i,
+            'subject': f'Maison {2 + i % 5} pièces',
+            'price': [150000 + i * 7500],
+            'url': f'/ad/ventes_immobilieres/{2000000 + i}',
+            'images': {'urls': [f'https://img.leboncoin.fr/{i}-{j}.jpg' for j in range(6)]},
+            'location': {'city': 'Lyon', 'zipcode': '69003', 'lat': 45.76, 'lng': 4.84},
+            'attributes': [{'key': f'attr{k}', 'value': str(k), 'value_label': f'Valeur {k}'} for k in range(15)],
+            'body': 'Belle maison lumineuse ' * 20,
+        }
+        for i in range(n_ads)
+    ]
+    next_data = {
+        'props': {'pageProps': {'searchData': {'total': n_ads, 'ads': ads}, 'user': None}},
+        'page': '/recherche',
+        'query': {'category': '9'},
+    }
+    body = make_page('leboncoin', n_ads=0, filler_kb=filler_kb)
+    script = f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>'
+    return body.replace('</body>', script + '</body>')
+
+
+def bench_embedded_json(args):
+    """Soup + json + parcours récursif vs recherche d'octets + chemin précalculé."""
+    from scrapers.embedded_json import JSON_BACKEND, extract_list
+    from scrapers.leboncoin import ADS_JSON
+
+    html = make_next_data_page().encode('utf-8')
+
+    def find_ads_recursive(data, depth=0):
+        if depth > 6:
+            return []
+        if isinstance(data, dict):
+            if isinstance(data.get('ads'), list):
+                return data['ads']
+            children = data.values()
+        elif isinstance(data, list):
+            children = data
+        else:
+            return []
+        for child in children:
+            result = find_ads_recursive(child, depth + 1)
+            if result:
+                return result
+        return []
+
+    def before():
+        soup = BeautifulSoup(html, 'html.parser')
+        script = soup.find('script', id='__NEXT_DATA__')
+        return find_ads_recursive(json.loads(script.string))
+
+    def after():
+        return extract_list(html, ADS_JSON)
+
+    t_before, m_before, ads_before = measure(before, args.repeat)
+    t_after, m_after, ads_after = measure(after, args.repeat)
+
+    print(f"Page: {len(html) // 1024} Ko, {len(ads_after)} annonces (JSON: {JSON_BACKEND})")
+    print(f"  avant: {t_before:.1f} ms, pic {m_before:.0f} Ko")
+    print(f"  après: {t_after:.1f} ms, pic {m_after:.0f} Ko")
+    print(f"  identique: {ads_before == ads_after}")
+
+
+def bench_selectors(args):
+    """Cascade séquentielle (un find_all par sélecteur) vs plan mémorisé."""
+    from scrapers.selector_plan import SelectorPlan
+
+    print(f"{'site':<18} {'gagnant':>8} {'cascade ms':>11} {'plan ms':>8}")
+
+    for site in SCRAPERS:
+        scraper = load_scraper(site)
+        plan = scraper.ad_plan
+        # Page dont les annonces matchent le dernier sélecteur de la cascade
+        last = plan.selectors[-1]
+        ad = '<{tag} class="annonce listing"><a href="/annonce/{i}">Maison</a></{tag}>'
+        ads = ''.join(ad.format(tag=last.tag or 'div', i=i) for i in range(25))
+        html = make_page(site, n_ads=0).replace('<section class="results">', f'<section class="results">{ads}')
+        soup = BeautifulSoup(html, 'lxml')
+
+        def sequential():
+            for selector in plan.selectors:
+                found = selector.find_all(soup)
+                if len(found) >= plan.min_count:
+                    return found
+            return plan.fallback(soup) if plan.fallback else []
+
+        fresh = SelectorPlan(f'bench-{site}', plan.selectors, plan.fallback, plan.min_count)
+        t_before, _, _ = measure(sequential, args.repeat)
+        t_after, _, _ = measure(lambda: fresh.find(soup), args.repeat)
+        winner = fresh.get_stats()['winner']
+        print(f"{site:<18} {'n°' + str(plan.selectors.index(last) + 1) if winner else '-':>8} {t_before:>11.1f} {t_after:>8.1f}")
+
+
+def bench_extraction(args):
+    """re.search successifs (cache re) vs extraction précompilée en un parcours."""
+    from utils.extraction import extract_fields
+
+    def inline(text):
+        loc_match = re.search(r'([A-Za-zÀ-ÿ][A-Za-zÀ-ÿ0-9\s-]+)\s*\((\d{5})\)', text)
+        cp_match = None if loc_match else re.search(r'(\d{5})\s+([A-Za-zÀ-ÿ][A-Za-zÀ-ÿ\s-]+)', text)
+        surface_match = re.search(r'(\d+)\s*m[²2]', text, re.I)
+        pieces_match = re.search(r'(\d+)\s*pièces?|[TF](\d+)', text, re.I)
+        prix_match = re.search(r'(\d[\d\s]*)\s*€', text)
+        return loc_match or cp_match, surface_match, pieces_match, prix_match
+
+    texts = []
+    for site in AD_TEMPLATES:
+        soup = BeautifulSoup(make_page(site, n_ads=200, filler_kb=0), 'lxml')
+        texts += [ad.get_text() for ad in load_scraper(site)._find_ads(soup)]
+    texts += [text + ' Belle maison lumineuse, proche commerces et écoles. ' * 5 for text in texts]
+
+    t_before, _, _ = measure(lambda: [inline(t) for t in texts], args.repeat)
+    t_after, _, _ = measure(lambda: [extract_fields(t) for t in texts], args.repeat)
+
+    print(f"{len(texts)} textes d'annonces ({sum(map(len, texts)) // len(texts)} caractères en moyenne)")
+    print(f"  avant: {t_before * 1000 / len(texts):.1f} µs/annonce")
+    print(f"  après: {t_after * 1000 / len(texts):.1f} µs/annonce")
+
+
+def bench_pagination(args):
+    """Boucle séquentielle (délai, requête, parsing) vs pipeline (parsing pendant le délai)."""
+    scraper = load_scraper('pap')
+    html = make_page('pap').encode('utf-8')
+    scraper._timer.next_delay = lambda: args.delay
+
+    def request():
+        time.sleep(args.latency)  # Réseau simulé
+        return html
+
+    def sequential():
+        listings = []
+        for page_num in range(1, args.pages + 1):
+            time.sleep(scraper._timer.next_delay())
+            page_listings = scraper._parse_listing_page(request(), LOCATION)
+            listings += [scraper._enrich_listing(l, LOCATION) for l in page_listings]
+        return listings
+
+    def pipelined():
+        return scraper._paginate(lambda page_num: scraper._submit_parse(request(), LOCATION), LOCATION, args.pages)
+
+    start = time.perf_counter()
+    before = sequential()
+    t_before = time.perf_counter() - start
+
+    start = time.perf_counter()
+    after = pipelined()
+    t_after = time.perf_counter() - start
+
+    floor = args.pages * (args.delay + args.latency)
+    print(f"{args.pages} pages, délai {args.delay}s, réseau {args.latency}s (plancher {floor:.2f}s)")
+    print(f"  séquentiel: {t_before:.2f}s ({len(before)} annonces)")
+    print(f"  pipeline:   {t_after:.2f}s ({len(after)} annonces)")
+    print(f"  parsing recouvert: {scraper.get_pipeline_stats()['overlap_ms']:.0f} ms")
+
+
+def bench_parse_pool(args):
+    """Latence d'un thread "Flask" pendant le parsing: threads vs pool de processus."""
+    import threading
+    from scrapers.parse_pool import ParsePool
+
+    scraper = load_scraper('pap')
+    html = make_page('pap').encode('utf-8')
+    pages = args.pages * 4
+
+    print(f"{'backend':<10} {'total s':>8} {'latence moy ms':>15} {'latence max ms':>15}")
+    for backend in ('thread', 'process'):
+        pool = ParsePool(backend=backend, threads=4, processes=4)
+        if backend == 'process':
+            pool.submit(lambda: pool.parse(scraper, html, LOCATION)).result()  # Démarrage des workers
+
+        # Thread qui simule une requête dashboard toutes les 5 ms
+        stop = threading.Event()
+        lags = []
+
+        def heartbeat():
+            while not stop.is_set():
+                start = time.perf_counter()
+                time.sleep(0.005)
+                lags.append((time.perf_counter() - start - 0.005) * 1000)
+
+        ticker = threading.Thread(target=heartbeat)
+        ticker.start()
+        start = time.perf_counter()
+        futures = [pool.submit(lambda: pool.parse(scraper, html, LOCATION)) for _ in range(pages)]
+        results = [f.result() for f in futures]
+        total = time.perf_counter() - start
+        stop.set()
+        ticker.join()
+        pool.close()
+
+        print(f"{backend:<10} {total:>8.2f} {sum(lags) / len(lags):>15.1f} {max(lags):>15.1f}"
+              f"  ({pages} pages, {sum(map(len, results))} annonces)")
+
+
+def bench_plans(args):
+    """Plans d'extraction déclaratifs (SITE_SPECS), chacun mesuré séparément."""
+    from scrapers.extraction_plan import get_plan
+    from scrapers.site_specs import SITE_SPECS
+
+    sites = [args.site] if args.site else [site for site in SITE_SPECS if site in AD_TEMPLATES]
+    print(f"{'site':<18} {'sélecteurs':>10} {'page ms':>8} {'µs/annonce':>11}  annonces")
+
+    for site in sites:
+        scraper = load_scraper(site)
+        plan = get_plan(site)
+        html = make_page(site).encode('utf-8')
+
+        t_page, _, listings = measure(lambda: scraper._parse_listing_page(html, LOCATION), args.repeat)
+
+        soup, ads = scraper._parse_ads(html)
+        ads = ads[:plan.spec.max_ads]
+        t_ads, _, _ = measure(lambda: [plan.extract(ad, LOCATION) for ad in ads], args.repeat)
+        soup.decompose()
+
+        n_selectors = sum(len(getattr(plan.spec, name)) for name in ('title', 'price', 'location'))
+        print(f"{site:<18} {n_selectors:>10} {t_page:>8.1f} {t_ads * 1000 / max(len(ads), 1):>11.1f}  {len(listings)}")
+
+
+def make_listings(count: int):
+    """Annonces brutes variées: valides, invalides, agences, hors département, doublons."""
+    import random
+    rng = random.Random(42)
+    villes = ['Lyon (69003)', 'Villeurbanne (69100)', 'Marseille (13001)', 'Lyon', 'Bron (69500)']
+    listings = []
+    for i in range(count):
+        n = rng.randrange(count // 2 or 1)  # ~1/3 de doublons d'URL ou de signature
+        listings.append({
+            'titre': rng.choice(['Maison 4 pièces', 'Appartement T3', 'Agence: T2 lumineux', '']) + f' {n % 500}',
+            'date_publication': '2026-10-01',
+            'prix': rng.choice([0, 'NC', 150000 + n, 230000 + n, 310000]),
+            'localisation': rng.choice(villes),
+            'lien': f'https://www.pap.fr/annonces/maison-r{n}',
+            'site_source': 'pap.fr',
+            'description': '',
+        })
+    return listings
+
+
+def bench_validation(args):
+    """Cinq passes (validate, agences, département, URL, signature) vs étape fusionnée."""
+    import contextlib
+    import io
+    from utils.validator import (
+        ListingPipeline, validate_listing, filter_agencies, filter_by_location,
+        deduplicate_by_url, deduplicate_by_signature,
+    )
+
+    listings = make_listings(args.count or 20000)
+
+    def chained():
+        with contextlib.redirect_stdout(io.StringIO()):
+            valid = [l for l in listings if validate_listing(l)]
+            located = filter_by_location(filter_agencies(valid), 'Lyon 69003')
+            return deduplicate_by_signature(deduplicate_by_url(located))
+
+    def fused():
+        return ListingPipeline('Lyon 69003').run(listings)
+
+    t_before, m_before, before = measure(chained, args.repeat)
+    t_after, m_after, after = measure(fused, args.repeat)
+
+    pipeline = ListingPipeline('Lyon 69003')
+    pipeline.run(listings)
+    print(f"{len(listings)} annonces, {len(after)} retenues (identiques: {before == after})")
+    print(f"  chaîne:    {t_before:>8.1f} ms  {m_before:>8.0f} Ko")
+    print(f"  fusionnée: {t_after:>8.1f} ms  {m_after:>8.0f} Ko")
+    print(f"  rejets: {pipeline.summary()}")
+
+
+def bench_keywords(args):
+    """Boucle "keyword in texte" par mot-clé vs expression compilée bornée aux mots."""
+    import random
+    from config import AGENCY_KEYWORDS
+    from utils.keywords import KeywordMatcher
+
+    rng = random.Random(42)
+    words = ('maison lumineuse proche commerces écoles jardin terrasse garage cuisine équipée séjour '
+             'chambres calme quartier recherché transports vendu par propriétaire sans frais vue '
+             'dégagée immobilière Sassenage crédit immobilisé').split()
+    titles = ['Maison 4 pièces', 'Appartement T3', 'Villa avec piscine'] * 6 + ['Agence du centre: T2', 'SARL Durand - T4']
+    listings = [
+        {'titre': rng.choice(titles), 'description': ' '.join(rng.choice(words) for _ in range(120))}
+        for _ in range(args.count or 100000)
+    ]
+
+    def substring(keywords):
+        def is_agency(listing):
+            titre = listing.get('titre', '').lower()
+            description = listing.get('description', '').lower()
+            return any(keyword in titre or keyword in description for keyword in keywords)
+        return lambda: sum(1 for l in listings if is_agency(l))
+
+    def compiled(keywords):
+        matcher = KeywordMatcher(keywords)
+        return lambda: sum(1 for l in listings if matcher.search_fields(l['titre'], l['description']))
+
+    # Liste étendue: même coût par texte pour l'expression, linéaire pour la boucle
+    extended = list(AGENCY_KEYWORDS) + [f"{k}{i}" for i in range(4) for k in AGENCY_KEYWORDS]
+    length = sum(len(l['description']) for l in listings) // len(listings)
+    print(f"{len(listings)} annonces (descriptions de {length} caractères)")
+    print(f"{'mots-clés':>10} {'boucle ms':>10} {'compilé ms':>11} {'agences (boucle)':>17} {'agences (compilé)':>18}")
+    for keywords in (AGENCY_KEYWORDS, extended):
+        t_before, _, n_before = measure(substring(keywords), args.repeat)
+        t_after, _, n_after = measure(compiled(keywords), args.repeat)
+        print(f"{len(keywords):>10} {t_before:>10.0f} {t_after:>11.0f} {n_before:>17} {n_after:>18}")
+
+
+def make_cross_site_listings(count: int):
+    """Biens distincts publiés sur 1 à 3 sites (titre reformulé, prix ±2%); renvoie (annonces, bien de chaque annonce)."""
+    import random
+    rng = random.Random(7)
+    types = ['Maison', 'Appartement', 'Villa', 'Loft', 'Duplex', 'Studio']
+    extras = ['avec jardin', 'lumineux', 'proche centre', 'avec garage', 'vue dégagée', 'au calme', 'refait à neuf', 'avec terrasse']
+    villes = ['Lyon (69003)', 'Villeurbanne (69100)', 'Bron (69500)', 'Vénissieux (69200)', 'Caluire (69300)']
+    sites = ['pap.fr', 'leboncoin.fr', 'paruvendu.fr']
+
+    listings, truth = [], []
+    for n in range(count):
+        kind, ville = rng.choice(types), rng.choice(villes)
+        surface, pieces = rng.randint(20, 200), rng.randint(1, 7)
+        prix = rng.randint(80, 900) * 1000
+        words = rng.sample(extras, 2)
+        for site in rng.sample(sites, rng.choice([1, 1, 2, 3])):
+            title = rng.choice([
+                f"{kind} {pieces} pièces {surface} m² {words[0]}",
+                f"{kind} {surface}m2 - {pieces} pieces, {words[0]}",
+                f"Vends {kind.lower()} {words[0]} {words[1]} {surface} m²",
+            ])
+            listings.append({
+                'titre': title, 'localisation': ville, 'prix': int(prix * rng.uniform(0.98, 1.02)),
+                'surface': surface, 'pieces': pieces, 'lien': f"https://{site}/annonce/{n}",
+                'site_source': site, 'photos': [], 'description': '',
+            })
+            truth.append(n)
+    order = list(range(len(listings)))
+    rng.shuffle(order)
+    return [listings[i] for i in order], [truth[i] for i in order]
+
+
+def bench_near_duplicates(args):
+    """Paires candidates LSH vs toutes les paires, et qualité des groupes (biens générés)."""
+    from utils.near_duplicates import NearDuplicateMerger
+
+    print(f"{'biens':>6} {'annonces':>8} {'paires':>9} {'candidats':>9} {'ms':>7} {'groupes':>7} {'précision':>9} {'rappel':>7}")
+    for count in ([args.count] if args.count else [250, 1000, 4000]):
+        listings, truth = make_cross_site_listings(count)
+        merger = NearDuplicateMerger()
+        start = time.perf_counter()
+        groups = merger.clusters(listings)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        # Paires regroupées vs paires d'un même bien
+        found = {(i, j) for group in groups for i in group for j in group if i < j}
+        copies = {}
+        for i, n in enumerate(truth):
+            copies.setdefault(n, []).append(i)
+        expected = {(i, j) for group in copies.values() for i in group for j in group if i < j}
+        precision = len(found & expected) / len(found) if found else 1.0
+        recall = len(found & expected) / len(expected) if expected else 1.0
+        pairs = len(listings) * (len(listings) - 1) // 2
+        print(f"{count:>6} {len(listings):>8} {pairs:>9} {merger.get_stats()['candidates']:>9} {elapsed:>7.0f} "
+              f"{sum(1 for g in groups if len(g) > 1):>7} {precision:>9.2f} {recall:>7.2f}")
+
+
+def bench_seen_index(args):
+    """Index des annonces vues: ajout et vérification de N URLs, mémoire et faux positifs du filtre."""
+    import shutil
+    import tempfile
+    from scrapers.seen_index import BloomFilter, SeenIndex
+
+    count = args.count or 1000000
+    directory = tempfile.mkdtemp()
+    index = SeenIndex(directory, capacity=count)
+    urls = [f"https://www.pap.fr/annonces/maison-lyon-r{n}" for n in range(count)]
+
+    start = time.perf_counter()
+    for batch in range(0, count, 10000):
+        index.add('bench', urls[batch:batch + 10000])
+    t_add = time.perf_counter() - start
+
+    # Page type: 1/3 d'annonces connues
+    pages = [urls[n:n + 10] + [f"https://www.pap.fr/annonces/nouvelle-r{n + i}" for i in range(20)]
+             for n in range(0, 100000, 10)]
+    start = time.perf_counter()
+    known = sum(len(index.filter_known('bench', page)) for page in pages)
+    t_check = time.perf_counter() - start
+    stats = index.get_stats()
+
+    tracemalloc.start()
+    for page in pages[:1000]:
+        index.filter_known('bench', page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    index_bytes = BloomFilter.size_for(count, index.error_rate)
+    index.close()
+
+    disk = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+    shutil.rmtree(directory)
+    checked = sum(map(len, pages))
+    false_positives = checked - stats['bloom_negative'] - known
+    print(f"{count} URLs: ajout {t_add:.1f}s, filtre de Bloom {index_bytes / 1024 / 1024:.1f} Mo, disque {disk / 1024 / 1024:.0f} Mo")
+    print(f"{checked} liens vérifiés: {t_check * 1e6 / checked:.1f} µs/lien, {known} connus, "
+          f"{false_positives} faux positifs du filtre écartés par SQLite, pic mémoire {peak / 1024:.0f} Ko")
+
+
+def make_enriched_listings(count: int):
+    """Annonces telles qu'en sortie de scraper: champs + métadonnées _geo_*/_scraper."""
+    listings = []
+    for n in range(count):
+        listings.append({
+            'titre': f'Maison {n % 7 + 2} pièces {60 + n % 90} m²',
+            'date_publication': '2026-10-01',
+            'prix': 150000 + n,
+            'localisation': f'Lyon ({69000 + n % 10})',
+            'lien': f'https://www.pap.fr/annonces/maison-lyon-r{100000 + n}',
+            'site_source': 'pap.fr',
+            'photos': [f'https://cdn.pap.fr/photos/{n}.jpg'],
+            'telephone': None,
+            'surface': 60 + n % 90,
+            'pieces': n % 7 + 2,
+            'description': '',
+            '_scraped_at': '2026-10-01 12:00:00',
+            '_scraper': 'pap',
+            '_expected_dept': '69',
+            '_geo_confidence': 'high',
+            '_geo_cp': f'{69000 + n % 10}',
+        })
+    return listings
+
+
+def bench_listing_memory(args):
+    """Mémoire de N annonces: dictionnaires vs Listing (__slots__), avec et sans métadonnées."""
+    from utils.listing import Listing
+
+    count = args.count or 100000
+
+    def retained(build):
+        tracemalloc.start()
+        items = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return items, current
+
+    # Valeurs (chaînes, listes de photos) partagées: seul le conteneur de chaque annonce est compté
+    scraped = make_enriched_listings(count)
+    variants = [
+        ('dict (scraper + _geo_*)', lambda: [dict(l) for l in scraped]),
+        ('Listing + meta', lambda: [Listing.from_dict(l) for l in scraped]),
+        ('Listing sans meta', lambda: [Listing(**{k: v for k, v in l.items() if not k.startswith('_')}) for l in scraped]),
+    ]
+    print(f"{'variante':<28} {'mémoire':>10} {'o/annonce':>10}")
+    for name, build in variants:
+        items, size = retained(build)
+        del items
+        print(f"{name:<28} {size / 1024 / 1024:>8.1f}Mo {size / count:>10.0f}")
+
+    start = time.perf_counter()
+    records = [Listing.from_dict(l) for l in scraped]
+    t_from = time.perf_counter() - start
+    start = time.perf_counter()
+    rows = [l.to_row('bench') for l in records]
+    t_rows = time.perf_counter() - start
+    start = time.perf_counter()
+    back = [l.to_dict() for l in records]
+    t_dict = time.perf_counter() - start
+    print(f"from_dict: {t_from * 1e6 / count:.2f} µs/annonce, to_row: {t_rows * 1e6 / count:.2f} µs, "
+          f"to_dict: {t_dict * 1e6 / count:.2f} µs ({len(rows) + len(back)} conversions)")
+
+
+def bench_db_writes(args):
+    """Écriture de N annonces, latence base simulée: une requête par annonce vs file d'écriture par lots."""
+    from database.manager import InsertResult
+    from database.write_behind import WriteBehindQueue
+    from utils.listing import Listing
+
+    count = args.count or 2000
+    listings = [Listing.from_dict(l) for l in make_enriched_listings(count)]
+
+    def request():
+        time.sleep(args.latency)
+
+    # Avant: vérification puis insertion, annonce par annonce, dans le thread du job
+    start = time.perf_counter()
+    for _ in listings[:200]:
+        request()
+        request()
+    t_sync = (time.perf_counter() - start) * count / 200
+
+    def upsert(user_id, batch):
+        request()
+        return InsertResult(added=len(batch))
+
+    writer = WriteBehindQueue(upsert, interval=0.05)
+    start = time.perf_counter()
+    writer.put('bench', listings)
+    t_put = time.perf_counter() - start
+    writer.drain()
+    t_total = time.perf_counter() - start
+    stats = writer.get_stats()
+    writer.close()
+
+    print(f"{count} annonces, latence {args.latency * 1000:.0f} ms par requête")
+    print(f"  annonce par annonce: {t_sync:.1f}s (estimé sur 200), job bloqué tout du long")
+    print(f"  file par lots:       {t_total:.2f}s jusqu'à la fin des écritures (dépôt {t_put * 1000:.0f} ms), "
+          f"{stats['batches']} lots de {writer.batch_size}, {stats['flush_ms']['avg']} ms par lot")
+
+
+BENCHMARKS = {
+    'parsing': bench_parsing,
+    'embedded_json': bench_embedded_json,
+    'selectors': bench_selectors,
+    'extraction': bench_extraction,
+    'pagination': bench_pagination,
+    'parse_pool': bench_parse_pool,
+    'plans': bench_plans,
+    'validation': bench_validation,
+    'keywords': bench_keywords,
+    'near_duplicates': bench_near_duplicates,
+    'seen_index': bench_seen_index,
+    'listing_memory': bench_listing_memory,
+    'db_writes': bench_db_writes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--fixtures', help="Répertoire de pages réelles (<site>.html)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--site', help="Un seul site (plans)")
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--count', type=int, help="Nombre d'annonces générées (validation: 20000, keywords: 100000)")
+    parser.add_argument('--delay', type=float, default=0.3, help="Délai humain simulé (s)")
+    parser.add_argument('--latency', type=float, default=0.05, help="Latence réseau simulée (s)")
+    args = parser.parse_args()
+
+    BENCHMARKS[args.benchmark](args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,4 @@
-from .manager import DatabaseManager
+from .manager import DatabaseManager, InsertResult
+from .write_behind import WriteBehindQueue
 
-__all__ = ['DatabaseManager']
+__all__ = ['DatabaseManager', 'InsertResult', 'WriteBehindQueue']
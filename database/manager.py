@@ -1,12 +1,30 @@
 """
 Gestionnaire de base de données Supabase via API REST.
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
+from dataclasses import dataclass
 from datetime import datetime
-import hashlib
+import atexit
 import os
 import requests
 
+from utils.canonical_url import canonical_url
+from utils.listing import Listing
+from .write_behind import WriteBehindQueue
+
+
+# Clés canoniques par requête PATCH (longueur de l'URL)
+TOUCH_BATCH_SIZE = 200
+
+
+@dataclass
+class InsertResult:
+    """Bilan d'une insertion: annonces ajoutées, déjà présentes en base, non écrites."""
+
+    added: int = 0
+    duplicates: int = 0
+    failed: int = 0
+
 
 class DatabaseManager:
     """Gestionnaire Supabase via API REST directe."""
@@ -16,6 +34,12 @@ class DatabaseManager:
         self.api_key = os.getenv('SUPABASE_KEY')
         self.connected = False
         self.connection_error = None
+        self._details_rpc = True  # Fonction SQL update_listing_details disponible
+        self._touch_rpc = True  # Fonction SQL touch_listings disponible
+
+        # Écriture différée des annonces (voir write_behind.py)
+        self.writer = WriteBehindQueue(self.upsert_listings)
+        atexit.register(self.writer.close)
 
         print(f"[DB] Initialisation...", flush=True)
         print(f"[DB] SUPABASE_URL: {'OK' if self.base_url else 'MANQUANT'}", flush=True)
@@ -47,7 +71,7 @@ class DatabaseManager:
     def supabase_key_found(self):
         return bool(self.api_key)
 
-    def _api_request(self, method: str, table: str, params: dict = None, data: dict = None):
+    def _api_request(self, method: str, table: str, params: dict = None, data: Any = None, prefer: str = None):
         """Effectue une requête à l'API REST Supabase."""
         url = f"{self.base_url}/rest/v1/{table}"
 
@@ -55,7 +79,7 @@ class DatabaseManager:
             'apikey': self.api_key,
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json',
-            'Prefer': 'return=representation'
+            'Prefer': prefer or 'return=representation'
         }
 
         response = requests.request(
@@ -80,50 +104,243 @@ class DatabaseManager:
 
     # ============ Méthodes directes pour les listings ============
 
-    def insert_listings(self, user_id: str, listings: List[Dict]) -> Dict:
-        """Insère des annonces avec déduplication."""
+    def insert_listings(self, user_id: str, listings: List[Union[Listing, Dict]]) -> InsertResult:
+        """Insère des annonces avec déduplication (clé canonique)."""
         if not self.connected or not listings:
-            return {"added": 0, "duplicates": 0}
+            return InsertResult()
 
-        added = 0
-        duplicates = 0
+        result = InsertResult()
+        now = datetime.now().isoformat()
 
         for listing in listings:
+            if not isinstance(listing, Listing):
+                listing = Listing.from_dict(listing)
             try:
-                # Vérifier si existe déjà
+                # Vérifier si existe déjà (clé canonique; url pour les lignes antérieures à url_key)
                 existing = self._api_request('GET', 'listings', {
                     'select': 'id',
                     'user_id': f'eq.{user_id}',
-                    'url': f"eq.{listing['lien']}"
+                    'or': f'(url_key.eq."{listing.key}",url.eq."{listing.lien}")'
                 })
 
                 if existing:
-                    duplicates += 1
+                    result.duplicates += 1
                 else:
-                    self._api_request('POST', 'listings', data={
-                        'user_id': user_id,
-                        'hash': hashlib.md5(f"{listing['titre']}_{listing['prix']}".encode()).hexdigest(),
-                        'title': listing['titre'],
-                        'price': listing['prix'],
-                        'location': listing['localisation'],
-                        'url': listing['lien'],
-                        'source': listing['site_source'],
-                        'photos': listing.get('photos', []),
-                        'phone': listing.get('telephone'),
-                        'surface': listing.get('surface'),
-                        'rooms': listing.get('pieces'),
-                        'description': listing.get('description', ''),
-                        'status': 'Nouveau',
-                        'published_date': listing.get('date_publication'),
-                        'created_at': datetime.now().isoformat(),
-                        'last_seen_at': datetime.now().isoformat()
-                    })
-                    added += 1
+                    self._api_request('POST', 'listings', data=listing.to_row(user_id, now))
+                    result.added += 1
             except Exception as e:
                 print(f"⚠️ Erreur insertion: {e}", flush=True)
 
-        print(f"✅ {added} ajoutées, {duplicates} doublons", flush=True)
-        return {"added": added, "duplicates": duplicates}
+        print(f"✅ {result.added} ajoutées, {result.duplicates} doublons", flush=True)
+        return result
+
+    def upsert_listings(self, user_id: str, listings: List[Union[Listing, Dict]]) -> InsertResult:
+        """
+        Insère un lot d'annonces en une requête (upsert sur user_id + url_key).
+
+        Les annonces déjà en base sont ignorées: relancer un lot partiellement
+        écrit ne crée pas de doublon. Lève une exception en cas d'échec.
+        """
+        if not self.connected or not listings:
+            return InsertResult()
+
+        now = datetime.now().isoformat()
+        records = [l if isinstance(l, Listing) else Listing.from_dict(l) for l in listings]
+        rows = list({record.key: record.to_row(user_id, now) for record in records}.values())
+        try:
+            inserted = self._api_request('POST', 'listings',
+                params={'on_conflict': 'user_id,url_key', 'select': 'id'},
+                data=rows,
+                prefer='resolution=ignore-duplicates,return=representation')
+        except Exception as e:
+            if not str(e).startswith('Supabase 409'):
+                raise
+            # Conflit sur l'url d'une ligne antérieure à url_key: insertion vérifiée annonce par annonce
+            return self.insert_listings(user_id, records)
+        return InsertResult(added=len(inserted), duplicates=len(records) - len(inserted))
+
+    def queue_listings(self, user_id: str, listings: List[Union[Listing, Dict]]):
+        """Dépose des annonces dans la file d'écriture (attend si elle est pleine)."""
+        if self.connected:
+            self.writer.put(user_id, listings)
+
+    def flush_listings(self, user_id: str, timeout: float = None) -> InsertResult:
+        """Attend l'écriture des annonces déposées; bilan de l'utilisateur depuis le dernier appel."""
+        if not self.writer.drain(timeout):
+            print("⚠️ Écriture des annonces toujours en cours", flush=True)
+        return InsertResult(**self.writer.take_result(user_id))
+
+    def get_detail_candidates(
+        self,
+        user_id: str,
+        stale_before: str,
+        status: str = None,
+        limit: int = 100
+    ) -> List[Dict]:
+        """
+        Annonces dont les détails n'ont jamais été récupérés ou datent d'avant stale_before.
+
+        Args:
+            user_id: Utilisateur
+            stale_before: Date ISO (détails plus anciens = à rafraîchir)
+            status: Limiter à un statut (ex: 'Intéressé')
+            limit: Nombre maximum d'annonces (les plus anciennes d'abord)
+        """
+        if not self.connected:
+            return []
+        params = {
+            'select': 'id,url,source,status,details_fetched_at',
+            'user_id': f'eq.{user_id}',
+            'or': f'(details_fetched_at.is.null,details_fetched_at.lt."{stale_before}")',
+            'order': 'details_fetched_at.asc.nullsfirst',
+            'limit': str(limit),
+        }
+        params['status'] = f'eq.{status}' if status else 'neq.Pas intéressé'
+        try:
+            return self._api_request('GET', 'listings', params) or []
+        except Exception as e:
+            print(f"⚠️ Erreur lecture détails: {e}", flush=True)
+            return []
+
+    def update_listing_details(self, user_id: str, details: List[Dict]) -> int:
+        """
+        Enregistre les détails d'un lot d'annonces (une requête via la fonction SQL
+        update_listing_details, sinon une requête par annonce).
+
+        Args:
+            details: [{'id', 'phone', 'description', 'photos'}], None = valeur conservée
+
+        Returns:
+            Nombre d'annonces mises à jour
+        """
+        if not self.connected or not details:
+            return 0
+
+        if self._details_rpc:
+            try:
+                result = self._api_request('POST', 'rpc/update_listing_details',
+                    data={'p_user_id': user_id, 'p_details': details})
+                return result if isinstance(result, int) else len(details)
+            except Exception as e:
+                # Fonction SQL absente (schéma non migré): mises à jour unitaires
+                print(f"⚠️ update_listing_details indisponible ({e}), mises à jour unitaires", flush=True)
+                self._details_rpc = False
+
+        updated = 0
+        now = datetime.now().isoformat()
+        for detail in details:
+            data = {k: v for k, v in detail.items() if k != 'id' and v is not None}
+            data['details_fetched_at'] = now
+            try:
+                self._api_request('PATCH', 'listings',
+                    params={'id': f"eq.{detail['id']}", 'user_id': f'eq.{user_id}'},
+                    data=data)
+                updated += 1
+            except Exception as e:
+                print(f"⚠️ Erreur update détails: {e}", flush=True)
+        return updated
+
+    def touch_listings(self, user_id: str, url_keys: List[str], urls: List[str] = None) -> int:
+        """
+        Annonces revues lors d'un scraping: last_seen_at = maintenant, plus retirées.
+
+        Une requête via la fonction SQL touch_listings, sinon une requête par
+        lot de TOUCH_BATCH_SIZE clés. Les lignes sans url_key (antérieures à
+        la colonne, voir backfill_url_keys.py) sont retrouvées par leur url.
+
+        Returns:
+            Nombre d'annonces mises à jour
+        """
+        url_keys = [key for key in dict.fromkeys(url_keys) if key]
+        urls = [url for url in dict.fromkeys(urls or []) if url]
+        if not self.connected or not url_keys:
+            return 0
+
+        if self._touch_rpc:
+            try:
+                result = self._api_request('POST', 'rpc/touch_listings',
+                    data={'p_user_id': user_id, 'p_url_keys': url_keys, 'p_urls': urls})
+                return result if isinstance(result, int) else len(url_keys)
+            except Exception as e:
+                # Fonction SQL absente (schéma non migré): mises à jour par lots
+                print(f"⚠️ touch_listings indisponible ({e}), mises à jour par lots", flush=True)
+                self._touch_rpc = False
+
+        data = {'last_seen_at': datetime.now().isoformat(), 'removed_at': None}
+        updated = self._patch_by_keys(user_id, url_keys, data)
+        if urls:
+            updated += self._patch_by_keys(user_id, urls, data, {'url_key': 'is.null'}, column='url')
+        return updated
+
+    def mark_listings_removed(self, user_id: str, url_keys: List[str]) -> int:
+        """
+        Marque des annonces comme probablement retirées du site (voir scrapers/presence.py).
+
+        Par clé canonique uniquement: les lignes antérieures à url_key doivent
+        avoir été migrées (backfill_url_keys.py).
+        """
+        url_keys = [key for key in dict.fromkeys(url_keys) if key]
+        if not self.connected or not url_keys:
+            return 0
+        return self._patch_by_keys(user_id, url_keys, {'removed_at': datetime.now().isoformat()},
+                                   {'removed_at': 'is.null'})
+
+    def _patch_by_keys(
+        self,
+        user_id: str,
+        url_keys: List[str],
+        data: Dict,
+        filters: Dict = None,
+        column: str = 'url_key'
+    ) -> int:
+        """PATCH des annonces d'un utilisateur par clé canonique (ou url), TOUCH_BATCH_SIZE clés par requête."""
+        updated = 0
+        for start in range(0, len(url_keys), TOUCH_BATCH_SIZE):
+            batch = url_keys[start:start + TOUCH_BATCH_SIZE]
+            keys = ','.join('"{}"'.format(key.replace('\\', '\\\\').replace('"', '\\"')) for key in batch)
+            params = {'user_id': f'eq.{user_id}', column: f'in.({keys})', 'select': 'id'}
+            params.update(filters or {})
+            try:
+                updated += len(self._api_request('PATCH', 'listings', params=params, data=data) or [])
+            except Exception as e:
+                print(f"⚠️ Erreur mise à jour par clés: {e}", flush=True)
+        return updated
+
+    def backfill_url_keys(self, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Calcule url_key des annonces enregistrées avant la colonne (url_key NULL).
+
+        Les lignes sont lues par lots de batch_size (ordre des id), puis mises
+        à jour une par une. Une ligne dont la clé existe déjà pour son
+        utilisateur (doublon ancien) garde url_key NULL: comptée en conflit.
+
+        Returns:
+            {'updated', 'conflicts', 'failed'}
+        """
+        counts = {'updated': 0, 'conflicts': 0, 'failed': 0}
+        if not self.connected:
+            return counts
+
+        last_id = None
+        while True:
+            params = {'select': 'id,url', 'url_key': 'is.null', 'order': 'id.asc', 'limit': str(batch_size)}
+            if last_id is not None:
+                params['id'] = f'gt.{last_id}'
+            rows = self._api_request('GET', 'listings', params) or []
+            for row in rows:
+                key = canonical_url(row.get('url'))
+                if not key:
+                    counts['failed'] += 1  # Sans URL: pas de clé
+                    continue
+                try:
+                    self._api_request('PATCH', 'listings', params={'id': f"eq.{row['id']}"},
+                                      data={'url_key': key}, prefer='return=minimal')
+                    counts['updated'] += 1
+                except Exception as e:
+                    counts['conflicts' if str(e).startswith('Supabase 409') else 'failed'] += 1
+            if len(rows) < batch_size:
+                return counts
+            last_id = rows[-1]['id']
 
     def update_listing_status(self, listing_id: str, user_id: str, status: str) -> bool:
         """Met à jour le statut d'une annonce."""
@@ -224,6 +441,15 @@ class Query:
         self._params[column] = f'eq.{value}'
         return self
 
+    def is_(self, column: str, value):
+        """Filtre IS (value: 'null', 'true', 'false'); not_is_ pour la négation."""
+        self._params[column] = f'is.{value}'
+        return self
+
+    def not_is_(self, column: str, value):
+        self._params[column] = f'not.is.{value}'
+        return self
+
     def order(self, column: str, desc: bool = False):
         direction = 'desc' if desc else 'asc'
         self._params['order'] = f'{column}.{direction}'
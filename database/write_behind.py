@@ -0,0 +1,215 @@
+"""
+File d'écriture différée (write-behind) entre les jobs et la base.
+
+Le job attendait deux allers-retours Supabase par annonce, et rien ne
+limitait les annonces en attente si la base ralentissait. Les annonces
+retenues en fin de job sont maintenant déposées dans une file bornée,
+commune à tous les jobs, et écrites par lots par un thread dédié:
+- lot envoyé dès DB_WRITE_BATCH annonces, ou DB_WRITE_INTERVAL secondes
+  après la première annonce du lot
+- file pleine (DB_WRITE_QUEUE): le job qui dépose attend (backpressure)
+  au lieu d'accumuler sans limite
+- lot en échec relancé DB_WRITE_RETRIES fois (attente exponentielle);
+  l'écriture est un upsert idempotent, relancer un lot partiellement
+  écrit ne crée pas de doublon
+- drain(): attend que tout ce qui a été déposé soit écrit (fin de job,
+  arrêt du processus), avec la latence des écritures dans get_stats()
+
+L'écriture n'est pas recouverte par le scraping du job lui-même: la
+validation, les quasi-doublons et les doublons photo ont besoin des
+annonces de tous les sites, et le job attend ses écritures (drain) avant
+de valider watermark et index des vues. Une base lente allonge donc la
+fin du job (moins qu'avant: une requête par lot); elle ne ralentit pas
+le scraping des autres jobs tant que la file n'est pas pleine.
+
+    writer = WriteBehindQueue(db.upsert_listings)
+    writer.put(user_id, listings)
+    writer.drain()
+    writer.take_result(user_id)  # {'added', 'duplicates', 'failed'}
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+# Annonces par requête d'écriture
+DB_WRITE_BATCH = int(os.getenv('DB_WRITE_BATCH', 200))
+# Délai maximal (s) avant l'envoi d'un lot incomplet
+DB_WRITE_INTERVAL = float(os.getenv('DB_WRITE_INTERVAL', 2))
+# Annonces en attente au-delà desquelles les producteurs attendent
+DB_WRITE_QUEUE = int(os.getenv('DB_WRITE_QUEUE', 5000))
+# Nouvelles tentatives d'un lot en échec
+DB_WRITE_RETRIES = int(os.getenv('DB_WRITE_RETRIES', 3))
+
+# Attente avant la première nouvelle tentative (doublée ensuite)
+RETRY_DELAY = 1.0
+# Latences gardées pour les percentiles
+_LATENCY_WINDOW = 1000
+
+# Messages de contrôle du thread d'écriture
+_FLUSH = object()
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    File bornée d'annonces à écrire, vidée par un thread (voir le module).
+
+    Args:
+        flush: Écriture d'un lot (user_id, annonces) -> résultat avec
+            .added et .duplicates; lève une exception en cas d'échec
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[str, List[Any]], Any],
+        batch_size: int = DB_WRITE_BATCH,
+        interval: float = DB_WRITE_INTERVAL,
+        max_pending: int = DB_WRITE_QUEUE,
+        retries: int = DB_WRITE_RETRIES,
+        retry_delay: float = RETRY_DELAY
+    ):
+        self._flush_batch = flush
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=max(1, max_pending))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0  # Annonces déposées, pas encore écrites (ni abandonnées)
+        self._results: Dict[str, Dict[str, int]] = {}
+        self._latencies: deque = deque(maxlen=_LATENCY_WINDOW)
+        self._stats = {
+            'queued': 0, 'written': 0, 'batches': 0, 'retries': 0, 'failed': 0,
+            'blocked': 0, 'blocked_ms': 0.0, 'max_pending': 0,
+        }
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name='db-write-behind', daemon=True)
+                self._thread.start()
+
+    def put(self, user_id: str, listings: List[Any]):
+        """Dépose des annonces à écrire (attend si la file est pleine)."""
+        if not listings:
+            return
+        self._start()
+        with self._lock:
+            self._pending += len(listings)
+            self._stats['queued'] += len(listings)
+            self._stats['max_pending'] = max(self._stats['max_pending'], self._pending)
+
+        blocked = 0.0
+        for listing in listings:
+            try:
+                self._queue.put_nowait((user_id, listing))
+            except queue.Full:
+                start = time.perf_counter()
+                self._queue.put((user_id, listing))
+                blocked += time.perf_counter() - start
+        if blocked:
+            with self._lock:
+                self._stats['blocked'] += 1
+                self._stats['blocked_ms'] += blocked * 1000
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Écrit sans attendre le délai et attend la fin des écritures. False si timeout atteint."""
+        with self._lock:
+            if self._pending == 0:
+                return True
+        self._queue.put(_FLUSH)
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def take_result(self, user_id: str) -> Dict[str, int]:
+        """Annonces ajoutées, déjà présentes et abandonnées pour l'utilisateur depuis le dernier appel."""
+        with self._lock:
+            return self._results.pop(user_id, {'added': 0, 'duplicates': 0, 'failed': 0})
+
+    def close(self, timeout: float = 30):
+        """Vide la file puis arrête le thread (arrêt du processus)."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _worker(self):
+        batch: List[tuple] = []
+        deadline = 0.0
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()) if batch else None)
+            except queue.Empty:
+                item = _FLUSH
+
+            if item is _STOP:
+                self._write(batch)
+                return
+            if item is not _FLUSH:
+                if not batch:
+                    deadline = time.monotonic() + self.interval
+                batch.append(item)
+                if len(batch) < self.batch_size:
+                    continue
+            if batch:
+                self._write(batch)
+                batch = []
+
+    def _write(self, batch: List[tuple]):
+        """Écrit un lot (regroupé par utilisateur), avec nouvelles tentatives."""
+        groups: Dict[str, List[Any]] = {}
+        for user_id, listing in batch:
+            groups.setdefault(user_id, []).append(listing)
+
+        for user_id, listings in groups.items():
+            start = time.perf_counter()
+            counts = {'added': 0, 'duplicates': 0, 'failed': 0}
+            for attempt in range(self.retries + 1):
+                try:
+                    result = self._flush_batch(user_id, listings)
+                    counts['added'] = result.added
+                    counts['duplicates'] = result.duplicates
+                    break
+                except Exception as e:
+                    if attempt == self.retries:
+                        counts['failed'] = len(listings)
+                        print(f"❌ Écriture de {len(listings)} annonces abandonnée: {str(e)[:120]}", flush=True)
+                        break
+                    with self._lock:
+                        self._stats['retries'] += 1
+                    time.sleep(self.retry_delay * 2 ** attempt)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            with self._idle:
+                result = self._results.setdefault(user_id, {'added': 0, 'duplicates': 0, 'failed': 0})
+                for key, value in counts.items():
+                    result[key] += value
+                self._stats['batches'] += 1
+                self._stats['written'] += len(listings) - counts['failed']
+                self._stats['failed'] += counts['failed']
+                self._latencies.append(elapsed_ms)
+                self._pending -= len(listings)
+                if self._pending == 0:
+                    self._idle.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Annonces déposées, écrites, abandonnées; lots, relances, attente des producteurs, latence des lots."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = self._pending
+            latencies = sorted(self._latencies)
+        stats['blocked_ms'] = round(stats['blocked_ms'], 1)
+        if latencies:
+            stats['flush_ms'] = {
+                'avg': round(sum(latencies) / len(latencies), 1),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+                'max': round(latencies[-1], 1),
+            }
+        return stats
@@ -47,6 +47,8 @@ CREATE TABLE listings (
     surface INTEGER,
     rooms INTEGER,
     description TEXT,
+    sources JSONB,
+    url_key TEXT,
 
     -- Métadonnées
     status TEXT DEFAULT 'Nouveau' CHECK (status IN ('Nouveau', 'Intéressé', 'Pas intéressé', 'Visité', 'Contact pris', 'Offre faite', 'Contacté', 'Réponse reçue', 'Pas de réponse')),
@@ -56,9 +58,12 @@ CREATE TABLE listings (
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW(),
     last_seen_at TIMESTAMP DEFAULT NOW(),
+    details_fetched_at TIMESTAMP,
+    removed_at TIMESTAMP,
 
     -- Contraintes
-    CONSTRAINT unique_url_per_user UNIQUE(user_id, url)
+    CONSTRAINT unique_url_per_user UNIQUE(user_id, url),
+    CONSTRAINT unique_url_key_per_user UNIQUE(user_id, url_key)
 );
 
 -- Index pour les performances
@@ -66,8 +71,11 @@ CREATE INDEX idx_listings_user_id ON listings(user_id);
 CREATE INDEX idx_listings_status ON listings(status);
 CREATE INDEX idx_listings_created_at ON listings(created_at);
 CREATE INDEX idx_listings_url ON listings(url);
+CREATE INDEX idx_listings_url_key ON listings(url_key);
 CREATE INDEX idx_listings_hash ON listings(hash);
 CREATE INDEX idx_listings_last_seen ON listings(last_seen_at);
+CREATE INDEX idx_listings_removed ON listings(user_id, removed_at);
+CREATE INDEX idx_listings_details_fetched ON listings(user_id, details_fetched_at NULLS FIRST);
 CREATE INDEX idx_search_params_user_id ON search_params(user_id);
 
 -- Fonction de nettoyage automatique (à appeler via cron ou manuellement)
@@ -88,6 +96,43 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Détails (téléphone, description, photos) d'un lot d'annonces en une requête
+-- p_details: [{"id": "...", "phone": "...", "description": "...", "photos": [...]}]
+-- Les valeurs nulles conservent la valeur existante
+CREATE OR REPLACE FUNCTION update_listing_details(p_user_id UUID, p_details JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    updated_count INTEGER;
+BEGIN
+    UPDATE listings l SET
+        phone = COALESCE(d.phone, l.phone),
+        description = COALESCE(d.description, l.description),
+        photos = COALESCE(d.photos, l.photos),
+        details_fetched_at = NOW()
+    FROM jsonb_to_recordset(p_details) AS d(id UUID, phone TEXT, description TEXT, photos TEXT[])
+    WHERE l.id = d.id AND l.user_id = p_user_id;
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    RETURN updated_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Annonces revues lors d'un scraping, en une requête: last_seen_at à jour, plus retirées
+-- (lignes sans url_key, antérieures à la colonne: retrouvées par leur url)
+CREATE OR REPLACE FUNCTION touch_listings(p_user_id UUID, p_url_keys TEXT[], p_urls TEXT[] DEFAULT '{}')
+RETURNS INTEGER AS $$
+DECLARE
+    updated_count INTEGER;
+BEGIN
+    UPDATE listings SET
+        last_seen_at = NOW(),
+        removed_at = NULL
+    WHERE user_id = p_user_id
+      AND (url_key = ANY(p_url_keys) OR (url_key IS NULL AND url = ANY(p_urls)));
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    RETURN updated_count;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Trigger pour mettre à jour updated_at automatiquement
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -141,6 +186,23 @@ COMMENT ON TABLE users IS 'Utilisateurs de l application';
 COMMENT ON TABLE search_params IS 'Paramètres de recherche personnalisés par utilisateur (ville, rayon, sites, GPS)';
 COMMENT ON COLUMN listings.hash IS 'Hash MD5 de titre+prix+localisation pour déduplication';
 COMMENT ON COLUMN listings.last_seen_at IS 'Dernière fois que l annonce a été vue lors d un scraping';
+COMMENT ON COLUMN listings.sources IS 'Quasi-doublons fusionnés: [{site_source, lien, prix}] (NULL = une seule source)';
+COMMENT ON COLUMN listings.url_key IS 'Identité stable de l annonce: "site:identifiant" ou URL normalisée (utils/canonical_url.py)';
+COMMENT ON COLUMN listings.removed_at IS 'Absente de plusieurs passages complets de sa recherche: probablement retirée (NULL = présente)';
+COMMENT ON COLUMN listings.details_fetched_at IS 'Dernière récupération de la page de détail (NULL = jamais)';
 COMMENT ON COLUMN search_params.sites IS 'Liste JSON des sites à scraper';
 COMMENT ON COLUMN search_params.lat IS 'Latitude GPS pour géolocalisation';
 COMMENT ON COLUMN search_params.lon IS 'Longitude GPS pour géolocalisation';
+
+-- Migration d'une base existante:
+-- ALTER TABLE listings ADD COLUMN IF NOT EXISTS details_fetched_at TIMESTAMP;
+-- CREATE INDEX IF NOT EXISTS idx_listings_details_fetched ON listings(user_id, details_fetched_at NULLS FIRST);
+-- ALTER TABLE listings ADD COLUMN IF NOT EXISTS sources JSONB;
+-- ALTER TABLE listings ADD COLUMN IF NOT EXISTS url_key TEXT;
+-- ALTER TABLE listings ADD CONSTRAINT unique_url_key_per_user UNIQUE(user_id, url_key);
+-- CREATE INDEX IF NOT EXISTS idx_listings_url_key ON listings(url_key);
+-- puis renseigner url_key des lignes existantes: python backfill_url_keys.py
+-- ALTER TABLE listings ADD COLUMN IF NOT EXISTS removed_at TIMESTAMP;
+-- CREATE INDEX IF NOT EXISTS idx_listings_removed ON listings(user_id, removed_at);
+-- DROP FUNCTION IF EXISTS touch_listings(UUID, TEXT[]);
+-- puis créer les fonctions update_listing_details et touch_listings ci-dessus
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Relance l'extraction des annonces sur les pages archivées (hors réseau).
+
+Usage:
+    python reparse_archive.py [--site pap] [--since 2026-10-01] [--all]
+                              [--workers N] [--output annonces.jsonl]
+                              [--user USER_ID]
+
+Les pages sont lues dans l'archive HTML (PAGE_ARCHIVE_DIR, voir
+scrapers/page_archive.py) et parsées en parallèle par le parser actuel de
+chaque site. Par défaut seule la dernière récupération de chaque URL est
+relue (--all pour toutes).
+
+Les annonces régénérées passent la même validation que le scraping
+(validation, filtre agences, dédoublonnage, quasi-doublons entre sites); avec --user elles sont
+enregistrées en base pour cet utilisateur.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+from scrapers.page_archive import page_archive
+
+# Parser de chaque site archivé (clé du site -> classe du scraper)
+SCRAPERS = {
+    'pap': 'scrapers.pap.PapScraper',
+    'paruvendu': 'scrapers.paruvendu.ParuvenduScraper',
+    'entreparticuliers': 'scrapers.entreparticuliers.EntreParticuliersScraper',
+    'moteurimmo': 'scrapers.moteurimmo.MoteurImmoScraper',
+    'figaro': 'scrapers.figaro_immo.FigaroImmoScraper',
+    'leboncoin': 'scrapers.leboncoin.LeboncoinScraper',
+}
+
+# Scrapers instanciés dans le processus courant (un par site)
+_scrapers = {}
+
+
+def reparse_page(site: str, digest: str, location: dict, archive_dir: str):
+    """
+    Annonces brutes d'une page archivée (exécuté dans un processus worker).
+
+    Returns:
+        Tuple (site, hash, annonces), annonces None si le blob est illisible
+    """
+    if page_archive.archive_dir != archive_dir:
+        page_archive.archive_dir = archive_dir
+    content = page_archive.load(digest)
+    if content is None:
+        return site, digest, None
+
+    scraper = _scrapers.get(site)
+    if scraper is None:
+        module, name = SCRAPERS[site].rsplit('.', 1)
+        scraper = getattr(importlib.import_module(module), name)()
+        _scrapers[site] = scraper
+    return site, digest, scraper._parse_listing_page(content, location)
+
+
+def run(entries, workers: int, archive_dir: str):
+    """Parse les pages en parallèle; itère (site, hash, annonces)."""
+    jobs = [(e.site, e.hash, e.location, archive_dir) for e in entries]
+    if workers <= 1:
+        for job in jobs:
+            yield reparse_page(*job)
+        return
+
+    # spawn: même démarrage des workers que le pool de parsing
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+        yield from pool.map(reparse_page, *zip(*jobs), chunksize=4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--site', action='append', choices=sorted(SCRAPERS), help="Site à relire (répétable, défaut: tous)")
+    parser.add_argument('--since', help="Pages récupérées depuis cette date (AAAA-MM-JJ)")
+    parser.add_argument('--all', action='store_true', help="Toutes les récupérations, pas seulement la dernière par URL")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--archive', default=page_archive.archive_dir, help="Répertoire de l'archive (défaut: PAGE_ARCHIVE_DIR)")
+    parser.add_argument('--output', help="Fichier JSON lines des annonces régénérées")
+    parser.add_argument('--user', help="Enregistrer les annonces en base pour cet utilisateur")
+    args = parser.parse_args()
+
+    if not args.archive:
+        print("❌ Aucune archive: définir PAGE_ARCHIVE_DIR ou --archive")
+        return 1
+    page_archive.archive_dir = args.archive
+
+    since = datetime.strptime(args.since, '%Y-%m-%d').timestamp() if args.since else None
+    sites = args.site or list(SCRAPERS)
+    entries = list(page_archive.entries(sites=sites, since=since, latest=not args.all))
+    if not entries:
+        print(f"⚠️ Aucune page archivée ({args.archive})")
+        return 1
+
+    print(f"🔁 {len(entries)} pages à relire ({args.workers} workers)")
+    start = time.perf_counter()
+
+    listings = []
+    pages, found, missing = Counter(), Counter(), 0
+    for site, digest, page_listings in run(entries, args.workers, args.archive):
+        if page_listings is None:
+            missing += 1
+            continue
+        pages[site] += 1
+        found[site] += len(page_listings)
+        for listing in page_listings:
+            listing['_scraper'] = site
+            listing['_archive_hash'] = digest
+        listings.extend(page_listings)
+
+    elapsed = time.perf_counter() - start
+    for site in sorted(pages):
+        print(f"  📋 {site:<18} {pages[site]:>5} pages  {found[site]:>6} annonces")
+    if missing:
+        print(f"  ⚠️ {missing} pages illisibles (blob absent ou codec indisponible)")
+
+    from utils.validator import ListingPipeline
+    from utils.near_duplicates import NearDuplicateMerger
+    pipeline = ListingPipeline()
+    final = NearDuplicateMerger().merge(pipeline.run(listings))
+    print(f"✅ {len(listings)} annonces extraites, {len(final)} retenues en {elapsed:.1f}s ({pipeline.summary()})")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for listing in final:
+                f.write(json.dumps(listing, ensure_ascii=False, default=str) + '\n')
+        print(f"💾 {args.output}")
+
+    if args.user and final:
+        from database.manager import DatabaseManager
+        db = DatabaseManager()
+        db.queue_listings(args.user, final)
+        result = db.flush_listings(args.user)
+        print(f"🗄️ {result.added} ajoutées, {result.duplicates} déjà en base"
+              f"{f', {result.failed} en échec' if result.failed else ''}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
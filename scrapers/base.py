@@ -1,15 +1,33 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 import time
 import os
 import re
 import random
 import requests
+from concurrent.futures import Future
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup, SoupStrainer
 from config import SCRAPING_DELAY, USER_AGENT
-from .site_config import get_profile, RateLimiter, SiteManager, SiteProfile
+from .site_config import get_profile, get_rate_limiter, SiteManager, SiteProfile
 from .headers.factory import HeaderFactory
 from .timing import HumanTimer, get_timer
 from .http_client import StealthSession, create_session, is_stealth_available
+from .watermark import SiteWatermark, page_fingerprint, watermarks
+from .seen_index import seen_index
+from .http_cache import http_cache
+from .page_archive import page_archive
+from .parse_pool import parse_pool
+from .selector_plan import SelectorPlan
+from utils.extraction import extract_fields, find_postal_code, parse_price
+from utils.rejects import RejectRegistry
+
+# Parser HTML: lxml (C) si installé, sinon parser Python
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
 
 
 class BaseScraper(ABC):
@@ -22,8 +40,21 @@ class BaseScraper(ABC):
     - TLS fingerprint spoofing (via curl_cffi si disponible)
     - Gestion 403/429 avec backoff intelligent
     - Validation de localisation avec confidence scoring
+    - Cache HTTP conditionnel des pages de résultats
     """
 
+    # À incrémenter quand l'extraction change (invalide le cache HTTP)
+    parser_version = 1
+
+    # Zone des annonces à parser (None = page entière), voir _parse_ads
+    ad_strainer: Optional[SoupStrainer] = None
+
+    # Cascade de sélecteurs d'annonces du site (gagnant mémorisé)
+    ad_plan: Optional[SelectorPlan] = None
+
+    # Lien vers la page de résultats suivante (Playwright)
+    next_selector = 'a.next, a[rel="next"]'
+
     def __init__(self):
         """Initialise le scraper avec tous les modules anti-blocage."""
         self.delay = int(os.getenv('SCRAPING_DELAY', SCRAPING_DELAY))
@@ -32,7 +63,7 @@ class BaseScraper(ABC):
 
         # Charger le profil du site
         self._profile: SiteProfile = get_profile(self.site_key)
-        self._rate_limiter = RateLimiter(self._profile)
+        self._rate_limiter = get_rate_limiter(self.site_key)
 
         # Nouveaux modules anti-blocage
         self._headers_factory = HeaderFactory(rotate=True)
@@ -44,6 +75,31 @@ class BaseScraper(ABC):
         self._session_requests = 0
         self._session_errors = 0
 
+        # Scraping incrémental (watermark des annonces déjà vues)
+        self._watermark: Optional[SiteWatermark] = None
+        self._sweep = False  # Balayage: toutes les pages, sans arrêt anticipé
+        self._seen_links: List[str] = []
+        self._first_page_fingerprint: Optional[str] = None
+        self._site_unchanged = False
+        self._stopped_early = False
+        # Passage incomplet (erreur, blocage, limite de pages): pas de détection des annonces retirées
+        self._truncated = False
+
+        # Annonces déjà enregistrées pour cet utilisateur (écartées avant enrichissement)
+        self._seen_user: Optional[str] = None
+
+        # Rejets du job en cours (voir utils/rejects.py)
+        self._rejects: Optional[RejectRegistry] = None
+
+        # Stats du cache HTTP pour ce scraper
+        self._cache_stats = {'pages': 0, 'cached_pages': 0, 'bytes_saved': 0, 'parse_ms_saved': 0.0}
+
+        # Stats de chargement Playwright (politique du site)
+        self._load_stats = {'pages': 0, 'load_ms': 0.0, 'requests': 0, 'bytes': 0, 'blocked': 0}
+
+        # Stats du pipeline de pagination (parsing recouvert par le délai)
+        self._pipeline_stats = {'pages': 0, 'parse_ms': 0.0, 'overlap_ms': 0.0, 'pace_ms': 0.0, 'known': 0}
+
     @property
     @abstractmethod
     def site_key(self) -> str:
@@ -193,6 +249,22 @@ class BaseScraper(ABC):
         }
         return base_urls.get(self.site_key, 'https://www.google.fr/')
 
+    def detail_session(self) -> requests.Session:
+        """Session des pages de détail: headers complets + warm-up, comme les listes."""
+        session = self._create_session_with_headers()
+        self._warm_session(session)
+        return session
+
+    def fetch_detail(self, session: requests.Session, url: str) -> Optional[requests.Response]:
+        """
+        Page de détail d'une annonce, au rythme et avec la gestion des
+        blocages (403/429, circuit breaker) du scraping des listes.
+
+        Returns:
+            Response (200, ou 404/410 si l'annonce est retirée), None si échec
+        """
+        return self._make_request(session, url, accept=(200, 404, 410))
+
     def _warm_session(self, session: requests.Session) -> bool:
         """
         Réchauffe la session en visitant la page d'accueil.
@@ -223,12 +295,20 @@ class BaseScraper(ABC):
 
     def _human_wait(self):
         """Attend avec un pattern humain (remplace _wait pour plus de réalisme)."""
-        self._timer.wait_before_request()
+        self._wait()
+
+    def _next_delay(self) -> float:
+        """
+        Délai avant la prochaine requête: timing humain, au plus tôt au
+        créneau réservé dans le limiteur partagé du site (listes et détails).
+        """
+        return self._rate_limiter.reserve(self._timer.next_delay())
 
     def _wait(self):
         """Attend entre les requêtes avec rate limiting et jitter."""
-        # Utiliser le timing humain plutôt que le rate limiter basique
-        self._timer.wait_before_request()
+        delay = self._next_delay()
+        if delay > 0:
+            time.sleep(delay)
 
     def _record_success(self):
         """Enregistre une requête réussie (reset backoff)."""
@@ -236,16 +316,503 @@ class BaseScraper(ABC):
 
     def _record_failure(self, status_code: int = None):
         """Enregistre un échec et applique le backoff."""
+        self._truncated = True
         self._rate_limiter.record_failure(status_code)
 
+    def _on_blocked(self, status_code: int, url: str):
+        """
+        Réponse 403/429: échec enregistré (backoff du limiteur pour 429),
+        puis pause anti-blocage longue pour 403 sauf si le circuit est ouvert.
+        """
+        print(f"    🚫 Bloqué ({status_code}) sur {url[:50]}...")
+        self._record_failure(status_code)
+
+        if self._should_stop():
+            print(f"    🛑 Circuit breaker activé, arrêt du scraping")
+            return
+        if status_code == 403:
+            self._timer.wait_after_error(403)  # backoff_403 du profil de timing (60-180s)
+
     def _should_stop(self) -> bool:
         """Vérifie si le circuit breaker est ouvert."""
         return self._rate_limiter.should_stop()
 
-    def _make_request(self, session: requests.Session, url: str, timeout: int = 15) -> Optional[requests.Response]:
+    def use_watermark(self, scope: str, sweep: bool = False):
+        """
+        Active le scraping incrémental pour une recherche.
+
+        Args:
+            scope: Clé de recherche (voir watermark.make_scope)
+            sweep: Lire toutes les pages sans arrêt anticipé (balayage de
+                presence.py); le watermark est tout de même mis à jour
+        """
+        self._sweep = sweep
+        if self._profile.stop_early_if_unchanged:
+            self._watermark = watermarks.get(scope, self.site_key)
+
+    def use_seen_index(self, user_id: str):
+        """Écarte les annonces déjà enregistrées pour l'utilisateur (voir seen_index.py)."""
+        if seen_index.enabled:
+            self._seen_user = user_id
+
+    def track_rejects(self, registry: RejectRegistry):
+        """Compte les annonces rejetées par ce scraper dans le registre du job."""
+        self._rejects = registry
+
+    @property
+    def site_unchanged(self) -> bool:
+        """True si la page 1 était identique au dernier passage (site ignoré)."""
+        return self._site_unchanged
+
+    @property
+    def stopped_early(self) -> bool:
+        """True si la pagination a été interrompue par le watermark."""
+        return self._stopped_early
+
+    @property
+    def shareable(self) -> bool:
+        """True si les résultats valent pour tout utilisateur (ni watermark, ni annonces écartées par l'index des vues)."""
+        return not self._stopped_early and self._pipeline_stats['known'] == 0
+
+    @property
+    def complete_run(self) -> bool:
+        """True si toutes les pages de résultats ont été lues (ni watermark, ni erreur, ni limite de pages)."""
+        return not self._stopped_early and not self._truncated and not self._should_stop()
+
+    @property
+    def seen_links(self) -> List[str]:
+        """Liens extraits des pages de résultats lors de ce passage (avant commit_watermark)."""
+        return list(self._seen_links)
+
+    def _should_stop_pagination(self, page_num: int, links: List[str]) -> bool:
+        """
+        Vérifie si la pagination peut s'arrêter (page déjà connue).
+
+        Args:
+            page_num: Numéro de la page (1 = première)
+            links: Liens des annonces extraites de la page
+
+        Returns:
+            True si les pages suivantes sont déjà connues.
+            Si la page 1 est inchangée, site_unchanged passe à True et
+            la page ne doit pas être traitée.
+        """
+        self._seen_links.extend(links)
+
+        if self._watermark is None or not links:
+            return False
+
+        if page_num == 1:
+            fingerprint = page_fingerprint(links)
+            if self._first_page_fingerprint is None:
+                self._first_page_fingerprint = fingerprint
+            if fingerprint == self._watermark.first_page_fingerprint and not self._sweep:
+                print(f"    ⏭️ Page 1 inchangée depuis le dernier passage, {self.site_name} ignoré")
+                self._site_unchanged = True
+                self._stopped_early = True
+                return True
+
+        if self._sweep:
+            return False
+
+        ratio = self._watermark.known_ratio(links)
+        if ratio >= self._profile.known_page_ratio:
+            print(f"    ⏹️ Page {page_num}: {ratio:.0%} d'annonces déjà vues, arrêt de la pagination")
+            self._stopped_early = True
+            return True
+
+        return False
+
+    def commit_watermark(self):
+        """Enregistre les annonces vues (à appeler une fois les annonces sauvegardées)."""
+        if self._watermark is not None and self._seen_links and not self._site_unchanged:
+            self._watermark.record(self._seen_links, self._first_page_fingerprint)
+        self._seen_links = []
+
+    def _fetch_page(self, session, url: str, timeout: int = 20) -> Tuple[Any, Optional[List[Dict[str, Any]]]]:
+        """
+        GET conditionnel d'une page de résultats (sans parsing).
+
+        Returns:
+            Tuple (response, cached_listings)
+            - cached_listings: annonces du dernier passage si la page est inchangée, sinon None
+        """
+        headers = http_cache.conditional_headers(url, self.parser_version)
+        if isinstance(session, StealthSession):
+            response = session.get(url, timeout=timeout, extra_headers=headers)
+        else:
+            response = session.get(url, timeout=timeout, headers=headers)
+
+        self._cache_stats['pages'] += 1
+
+        cached = http_cache.lookup(url, response, self.parser_version)
+        if cached is not None:
+            self._cache_stats['cached_pages'] += 1
+            self._cache_stats['bytes_saved'] += cached.bytes_saved
+            self._cache_stats['parse_ms_saved'] += cached.parse_ms_saved
+            print(f"    💾 Page inchangée ({response.status_code}), annonces du dernier passage réutilisées")
+            return response, cached.listings
+
+        return response, None
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Pages servies par le cache HTTP, octets et temps de parsing économisés."""
+        stats = dict(self._cache_stats)
+        stats['parse_ms_saved'] = round(stats['parse_ms_saved'], 1)
+        return stats
+
+    @abstractmethod
+    def _parse_listing_page(self, content, location: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Extrait les annonces (brutes) d'une page de résultats.
+
+        Appelée hors du thread de scraping (thread ou processus de parsing,
+        relecture de l'archive): ne dépend que du HTML et de la localisation.
+        """
+        pass
+
+    def _submit_parse(
+        self,
+        content,
+        location: Dict[str, Any],
+        cache: Tuple[str, Any] = None,
+        url: Optional[str] = None
+    ) -> Future:
+        """
+        Parse une page sur un thread de parsing (ou un processus, voir parse_pool).
+
+        Args:
+            content: HTML de la page
+            location: Localisation de recherche
+            cache: (url, response) pour enregistrer le résultat dans le cache HTTP
+            url: URL de la page (archive HTML), par défaut celle de cache
+
+        Returns:
+            Future des annonces brutes de la page
+        """
+        if url is None and cache is not None:
+            url = cache[0]
+
+        def parse():
+            page_archive.store(self.site_key, url, content, location)
+            start = time.perf_counter()
+            page_listings = parse_pool.parse(self, content, location)
+            parse_ms = (time.perf_counter() - start) * 1000
+            self._pipeline_stats['parse_ms'] += parse_ms
+            if cache is not None:
+                http_cache.store(cache[0], cache[1], page_listings, parse_ms, self.parser_version)
+            return page_listings
+
+        return parse_pool.submit(parse)
+
+    def _request_page(self, session, url: str, location: Dict[str, Any], timeout: int = 20) -> Optional[Future]:
+        """
+        GET conditionnel d'une page de résultats, parsing soumis en arrière-plan.
+
+        Returns:
+            Future des annonces brutes, ou None si la requête a échoué
+        """
+        try:
+            response, cached = self._fetch_page(session, url, timeout)
+        except Exception as e:
+            print(f"    ⚠️ Erreur: {e}")
+            self._truncated = True
+            return None
+
+        if response.status_code in (403, 429):
+            self._on_blocked(response.status_code, url)
+            return None
+        if cached is None and response.status_code != 200:
+            print(f"    ⚠️ Status {response.status_code}")
+            # 404 après la dernière page: fin normale; erreur serveur ou 304
+            # sans annonces en cache (page évincée entre-temps): passage incomplet
+            if response.status_code >= 500 or response.status_code == 304:
+                self._truncated = True
+            return None
+
+        self._record_success()
+
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+        return self._submit_parse(response.content, location, cache=(url, response))
+
+    def _fetch_browser_page(
+        self,
+        page,
+        page_num: int,
+        url: str,
+        location: Dict[str, Any]
+    ) -> Optional[Future]:
+        """
+        Page de résultats Playwright, parsing soumis en arrière-plan.
+
+        Page 1: navigation vers url; pages suivantes: clic sur le lien "suivant".
+
+        Returns:
+            Future des annonces brutes, ou None s'il n'y a pas de page suivante
+        """
+        if page_num == 1:
+            self._goto(page, url)
+        else:
+            next_btn = page.query_selector(self.next_selector)
+            if not next_btn:
+                return None
+            try:
+                next_btn.click()
+                self._wait_loaded(page)
+            except Exception:
+                return None
+
+        return self._submit_parse(page.content(), location, url=page.url)
+
+    def _paginate(
+        self,
+        fetch: Callable[[int], Optional[Future]],
+        location: Dict[str, Any],
+        max_pages: int,
+        enrich: bool = True,
+        pace_first: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Parcourt les pages de résultats en pipeline.
+
+        Le délai humain avant la requête N+1 est tiré, puis la page N est
+        récupérée (parsing sur un thread de parsing) et traitée (watermark,
+        enrichissement) pendant ce délai; seul le reste du délai est dormi.
+        Les requêtes ne sont pas plus rapprochées qu'avant: le cycle d'une
+        page se réduit à délai + réseau.
+
+        Args:
+            fetch: page_num -> Future des annonces brutes (voir _request_page,
+                   _submit_parse), ou None pour arrêter. Appelée après le délai.
+            location: Localisation de recherche
+            max_pages: Nombre maximum de pages
+            enrich: Enrichir et filtrer les annonces (_enrich_listing)
+            pace_first: Attendre aussi avant la page 1
+
+        Returns:
+            Annonces retenues
+        """
+        listings = []
+        pending = None  # (page_num, Future) de la page précédente
+
+        for page_num in range(1, max_pages + 1):
+            if (page_num > 1 or pace_first) and not self._pace(pending, location, listings, enrich):
+                return listings
+
+            pending = None
+            try:
+                future = fetch(page_num)
+            except Exception as e:
+                # Timeout, navigation...: on garde les pages déjà traitées
+                print(f"    ⚠️ Erreur page {page_num}: {str(e)[:60]}")
+                self._truncated = True
+                future = None
+            if future is None:
+                break
+            pending = (page_num, future)
+        else:
+            # Limite de pages atteinte: d'autres annonces peuvent suivre
+            self._truncated = True
+
+        if pending is not None:
+            self._accept_page(*pending, location, listings, enrich)
+        return listings
+
+    def _pace(self, pending, location: Dict[str, Any], listings: List[Dict[str, Any]], enrich: bool) -> bool:
+        """
+        Délai humain avant la prochaine requête, recouvert par le traitement de la page précédente.
+
+        Returns:
+            False si la pagination s'arrête (reste du délai non dormi)
+        """
+        delay = self._next_delay()
+        start = time.perf_counter()
+
+        keep_going = True
+        if pending is not None:
+            keep_going = self._accept_page(*pending, location, listings, enrich)
+
+        busy = time.perf_counter() - start
+        self._pipeline_stats['overlap_ms'] += min(busy, delay) * 1000
+        if not keep_going:
+            return False
+
+        if delay > busy:
+            time.sleep(delay - busy)
+        self._pipeline_stats['pace_ms'] += max(delay, busy) * 1000
+        return True
+
+    def _accept_page(
+        self,
+        page_num: int,
+        future: Future,
+        location: Dict[str, Any],
+        listings: List[Dict[str, Any]],
+        enrich: bool
+    ) -> bool:
+        """
+        Traite les annonces parsées d'une page (watermark, annonces connues, enrichissement).
+
+        Returns:
+            True si la page suivante doit être récupérée
+        """
+        try:
+            page_listings = future.result()
+        except Exception as e:
+            print(f"    ⚠️ Erreur parsing page {page_num}: {e}")
+            self._truncated = True
+            return False
+
+        self._pipeline_stats['pages'] += 1
+        if not page_listings:
+            return False
+
+        print(f"    📋 Page {page_num}: {len(page_listings)} annonces")
+
+        known = self._should_stop_pagination(page_num, [l['lien'] for l in page_listings])
+        if self._site_unchanged:
+            return False
+
+        # Annonces déjà enregistrées: ni enrichies, ni validées, ni renvoyées en base
+        if self._seen_user is not None:
+            seen = seen_index.filter_known(self._seen_user, [l['lien'] for l in page_listings])
+            if seen:
+                page_listings = [l for l in page_listings if l['lien'] not in seen]
+                self._pipeline_stats['known'] += len(seen)
+
+        for listing in page_listings:
+            if enrich:
+                # Enrichir et filtrer
+                listing = self._enrich_listing(listing, location)
+                if self._is_rejected(listing):
+                    continue
+            listings.append(listing)
+
+        return not known
+
+    def get_pipeline_stats(self) -> Dict[str, Any]:
+        """Pages traitées, temps de parsing et part recouverte par les délais."""
+        stats = dict(self._pipeline_stats)
+        for key in ('parse_ms', 'overlap_ms', 'pace_ms'):
+            stats[key] = round(stats[key], 1)
+        return stats
+
+    def _parse_html(self, content, strainer: Optional[SoupStrainer] = None) -> BeautifulSoup:
+        """Parse du HTML avec lxml, éventuellement restreint par un SoupStrainer."""
+        return BeautifulSoup(content, HTML_PARSER, parse_only=strainer)
+
+    def _find_ads(self, soup, partial: bool = False) -> list:
+        """
+        Trouve les blocs d'annonces dans une page via le plan de sélecteurs.
+
+        Args:
+            soup: Arbre de la page
+            partial: Arbre restreint (pas de sélecteur de secours)
+        """
+        if self.ad_plan is None:
+            return []
+        return self.ad_plan.find(soup, use_fallback=not partial)
+
+    def _parse_ads(self, content) -> Tuple[BeautifulSoup, list]:
+        """
+        Parse une page de résultats et trouve les annonces.
+
+        Seule la zone des annonces (ad_strainer) est construite; si rien
+        n'y est trouvé, la page entière est parsée (sélecteurs de secours).
+        Appeler soup.decompose() une fois les annonces extraites.
+
+        Returns:
+            Tuple (soup, ads)
+        """
+        if self.ad_strainer is not None:
+            soup = self._parse_html(content, self.ad_strainer)
+            ads = self._find_ads(soup, partial=True)
+            if ads:
+                return soup, ads
+            soup.decompose()
+
+        soup = self._parse_html(content)
+        return soup, self._find_ads(soup)
+
+    def _prepare_page(self, page):
+        """Applique la politique de blocage du site à une page Playwright."""
+        policy = self._profile.load_policy
+        blocked_types = set(policy.block_resource_types)
+        blocked_domains = tuple(policy.block_domains)
+
+        def handle(route):
+            request = route.request
+            host = urlparse(request.url).hostname or ''
+            if request.resource_type in blocked_types or any(
+                host == domain or host.endswith('.' + domain) for domain in blocked_domains
+            ):
+                self._load_stats['blocked'] += 1
+                route.abort()
+            else:
+                route.continue_()
+
+        page.route('**/*', handle)
+        page.on('requestfinished', self._count_request_bytes)
+
+    def _count_request_bytes(self, request):
+        self._load_stats['requests'] += 1
+        try:
+            sizes = request.sizes()
+            self._load_stats['bytes'] += sizes['responseHeadersSize'] + sizes['responseBodySize']
+        except Exception:
+            pass
+
+    def _goto(self, page, url: str):
+        """Navigue vers une URL selon la stratégie de chargement du site."""
+        policy = self._profile.load_policy
+        start = time.perf_counter()
+        page.goto(url, wait_until=policy.wait_until, timeout=policy.timeout_ms)
+        self._wait_ready_selector(page)
+        self._record_load(start)
+
+    def _wait_loaded(self, page):
+        """Attend la fin d'une navigation déclenchée par un clic (page suivante)."""
+        policy = self._profile.load_policy
+        start = time.perf_counter()
+        page.wait_for_load_state(policy.wait_until, timeout=policy.ready_timeout_ms)
+        self._wait_ready_selector(page)
+        self._record_load(start)
+
+    def _wait_ready_selector(self, page):
+        policy = self._profile.load_policy
+        if not policy.ready_selector:
+            return
+        try:
+            page.wait_for_selector(policy.ready_selector, timeout=policy.ready_timeout_ms)
+        except Exception:
+            pass  # Lecture du DOM quand même (les sélecteurs d'annonces décideront)
+
+    def _record_load(self, start: float):
+        self._load_stats['pages'] += 1
+        self._load_stats['load_ms'] += (time.perf_counter() - start) * 1000
+
+    def get_load_stats(self) -> Dict[str, Any]:
+        """Pages chargées via Playwright: temps, octets reçus, requêtes bloquées."""
+        stats = dict(self._load_stats)
+        stats['load_ms'] = round(stats['load_ms'], 1)
+        return stats
+
+    def _make_request(
+        self,
+        session: requests.Session,
+        url: str,
+        timeout: int = 15,
+        accept: Tuple[int, ...] = (200,)
+    ) -> Optional[requests.Response]:
         """
         Effectue une requête HTTP avec gestion des erreurs et backoff.
 
+        Args:
+            accept: Statuts rendus tels quels (ex: 404/410 d'une annonce retirée)
+
         Returns:
             Response si succès, None si échec
         """
@@ -253,25 +820,14 @@ class BaseScraper(ABC):
             self._wait()
             response = session.get(url, timeout=timeout)
 
-            if response.status_code == 200:
+            if response.status_code in accept:
                 self._record_success()
                 return response
-            elif response.status_code == 403:
+            elif response.status_code in (403, 429):
                 # 403 Forbidden = probablement bloqué, backoff agressif
-                print(f"    🚫 Bloqué (403) sur {url[:50]}...")
-                self._record_failure(403)
-                # Pause longue pour 403 (60-180s)
-                import random
-                pause = random.uniform(60, 180)
-                print(f"    ⏳ Pause anti-blocage {pause:.0f}s...")
-                import time
-                time.sleep(pause)
-
-                if self._should_stop():
-                    print(f"    🛑 Circuit breaker activé, arrêt du scraping")
-                    return None
+                self._on_blocked(response.status_code, url)
                 return None
-            elif response.status_code in [429, 500, 502, 503, 504]:
+            elif response.status_code in [500, 502, 503, 504]:
                 print(f"    ⚠️ Erreur {response.status_code} sur {url[:50]}...")
                 self._record_failure(response.status_code)
 
@@ -322,25 +878,12 @@ class BaseScraper(ABC):
 
     def _parse_price(self, text: str) -> int:
         """Parse un prix depuis du texte."""
-        try:
-            return int(re.sub(r'[^\d]', '', str(text)))
-        except:
-            return 0
+        return parse_price(text)
 
     def _extract_surface_pieces(self, text: str) -> tuple:
         """Extrait surface et nombre de pièces du texte."""
-        surface = None
-        pieces = None
-
-        surface_match = re.search(r'(\d+)\s*m[²2]', text, re.I)
-        if surface_match:
-            surface = int(surface_match.group(1))
-
-        pieces_match = re.search(r'(\d+)\s*pièces?|[TF](\d+)', text, re.I)
-        if pieces_match:
-            pieces = int(pieces_match.group(1) or pieces_match.group(2))
-
-        return surface, pieces
+        fields = extract_fields(text)
+        return fields.surface, fields.pieces
 
     def _extract_location_with_confidence(
         self,
@@ -359,22 +902,16 @@ class BaseScraper(ABC):
             - confidence: 'high', 'medium', 'low', 'inferred'
             - source: description de la méthode d'extraction
         """
-        # Pattern 1: "Ville (12345)" ou "Paris 17E (75017)" → HIGH confidence
-        loc_match = re.search(r'([A-Za-zÀ-ÿ][A-Za-zÀ-ÿ0-9\s\-\']+)\s*\((\d{5})\)', text)
-        if loc_match:
-            ville = loc_match.group(1).strip()
-            cp = loc_match.group(2)
-            return f"{ville} ({cp})", 'high', 'pattern_ville_cp'
+        fields = extract_fields(text)
 
+        # Pattern 1: "Ville (12345)" ou "Paris 17E (75017)" → HIGH confidence
         # Pattern 2: "12345 Ville" → HIGH confidence
-        cp_match = re.search(r'(\d{5})\s+([A-Za-zÀ-ÿ][A-Za-zÀ-ÿ\s\-\']+)', text)
-        if cp_match:
-            return f"{cp_match.group(2).strip()} ({cp_match.group(1)})", 'high', 'pattern_cp_ville'
+        if fields.localisation:
+            return fields.localisation, 'high', fields.loc_source
 
         # Pattern 3: Code postal seul → MEDIUM confidence
-        cp_only = re.search(r'\b(\d{5})\b', text)
-        if cp_only:
-            cp = cp_only.group(1)
+        if fields.cp:
+            cp = fields.cp
             # Essayer de géocoder pour avoir le nom de ville
             try:
                 from utils.geolocation import geo
@@ -389,8 +926,7 @@ class BaseScraper(ABC):
         fallback_ville = fallback_location.get('ville', '')
         if fallback_ville and len(fallback_ville) > 2:
             # Chercher le nom de ville (insensible à la casse)
-            ville_pattern = re.escape(fallback_ville)
-            if re.search(ville_pattern, text, re.I):
+            if fallback_ville.lower() in text.lower():
                 cp = fallback_location.get('code_postal')
                 if cp:
                     return f"{fallback_ville} ({cp})", 'medium', 'ville_in_text'
@@ -448,6 +984,13 @@ class BaseScraper(ABC):
 
         return False, ''
 
+    def _is_rejected(self, listing: Dict[str, Any]) -> bool:
+        """Rejet qualité (voir _should_reject_listing), compté dans le registre du job."""
+        should_reject, reason = self._should_reject_listing(listing)
+        if should_reject and self._rejects is not None:
+            self._rejects.record('scraper', reason, listing, site=self.site_key)
+        return should_reject
+
     def _enrich_listing(
         self,
         listing: Dict[str, Any],
@@ -481,10 +1024,10 @@ class BaseScraper(ABC):
             loc_text = listing['localisation']
 
             # Extraire CP si présent
-            cp_match = re.search(r'\b(\d{5})\b', loc_text)
-            if cp_match:
+            cp = find_postal_code(loc_text)
+            if cp:
                 listing['_geo_confidence'] = 'high'
-                listing['_geo_cp'] = cp_match.group(1)
+                listing['_geo_cp'] = cp
             else:
                 # Vérifier si c'est un fallback
                 fallback_ville = location.get('ville', '')
@@ -0,0 +1,246 @@
+"""
+Pool de navigateurs Playwright partagé entre les sites et les jobs.
+
+Chromium est lancé une seule fois par worker puis réutilisé: chaque
+scraping reçoit un contexte isolé (cookies, cache, fingerprint) qui est
+fermé à la fin. Les navigateurs sont recyclés après N pages ou au-delà
+d'un seuil mémoire.
+
+L'API sync de Playwright est liée au thread qui l'a démarrée: le pool
+possède donc ses propres threads, et les scrapers lui soumettent une
+fonction qui reçoit le contexte:
+
+    listings = browser_pool.run(
+        lambda context: self._playwright_session(context, location, max_pages),
+        user_agent=self.user_agent,
+        locale='fr-FR'
+    )
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from playwright.sync_api import sync_playwright
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    PLAYWRIGHT_AVAILABLE = False
+
+# Nombre de navigateurs (= pages simultanées maximum)
+BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', 2))
+# Recyclage d'un navigateur après N pages chargées
+BROWSER_MAX_PAGES = int(os.getenv('BROWSER_MAX_PAGES', 50))
+# Recyclage si la mémoire des navigateurs dépasse ce seuil (Mo, 0 = désactivé)
+BROWSER_MAX_RSS_MB = int(os.getenv('BROWSER_MAX_RSS_MB', 1500))
+
+# Script anti-détection (à passer en init_script)
+STEALTH_INIT_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+    window.chrome = {runtime: {}};
+"""
+
+
+def _children_rss_mb() -> Optional[float]:
+    """Mémoire (RSS, Mo) des processus enfants: driver Playwright + Chromium."""
+    if not os.path.isdir('/proc'):
+        return None
+
+    parents = {}
+    rss = {}
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/status', 'r') as f:
+                for line in f:
+                    if line.startswith('PPid:'):
+                        parents[int(pid)] = int(line.split()[1])
+                    elif line.startswith('VmRSS:'):
+                        rss[int(pid)] = int(line.split()[1])
+        except (OSError, ValueError):
+            continue
+
+    root = os.getpid()
+    total_kb = 0
+    for pid in rss:
+        ancestor = parents.get(pid)
+        while ancestor and ancestor != root:
+            ancestor = parents.get(ancestor)
+        if ancestor == root:
+            total_kb += rss[pid]
+    return round(total_kb / 1024, 1)
+
+
+class BrowserPool:
+    """
+    Pool de navigateurs Chromium réutilisables.
+
+    - size workers, chacun avec son navigateur (limite les pages simultanées)
+    - un contexte neuf par appel à run()
+    - recyclage après max_pages pages ou si la RSS dépasse max_rss_mb
+    """
+
+    def __init__(
+        self,
+        size: int = BROWSER_POOL_SIZE,
+        max_pages: int = BROWSER_MAX_PAGES,
+        max_rss_mb: int = BROWSER_MAX_RSS_MB
+    ):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._queue: "queue.Queue" = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._stats = {
+            'launches': 0,      # Démarrages de Chromium
+            'reuses': 0,        # Contextes servis par un navigateur déjà lancé
+            'recycles': 0,      # Navigateurs fermés (pages / mémoire)
+            'contexts': 0,
+            'pages': 0,
+            'launch_ms': 0.0,   # Temps cumulé de démarrage
+        }
+
+    def run(self, fn: Callable[[Any], Any], init_script: str = None, **context_options) -> Any:
+        """
+        Exécute fn(context) dans un contexte isolé d'un navigateur du pool.
+
+        Args:
+            fn: Fonction recevant le BrowserContext (exécutée dans un thread du pool)
+            init_script: Script injecté dans chaque page du contexte
+            **context_options: Options de browser.new_context()
+
+        Returns:
+            Le résultat de fn (ses exceptions sont propagées)
+        """
+        if not PLAYWRIGHT_AVAILABLE:
+            raise RuntimeError("Playwright non installé")
+
+        self._ensure_workers()
+        future: Future = Future()
+        self._queue.put((fn, init_script, context_options, future))
+        return future.result()
+
+    def _ensure_workers(self):
+        with self._lock:
+            while len(self._workers) < self.size:
+                worker = threading.Thread(
+                    target=self._worker,
+                    name=f"browser-pool-{len(self._workers) + 1}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _launch(self, playwright):
+        start = time.perf_counter()
+        browser = playwright.chromium.launch(headless=True)
+        with self._lock:
+            self._stats['launches'] += 1
+            self._stats['launch_ms'] += (time.perf_counter() - start) * 1000
+        return browser
+
+    def _should_recycle(self, pages_served: int) -> bool:
+        if self.max_pages and pages_served >= self.max_pages:
+            return True
+        if self.max_rss_mb:
+            rss = _children_rss_mb()
+            if rss is not None and rss > self.max_rss_mb:
+                return True
+        return False
+
+    def _worker(self):
+        playwright = None
+        browser = None
+        pages_served = 0
+
+        while True:
+            task = self._queue.get()
+            if task is None:
+                break
+
+            fn, init_script, context_options, future = task
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                if playwright is None:
+                    playwright = sync_playwright().start()
+
+                if browser is None or not browser.is_connected():
+                    browser = self._launch(playwright)
+                    pages_served = 0
+                else:
+                    with self._lock:
+                        self._stats['reuses'] += 1
+
+                context = browser.new_context(**context_options)
+                if init_script:
+                    context.add_init_script(init_script)
+
+                # Pages chargées (chaque navigation compte)
+                opened = []
+                context.on('page', lambda page: page.on('load', lambda _: opened.append(1)))
+                try:
+                    result = fn(context)
+                finally:
+                    try:
+                        context.close()
+                    except Exception:
+                        pass
+                    pages_served += len(opened)
+                    with self._lock:
+                        self._stats['contexts'] += 1
+                        self._stats['pages'] += len(opened)
+
+                future.set_result(result)
+            except BaseException as e:
+                future.set_exception(e)
+
+            if browser is not None and self._should_recycle(pages_served):
+                print(f"  ♻️ Recyclage du navigateur ({pages_served} pages)")
+                try:
+                    browser.close()
+                except Exception:
+                    pass
+                browser = None
+                with self._lock:
+                    self._stats['recycles'] += 1
+
+        try:
+            if browser is not None:
+                browser.close()
+            if playwright is not None:
+                playwright.stop()
+        except Exception:
+            pass
+
+    def close(self):
+        """Ferme les navigateurs (appelé à l'arrêt du process)."""
+        with self._lock:
+            workers = list(self._workers)
+            self._workers = []
+        for _ in workers:
+            self._queue.put(None)
+        for worker in workers:
+            worker.join(timeout=10)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques: lancements, réutilisations, recyclages, RSS."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['workers'] = len(self._workers)
+        stats['launch_ms'] = round(stats['launch_ms'], 1)
+        stats['queued'] = self._queue.qsize()
+        stats['rss_mb'] = _children_rss_mb()
+        return stats
+
+
+# Instance globale (partagée par tous les jobs)
+browser_pool = BrowserPool()
+atexit.register(browser_pool.close)
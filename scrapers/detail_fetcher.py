@@ -0,0 +1,305 @@
+"""
+Récupération des pages de détail des annonces (téléphone, description, photos).
+
+Les scrapers ne lisent que les pages de résultats: téléphone et
+description restent vides. Après chaque scraping, un thread de fond
+visite les pages de détail des annonces de l'utilisateur:
+- seulement les annonces nouvelles (jamais récupérées) ou dont les
+  détails datent de plus de detail_refresh_hours (profil du site);
+  des détails frais ne sont jamais récupérés à nouveau
+- les annonces "Intéressé" d'abord, puis les jamais récupérées, puis
+  les plus anciennes
+- avec la session du scraper du site (headers complets, warm-up) et dans
+  son budget de requêtes: créneaux du rate limiter, circuit breaker et
+  pauses anti-blocage (403/429) partagés avec le scraping des listes
+- mises à jour en base par lots
+
+    detail_fetcher.schedule(db, user_id)
+"""
+
+import atexit
+import importlib
+import os
+import queue
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from .embedded_json import EmbeddedJsonSpec, load_blobs
+from .site_config import SITE_PROFILES, SiteManager, get_profile, get_rate_limiter, get_site_key
+
+# Pages de détail visitées par passage et par utilisateur (0 = désactivé)
+DETAIL_MAX_PER_RUN = int(os.getenv('DETAIL_MAX_PER_RUN', 40))
+# Annonces enregistrées par requête de mise à jour
+DETAIL_BATCH_SIZE = int(os.getenv('DETAIL_BATCH_SIZE', 10))
+
+# Statut prioritaire (annonces suivies par l'utilisateur)
+PRIORITY_STATUS = 'Intéressé'
+
+# Scraper de chaque site (module, classe), importé à la demande
+SCRAPER_CLASSES = {
+    'pap': ('pap', 'PapScraper'),
+    'paruvendu': ('paruvendu', 'ParuvenduScraper'),
+    'entreparticuliers': ('entreparticuliers', 'EntreParticuliersScraper'),
+    'leboncoin': ('leboncoin', 'LeboncoinScraper'),
+    'figaro': ('figaro_immo', 'FigaroImmoScraper'),
+    'moteurimmo': ('moteurimmo', 'MoteurImmoScraper'),
+    'facebook': ('facebook_marketplace', 'FacebookMarketplaceScraper'),
+}
+
+# Téléphone français: 06 12 34 56 78, 06.12.34.56.78, +33 6 12 34 56 78
+PHONE_RE = re.compile(r'(?<!\d)(?:\+33\s?|0)[1-9](?:[\s.-]?\d{2}){4}(?!\d)')
+_NON_PHONE_RE = re.compile(r'[^\d+]')
+
+_JSON_LD = EmbeddedJsonSpec('json_ld')
+_DESCRIPTION_CLASS_RE = re.compile(r'description', re.I)
+
+
+def _normalize_phone(raw: str) -> str:
+    phone = _NON_PHONE_RE.sub('', raw)
+    if phone.startswith('+33'):
+        phone = '0' + phone[3:]
+    return ' '.join(phone[i:i + 2] for i in range(0, len(phone), 2))
+
+
+def _json_ld_offer(content) -> Dict[str, Any]:
+    """Premier objet JSON-LD avec une description (annonce, produit...)."""
+    for data in load_blobs(content, _JSON_LD):
+        if isinstance(data, dict):
+            data = data.get('@graph', [data])
+        if not isinstance(data, list):
+            continue
+        for item in data:
+            if isinstance(item, dict) and item.get('description'):
+                return item
+    return {}
+
+
+def parse_detail_page(content) -> Dict[str, Any]:
+    """
+    Téléphone, description et photos d'une page d'annonce.
+
+    Sources par priorité: JSON-LD (schema.org), balises meta (Open Graph),
+    liens tel: et bloc de description du DOM.
+
+    Returns:
+        {'telephone', 'description', 'photos'} (None si introuvable)
+    """
+    offer = _json_ld_offer(content)
+    soup = BeautifulSoup(content, 'lxml')
+
+    description = offer.get('description')
+    if not description:
+        meta = soup.find('meta', attrs={'property': 'og:description'}) or soup.find('meta', attrs={'name': 'description'})
+        block = soup.find(attrs={'class': _DESCRIPTION_CLASS_RE})
+        block_text = block.get_text(' ', strip=True) if block else ''
+        meta_text = meta.get('content', '').strip() if meta else ''
+        # Le bloc du DOM est complet, la meta souvent tronquée
+        description = block_text if len(block_text) > len(meta_text) else meta_text
+    description = description.strip() if description else None
+
+    telephone = offer.get('telephone')
+    if not telephone:
+        tel_link = soup.find('a', href=re.compile(r'^tel:'))
+        if tel_link:
+            telephone = tel_link['href'][4:]
+    if not telephone and description:
+        match = PHONE_RE.search(description)
+        telephone = match.group() if match else None
+
+    photos = offer.get('image') or []
+    if isinstance(photos, str):
+        photos = [photos]
+    photos = [p.get('url') if isinstance(p, dict) else p for p in photos]
+    if not photos:
+        photos = [m.get('content') for m in soup.find_all('meta', attrs={'property': 'og:image'})]
+    photos = [p for p in photos if isinstance(p, str) and p.startswith('http')]
+
+    soup.decompose()
+    return {
+        'telephone': _normalize_phone(telephone) if telephone else None,
+        'description': description or None,
+        'photos': photos or None,
+    }
+
+
+def create_scraper(site_key: str):
+    """Scraper du site: sa session et sa gestion des blocages servent aux pages de détail."""
+    module, name = SCRAPER_CLASSES[site_key]
+    return getattr(importlib.import_module(f'.{module}', __package__), name)()
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def select_candidates(listings: List[Dict[str, Any]], now: datetime = None) -> List[Dict[str, Any]]:
+    """
+    Annonces dont les détails sont à récupérer, par priorité.
+
+    Écarte les sites sans pages de détail et les détails encore frais
+    (moins de detail_refresh_hours). Ordre: "Intéressé", jamais récupérées,
+    puis les plus anciennes.
+    """
+    now = now or datetime.now()
+    selected = []
+    for listing in listings:
+        site_key = get_site_key(listing.get('source', ''))
+        if site_key is None or not get_profile(site_key).fetch_details:
+            continue
+        fetched_at = _parse_date(listing.get('details_fetched_at'))
+        if fetched_at and now - fetched_at < timedelta(hours=get_profile(site_key).detail_refresh_hours):
+            continue
+        selected.append((listing, site_key, fetched_at))
+
+    selected.sort(key=lambda item: (
+        item[0].get('status') != PRIORITY_STATUS,
+        item[2] is not None,
+        item[2] or now,
+    ))
+    return [dict(listing, _site_key=site_key) for listing, site_key, _ in selected]
+
+
+class DetailFetcher:
+    """
+    Thread de fond qui récupère les pages de détail, un utilisateur à la fois.
+
+    Usage:
+        detail_fetcher.schedule(db, user_id)   # après un scraping / un statut "Intéressé"
+        detail_fetcher.run(db, user_id)        # passage synchrone
+    """
+
+    def __init__(self, max_per_run: int = DETAIL_MAX_PER_RUN, batch_size: int = DETAIL_BATCH_SIZE):
+        self.max_per_run = max_per_run
+        self.batch_size = max(1, batch_size)
+        self.enabled = max_per_run > 0
+
+        self._queue: queue.Queue = queue.Queue()
+        self._pending = set()  # Utilisateurs en file (un passage à la fois)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {'runs': 0, 'fetched': 0, 'updated': 0, 'failed': 0, 'blocked': 0}
+
+    def schedule(self, db, user_id: str):
+        """Planifie un passage pour l'utilisateur (ignoré s'il est déjà en file)."""
+        if not self.enabled or not db.connected:
+            return
+        with self._lock:
+            if user_id in self._pending:
+                return
+            self._pending.add(user_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name='detail-fetcher', daemon=True)
+                self._thread.start()
+        self._queue.put((db, user_id))
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            db, user_id = item
+            with self._lock:
+                self._pending.discard(user_id)
+            try:
+                self.run(db, user_id)
+            except Exception as e:
+                print(f"⚠️ Détails: passage interrompu ({e})")
+
+    def _candidates(self, db, user_id: str) -> List[Dict[str, Any]]:
+        """Annonces "Intéressé" puis les autres, filtrées par fraîcheur."""
+        # Préfiltre en base sur la plus courte fraîcheur; chaque site est revérifié ensuite
+        min_hours = min(p.detail_refresh_hours for p in SITE_PROFILES.values() if p.fetch_details)
+        stale_before = (datetime.now() - timedelta(hours=min_hours)).isoformat()
+
+        listings = db.get_detail_candidates(user_id, stale_before, status=PRIORITY_STATUS, limit=self.max_per_run)
+        seen = {l['id'] for l in listings}
+        others = db.get_detail_candidates(user_id, stale_before, limit=self.max_per_run * 2)
+        listings += [l for l in others if l['id'] not in seen]
+        return select_candidates(listings)[:self.max_per_run]
+
+    def run(self, db, user_id: str) -> Dict[str, int]:
+        """
+        Un passage: récupère les détails à rafraîchir et les enregistre par lots.
+
+        Returns:
+            Compteurs du passage (fetched, updated, failed, blocked)
+        """
+        run_stats = {'fetched': 0, 'updated': 0, 'failed': 0, 'blocked': 0}
+        candidates = self._candidates(db, user_id)
+        if not candidates:
+            return run_stats
+
+        print(f"🔎 Détails: {len(candidates)} annonces à compléter")
+        scrapers: Dict[str, Any] = {}
+        sessions: Dict[str, Any] = {}
+        batch: List[Dict[str, Any]] = []
+
+        for listing in candidates:
+            site_key = listing['_site_key']
+            if not SiteManager.is_site_available(site_key) or get_rate_limiter(site_key).should_stop():
+                run_stats['blocked'] += 1
+                continue
+
+            scraper = scrapers.get(site_key)
+            if scraper is None:
+                scraper = scrapers[site_key] = create_scraper(site_key)
+                sessions[site_key] = scraper.detail_session()
+
+            # Créneau du limiteur partagé, 403/429 et 5xx gérés comme pour les listes
+            response = scraper.fetch_detail(sessions[site_key], listing['url'])
+            if response is None:
+                run_stats['failed'] += 1
+                continue
+
+            if response.status_code == 200:
+                details = parse_detail_page(response.content)
+                run_stats['fetched'] += 1
+            else:
+                # Annonce retirée (404/410): marquée récupérée, valeurs conservées
+                details = {'telephone': None, 'description': None, 'photos': None}
+
+            batch.append({
+                'id': listing['id'],
+                'phone': details['telephone'],
+                'description': details['description'],
+                'photos': details['photos'],
+            })
+            if len(batch) >= self.batch_size:
+                run_stats['updated'] += db.update_listing_details(user_id, batch)
+                batch = []
+
+        if batch:
+            run_stats['updated'] += db.update_listing_details(user_id, batch)
+
+        with self._lock:
+            self._stats['runs'] += 1
+            for key, value in run_stats.items():
+                self._stats[key] += value
+        print(f"✅ Détails: {run_stats['fetched']} pages lues, {run_stats['updated']} annonces mises à jour")
+        return run_stats
+
+    def close(self):
+        """Arrête le thread de fond (le passage en cours se termine)."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Passages, pages lues, annonces mises à jour, échecs."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pending'] = len(self._pending)
+        return stats
+
+
+# Instance globale
+detail_fetcher = DetailFetcher()
+atexit.register(detail_fetcher.close)
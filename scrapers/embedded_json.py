@@ -0,0 +1,156 @@
+"""
+Extraction du JSON embarqué dans les pages (sans construire de DOM).
+
+Sources reconnues:
+- 'next_data': <script id="__NEXT_DATA__"> (Next.js)
+- 'json_ld': <script type="application/ld+json"> (schema.org)
+- 'assignment': window.__INITIAL_STATE__ = {...} (ou autre variable)
+
+Les blobs sont localisés par recherche d'octets puis décodés avec orjson
+si disponible. Chaque site déclare le chemin vers son tableau d'annonces:
+
+    ADS_JSON = EmbeddedJsonSpec('next_data', ('props', 'pageProps', 'searchData', 'ads'))
+    ads = extract_list(response.content, ADS_JSON)
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+try:
+    import orjson
+    JSON_BACKEND = 'orjson'
+
+    def _loads(raw: bytes) -> Any:
+        return orjson.loads(raw)
+except ImportError:
+    JSON_BACKEND = 'json'
+
+    def _loads(raw: bytes) -> Any:
+        return json.loads(raw)
+
+
+@dataclass(frozen=True)
+class EmbeddedJsonSpec:
+    """Où trouver les annonces dans le JSON embarqué d'un site."""
+
+    source: str  # 'next_data', 'json_ld' ou 'assignment'
+    path: Tuple[Union[str, int], ...] = ()
+    variable: str = 'window.__INITIAL_STATE__'  # Pour 'assignment'
+    fallback_key: str = 'ads'  # Recherche récursive si le chemin a changé
+
+
+def _as_bytes(content: Union[bytes, str]) -> bytes:
+    return content.encode('utf-8') if isinstance(content, str) else content
+
+
+def iter_scripts(content: Union[bytes, str], marker: bytes) -> Iterator[bytes]:
+    """Contenu des <script> dont la balise ouvrante contient marker."""
+    content = _as_bytes(content)
+    pos = content.find(marker)
+    while pos != -1:
+        start = content.rfind(b'<script', 0, pos)
+        tag_end = content.find(b'>', pos)
+        # marker doit être dans la balise ouvrante, pas dans le corps d'un script
+        if start != -1 and tag_end != -1 and content.find(b'>', start, pos) == -1:
+            end = content.find(b'</script', tag_end)
+            if end == -1:
+                return
+            yield content[tag_end + 1:end]
+            pos = content.find(marker, end)
+        else:
+            pos = content.find(marker, pos + 1)
+
+
+def find_assignment(content: Union[bytes, str], variable: str) -> Optional[Any]:
+    """Valeur JSON affectée à une variable JS (window.__INITIAL_STATE__ = {...};)."""
+    content = _as_bytes(content)
+    pos = content.find(variable.encode())
+    if pos == -1:
+        return None
+
+    eq = content.find(b'=', pos + len(variable))
+    end = content.find(b'</script', eq)
+    if eq == -1 or end == -1:
+        return None
+
+    raw = content[eq + 1:end].strip().rstrip(b';').strip()
+    try:
+        return _loads(raw)
+    except ValueError:
+        pass
+
+    # Code après l'objet: ne décoder que la première valeur
+    try:
+        text = raw.decode('utf-8', 'replace')
+        return json.JSONDecoder().raw_decode(text)[0]
+    except ValueError:
+        return None
+
+
+def load_blobs(content: Union[bytes, str], spec: EmbeddedJsonSpec) -> Iterator[Any]:
+    """Blobs JSON décodés d'une page pour la source du spec."""
+    if spec.source == 'assignment':
+        data = find_assignment(content, spec.variable)
+        if data is not None:
+            yield data
+        return
+
+    marker = b'__NEXT_DATA__' if spec.source == 'next_data' else b'application/ld+json'
+    for raw in iter_scripts(content, marker):
+        try:
+            yield _loads(raw)
+        except ValueError:
+            continue
+
+
+def get_path(data: Any, path: Tuple[Union[str, int], ...]) -> Any:
+    """Suit un chemin de clés/index, None si absent."""
+    for key in path:
+        try:
+            data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return data
+
+
+def find_key_list(data: Any, key: str, max_depth: int = 6) -> List[Any]:
+    """Premier tableau non vide associé à key (parcours récursif borné)."""
+    if max_depth < 0:
+        return []
+
+    if isinstance(data, dict):
+        value = data.get(key)
+        if isinstance(value, list) and value:
+            return value
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return []
+
+    for child in children:
+        result = find_key_list(child, key, max_depth - 1)
+        if result:
+            return result
+    return []
+
+
+def extract_list(content: Union[bytes, str], spec: EmbeddedJsonSpec) -> Optional[List[Any]]:
+    """
+    Tableau d'annonces embarqué dans une page.
+
+    Returns:
+        Liste (éventuellement vide), ou None si aucun blob JSON trouvé
+    """
+    found = False
+    for data in load_blobs(content, spec):
+        found = True
+        items = get_path(data, spec.path)
+        if isinstance(items, list) and items:
+            return items
+        if spec.fallback_key:
+            items = find_key_list(data, spec.fallback_key)
+            if items:
+                return items
+    return [] if found else None
@@ -0,0 +1,227 @@
+"""
+Plan d'extraction compilé depuis une SiteSpec.
+
+La spec est compilée une fois par site: sélecteurs de champs convertis
+en AdSelector et indexés par tag, modèles d'URL analysés, cascade de
+conteneurs (SelectorPlan). Chaque annonce est ensuite extraite en un
+seul parcours de ses éléments: lien, photo et premier élément de chaque
+sélecteur de champ sont relevés au passage, puis les champs sont résolus
+par priorité (mêmes résultats que des ad.find successifs).
+
+    plan = get_plan('paruvendu')
+    soup, ads = ...
+    listings = [plan.extract(ad, location) for ad in ads[:plan.spec.max_ads]]
+"""
+
+import re
+from datetime import datetime
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import SoupStrainer
+
+from .selector_plan import AdSelector, SelectorPlan
+from .site_specs import FieldSelector, SiteSpec, get_spec
+from utils.extraction import PRICE_TEXT_RE, extract_fields, parse_price
+
+# 'h2', '.title', 'span.price'
+_SIMPLE_SELECTOR_RE = re.compile(r'^(?P<tag>[a-z][a-z0-9]*)?(?:\.(?P<cls>[\w-]+))?$', re.I)
+
+# Champs relevés pendant le parcours d'une annonce
+_FIELDS = ('title', 'price', 'location')
+
+
+def compile_selector(selector: FieldSelector) -> AdSelector:
+    """Convertit 'tag', '.classe' ou 'tag.classe' en AdSelector (AdSelector inchangé)."""
+    if isinstance(selector, AdSelector):
+        return selector
+    match = _SIMPLE_SELECTOR_RE.match(selector)
+    if not match or not selector:
+        raise ValueError(f"Sélecteur de champ non supporté: {selector!r}")
+    attrs = {'class': match.group('cls')} if match.group('cls') else {}
+    return AdSelector(match.group('tag'), attrs)
+
+
+class ExtractionPlan:
+    """
+    Spec d'un site compilée: URLs, conteneurs d'annonces et champs.
+
+    Usage:
+        plan = ExtractionPlan('pap', SITE_SPECS['pap'])
+        plan.build_urls(location)
+        plan.extract(ad, location)
+    """
+
+    def __init__(self, site_key: str, spec: SiteSpec):
+        self.site_key = site_key
+        self.spec = spec
+
+        self.ad_plan = SelectorPlan(site_key, list(spec.containers), fallback=spec.fallback, min_count=spec.min_count)
+        self.strainer = SoupStrainer(class_=spec.strainer) if spec.strainer is not None else None
+
+        # Modèles d'URL et champs de localisation requis
+        self._urls: List[Tuple[str, Tuple[str, ...]]] = [
+            (template, tuple(name for _, name, _, _ in Formatter().parse(template) if name))
+            for template in spec.search_urls
+        ]
+
+        # Sélecteurs de champs indexés par classe ('.title') ou par tag: (champ, priorité, sélecteur)
+        self._by_class: Dict[str, List[tuple]] = {}
+        self._by_tag: Dict[Optional[str], List[tuple]] = {}
+        for name in _FIELDS:
+            for priority, selector in enumerate(getattr(spec, name)):
+                selector = compile_selector(selector)
+                cls = selector.attrs.get('class')
+                if isinstance(cls, str) and len(selector.attrs) == 1 and selector.require is None:
+                    self._by_class.setdefault(cls, []).append((name, priority, selector))
+                else:
+                    self._by_tag.setdefault(selector.tag, []).append((name, priority, selector))
+        wildcard = self._by_tag.get(None, [])
+        for tag in self._by_tag:
+            if tag is not None:
+                self._by_tag[tag] = self._by_tag[tag] + wildcard
+
+    def build_urls(self, location: Dict[str, Any]) -> List[str]:
+        """URLs de recherche dont tous les champs sont connus."""
+        return [
+            template.format(**{name: location.get(name) for name in names})
+            for template, names in self._urls
+            if all(location.get(name) for name in names)
+        ]
+
+    def page_url(self, base_url: str, page_num: int) -> Optional[str]:
+        """URL de la page N (None si le site n'est pas paginé en HTTP)."""
+        if page_num == 1 and self.spec.page_one_plain:
+            return base_url
+        if self.spec.page_url is None:
+            return None
+        sep = '&' if '?' in base_url else '?'
+        return self.spec.page_url.format(url=base_url, sep=sep, page=page_num)
+
+    def _absolute(self, url: str) -> str:
+        return url if url.startswith('http') else f"{self.spec.base_url}{url}"
+
+    def _scan(self, ad):
+        """Un parcours de l'annonce: premier lien, première image, premier montant "… €", éléments par (champ, priorité)."""
+        link = ad if ad.name == 'a' else None
+        img = None
+        price_text = None
+        found: Dict[tuple, Any] = {}
+        by_tag = self._by_tag
+        by_class = self._by_class
+        wildcard = by_tag.get(None, [])
+
+        for element in ad.descendants:
+            name = getattr(element, 'name', None)
+            if name is None:
+                if price_text is None:
+                    match = PRICE_TEXT_RE.search(element)
+                    if match:
+                        price_text = match.group()
+                continue
+            if link is None and name == 'a' and element.get('href') is not None:
+                link = element
+            elif img is None and name == 'img':
+                img = element
+
+            candidates = by_tag.get(name, wildcard)
+            if by_class:
+                for cls in element.get('class') or ():
+                    if cls in by_class:
+                        candidates = candidates + by_class[cls]
+            for field, priority, selector in candidates:
+                key = (field, priority)
+                if key not in found and selector.matches(element):
+                    found[key] = element
+
+        return link, img, price_text, found
+
+    def _first(self, found: Dict[tuple, Any], field: str):
+        for priority in range(len(getattr(self.spec, field))):
+            element = found.get((field, priority))
+            if element is not None:
+                yield element
+
+    def extract(self, ad, location: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Extrait une annonce (format standardisé, non enrichie).
+
+        Returns:
+            Annonce, ou None sans lien exploitable
+        """
+        spec = self.spec
+        link, img, price_text, found = self._scan(ad)
+
+        lien = link.get('href', '') if link is not None else ''
+        if not lien:
+            return None
+        lien = self._absolute(lien)
+
+        titre = next((el.get_text(strip=True) for el in self._first(found, 'title')), '')
+        if not titre:
+            source = link if spec.title_from_link else ad
+            titre = source.get_text(strip=True)[:spec.title_max] or f"Annonce {spec.label}"
+
+        text = ad.get_text()
+        fields = extract_fields(f"{titre} {text}" if spec.location_in_title else text)
+
+        # Prix: sélecteurs du site, sinon premier texte "… €", sinon prix du texte
+        price_elem = next(self._first(found, 'price'), None)
+        if price_elem is not None:
+            prix = parse_price(price_elem.get_text())
+        elif price_text is not None:
+            prix = parse_price(price_text)
+        else:
+            prix = 0
+        if not prix:
+            prix = fields.prix
+
+        localisation = fields.localisation
+        if not localisation:
+            for elem in self._first(found, 'location'):
+                loc_text = elem.get_text(strip=True)
+                if len(loc_text) > 2:
+                    localisation = loc_text
+                    break
+        if not localisation:
+            # Localisation de recherche avec code postal
+            if location.get('code_postal'):
+                localisation = f"{location['ville']} ({location['code_postal']})"
+            else:
+                localisation = location['ville']
+
+        photos = []
+        if img is not None:
+            src = next((img.get(attr) for attr in spec.photo_attrs if img.get(attr)), None)
+            if src and not src.startswith('data:'):
+                photos.append(self._absolute(src))
+
+        return {
+            'titre': titre,
+            'date_publication': datetime.now().strftime('%Y-%m-%d'),
+            'prix': prix,
+            'localisation': localisation,
+            'lien': lien,
+            'site_source': spec.site_name,
+            'photos': photos,
+            'telephone': None,
+            'surface': fields.surface,
+            'pieces': fields.pieces,
+            'description': ''
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques de la cascade de conteneurs (voir SelectorPlan)."""
+        return self.ad_plan.get_stats()
+
+
+# Plans compilés (un par site, à la première utilisation)
+_plans: Dict[str, ExtractionPlan] = {}
+
+
+def get_plan(site_key: str) -> ExtractionPlan:
+    """Plan d'extraction compilé d'un site déclaré dans SITE_SPECS."""
+    plan = _plans.get(site_key)
+    if plan is None:
+        plan = _plans[site_key] = ExtractionPlan(site_key, get_spec(site_key))
+    return plan
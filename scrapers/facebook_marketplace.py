@@ -1,14 +1,14 @@
 from typing import List, Dict, Any
 import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
 import re
 import json
 from .base import BaseScraper
+from .browser_pool import browser_pool
 
 # Import Playwright
 try:
-    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+    from playwright.sync_api import TimeoutError as PlaywrightTimeout
     PLAYWRIGHT_AVAILABLE = True
 except ImportError:
     PLAYWRIGHT_AVAILABLE = False
@@ -44,76 +44,73 @@ class FacebookMarketplaceScraper(BaseScraper):
 
     def _scrape_playwright(self, ville: str, rayon: int, max_pages: int) -> List[Dict[str, Any]]:
         """Scrape avec Playwright"""
-        listings = []
-
         try:
             print("  🎭 Mode Playwright activé")
 
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                context = browser.new_context(
-                    user_agent=self.user_agent,
-                    viewport={'width': 1920, 'height': 1080},
-                    locale='fr-FR'
-                )
-                page = context.new_page()
-
-                # Bloquer les ressources inutiles
-                page.route("**/*.{png,jpg,jpeg,gif,svg,woff,woff2,mp4,webm}", lambda route: route.abort())
-
-                ville_slug = ville.lower().replace(' ', '-').replace("'", "")
-
-                # URLs à essayer
-                urls = [
-                    f"https://www.facebook.com/marketplace/{ville_slug}/propertyforsale",
-                    f"https://www.facebook.com/marketplace/category/propertyforsale?query={ville}",
-                    f"https://www.facebook.com/marketplace/search?query=appartement%20maison%20{ville}",
-                ]
-
-                for url in urls:
-                    try:
-                        print(f"  🔗 Tentative: {url[:50]}...")
-                        page.goto(url, wait_until='domcontentloaded', timeout=20000)
-
-                        # Attendre le chargement
-                        page.wait_for_timeout(3000)
-
-                        # Vérifier si login requis
-                        if 'login' in page.url.lower():
-                            print(f"    ⚠️ Connexion requise")
-                            continue
-
-                        # Scroll pour charger plus
-                        for _ in range(min(max_pages, 3)):
-                            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                            page.wait_for_timeout(2000)
-
-                        # Extraire HTML
-                        html = page.content()
-                        soup = BeautifulSoup(html, 'html.parser')
-
-                        # Chercher les annonces
-                        ads = self._find_ads(soup)
-
-                        if ads:
-                            print(f"    📋 {len(ads)} annonces trouvées")
-                            for ad in ads[:20]:
-                                listing = self._extract_listing(ad, ville)
-                                if listing:
-                                    listings.append(listing)
-                            break
-
-                    except PlaywrightTimeout:
-                        print(f"    ⏱️ Timeout")
-                        continue
-                    except Exception as e:
-                        print(f"    ⚠️ Erreur: {str(e)[:40]}")
-                        continue
-
-                browser.close()
+            return browser_pool.run(
+                lambda context: self._playwright_session(context, ville, max_pages),
+                user_agent=self.user_agent,
+                viewport={'width': 1920, 'height': 1080},
+                locale='fr-FR'
+            )
 
         except Exception as e:
             print(f"  ⚠️ Erreur Playwright: {e}")
+            return []
+
+    def _playwright_session(self, context, ville: str, max_pages: int) -> List[Dict[str, Any]]:
+        """Parcourt les pages de résultats dans un contexte du pool"""
+        listings = []
+        page = context.new_page()
+        self._prepare_page(page)
+
+
+        ville_slug = ville.lower().replace(' ', '-').replace("'", "")
+
+        # URLs à essayer
+        urls = [
+            f"https://www.facebook.com/marketplace/{ville_slug}/propertyforsale",
+            f"https://www.facebook.com/marketplace/category/propertyforsale?query={ville}",
+            f"https://www.facebook.com/marketplace/search?query=appartement%20maison%20{ville}",
+        ]
+
+        for url in urls:
+            try:
+                print(f"  🔗 Tentative: {url[:50]}...")
+                self._goto(page, url)
+
+                # Attendre le chargement
+                page.wait_for_timeout(3000)
+
+                # Vérifier si login requis
+                if 'login' in page.url.lower():
+                    print(f"    ⚠️ Connexion requise")
+                    continue
+
+                # Scroll pour charger plus
+                for _ in range(min(max_pages, 3)):
+                    page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                    page.wait_for_timeout(2000)
+
+                # Extraire HTML et chercher les annonces
+                soup, ads = self._parse_ads(page.content())
+
+                if ads:
+                    print(f"    📋 {len(ads)} annonces trouvées")
+                    for ad in ads[:20]:
+                        listing = self._extract_listing(ad, ville)
+                        if listing:
+                            listings.append(listing)
+                    soup.decompose()
+                    break
+                soup.decompose()
+
+            except PlaywrightTimeout:
+                print(f"    ⏱️ Timeout")
+                continue
+            except Exception as e:
+                print(f"    ⚠️ Erreur: {str(e)[:40]}")
+                continue
 
         return listings
 
@@ -140,8 +137,7 @@ class FacebookMarketplaceScraper(BaseScraper):
             response = session.get(url, timeout=15, allow_redirects=True)
 
             if response.status_code == 200 and 'login' not in response.url.lower():
-                soup = BeautifulSoup(response.content, 'html.parser')
-                ads = self._find_ads(soup)
+                soup, ads = self._parse_ads(response.content)
 
                 if ads:
                     print(f"    📋 {len(ads)} annonces (mobile)")
@@ -149,6 +145,7 @@ class FacebookMarketplaceScraper(BaseScraper):
                         listing = self._extract_listing(ad, ville)
                         if listing:
                             listings.append(listing)
+                soup.decompose()
             else:
                 print(f"    ⚠️ Accès limité (connexion requise)")
 
@@ -157,6 +154,13 @@ class FacebookMarketplaceScraper(BaseScraper):
 
         return listings
 
+    def _parse_listing_page(self, content, location: dict) -> List[Dict[str, Any]]:
+        """Extrait les annonces (brutes) d'une page de résultats"""
+        soup, ads = self._parse_ads(content)
+        page_listings = [l for l in (self._extract_listing(ad, location['ville']) for ad in ads[:20]) if l]
+        soup.decompose()
+        return page_listings
+
     def _find_ads(self, soup) -> list:
         """Trouve les annonces dans le HTML"""
         ads = []
@@ -0,0 +1,215 @@
+"""
+Cache HTTP conditionnel (ETag / Last-Modified) pour les pages de résultats.
+
+Chaque page est stockée sur disque (métadonnées, hash du corps et
+annonces extraites lors du dernier passage; le corps lui-même n'est pas
+gardé). Au passage suivant:
+- la requête envoie If-None-Match / If-Modified-Since (seulement si les
+  annonces en cache viennent de la même version du parser)
+- sur 304, ou si le corps reçu est identique (même hash), le parsing est
+  sauté et les annonces du dernier passage sont réutilisées.
+
+Désactivé par défaut (HTTP_CACHE_DIR vide). Au-delà de HTTP_CACHE_MAX_PAGES
+pages, les moins récemment enregistrées sont supprimées.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Répertoire du cache (désactivé si HTTP_CACHE_DIR est vide)
+HTTP_CACHE_DIR = os.getenv('HTTP_CACHE_DIR', '')
+# Pages gardées au maximum (les plus anciennes sont supprimées)
+HTTP_CACHE_MAX_PAGES = int(os.getenv('HTTP_CACHE_MAX_PAGES', 5000))
+
+# Enregistrements entre deux purges du répertoire
+_PRUNE_EVERY = 100
+
+
+@dataclass
+class CachedPage:
+    """Page inchangée depuis le dernier passage."""
+
+    listings: List[Dict[str, Any]]
+    bytes_saved: int
+    parse_ms_saved: float
+
+
+class HttpCache:
+    """
+    Cache disque des pages de résultats.
+
+    Usage:
+        headers = http_cache.conditional_headers(url, parser_version)
+        response = session.get(url, headers=headers)
+        cached = http_cache.lookup(url, response, parser_version)
+        if cached is None:
+            listings = parse(response.content)
+            http_cache.store(url, response, listings, parse_ms, parser_version)
+    """
+
+    def __init__(self, cache_dir: str = HTTP_CACHE_DIR, max_pages: int = HTTP_CACHE_MAX_PAGES):
+        self.cache_dir = cache_dir
+        self.enabled = bool(cache_dir)
+        self.max_pages = max_pages
+        self._lock = threading.Lock()
+        self._stores = 0
+        self._stats = {
+            'requests': 0,
+            'not_modified': 0,      # 304
+            'unchanged_body': 0,    # 200 avec corps identique
+            'bytes_saved': 0,       # Octets non téléchargés (304)
+            'parse_ms_saved': 0.0,  # Temps de parsing évité
+            'evicted': 0,           # Pages supprimées (limite HTTP_CACHE_MAX_PAGES)
+        }
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_meta(self, url: str) -> Optional[Dict[str, Any]]:
+        meta_path = self._path(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            return meta if meta.get('url') == url else None
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, url: str, parser_version: int = 1) -> Dict[str, str]:
+        """
+        Headers de validation pour une URL déjà en cache.
+
+        Aucun si les annonces en cache viennent d'une autre version du
+        parser: un 304 ne laisserait rien à réutiliser.
+        """
+        if not self.enabled:
+            return {}
+        meta = self._load_meta(url)
+        if not meta or meta.get('parser_version') != parser_version:
+            return {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def lookup(self, url: str, response, parser_version: int = 1) -> Optional[CachedPage]:
+        """
+        Réutilise les annonces du dernier passage si la page n'a pas changé.
+
+        Returns:
+            CachedPage (annonces du dernier passage), ou None s'il faut parser
+        """
+        if not self.enabled or response is None:
+            return None
+
+        with self._lock:
+            self._stats['requests'] += 1
+
+        if response.status_code not in (200, 304):
+            return None
+
+        meta = self._load_meta(url)
+        if not meta or meta.get('parser_version') != parser_version:
+            return None
+
+        if response.status_code == 304:
+            saved_bytes = meta.get('size', 0)
+            counter = 'not_modified'
+        elif hashlib.sha256(response.content).hexdigest() == meta.get('body_hash'):
+            saved_bytes = 0
+            counter = 'unchanged_body'
+        else:
+            return None
+
+        parse_ms = meta.get('parse_ms', 0)
+        with self._lock:
+            self._stats[counter] += 1
+            self._stats['bytes_saved'] += saved_bytes
+            self._stats['parse_ms_saved'] += parse_ms
+
+        return CachedPage(meta.get('listings', []), saved_bytes, parse_ms)
+
+    def store(
+        self,
+        url: str,
+        response,
+        listings: List[Dict[str, Any]],
+        parse_ms: float,
+        parser_version: int = 1
+    ):
+        """Enregistre les validateurs d'une page, le hash du corps et ses annonces extraites."""
+        if not self.enabled or response is None or response.status_code != 200:
+            return
+
+        content = response.content
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'body_hash': hashlib.sha256(content).hexdigest(),
+            'size': len(content),
+            'parse_ms': round(parse_ms, 2),
+            'parser_version': parser_version,
+            'stored_at': time.time(),
+            'listings': listings,
+        }
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._write_atomic(self._path(url), json.dumps(meta, ensure_ascii=False, default=str).encode('utf-8'))
+        except OSError as e:
+            print(f"⚠️ Cache HTTP: écriture impossible ({e})")
+            return
+
+        with self._lock:
+            self._stores += 1
+            prune = self._stores % _PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """Supprime les pages les plus anciennes au-delà de max_pages. Retourne le nombre supprimé."""
+        if not self.enabled or self.max_pages <= 0:
+            return 0
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.is_file() and e.name.endswith('.json')]
+        except OSError:
+            return 0
+        excess = len(entries) - self.max_pages
+        if excess <= 0:
+            return 0
+
+        removed = 0
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime)[:excess]:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._stats['evicted'] += removed
+        return removed
+
+    def _write_atomic(self, path: str, data: bytes):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques cumulées (octets et temps de parsing économisés)."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['parse_ms_saved'] = round(stats['parse_ms_saved'], 1)
+        return stats
+
+
+# Instance globale
+http_cache = HttpCache()
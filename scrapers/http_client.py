@@ -87,6 +87,7 @@ class StealthSession:
         url: str,
         headers: Dict[str, str] = None,
         timeout: int = 15,
+        extra_headers: Dict[str, str] = None,
         **kwargs
     ) -> requests.Response:
         """
@@ -96,6 +97,7 @@ class StealthSession:
             url: URL cible
             headers: Headers personnalisés (sinon auto-générés)
             timeout: Timeout en secondes
+            extra_headers: Headers ajoutés aux headers générés (ex: If-None-Match)
             **kwargs: Arguments supplémentaires
 
         Returns:
@@ -108,6 +110,9 @@ class StealthSession:
             else:
                 headers = self._headers_factory.get_navigation_headers(self._current_url, url)
 
+        if extra_headers:
+            headers = {**headers, **extra_headers}
+
         self._current_url = url
 
         # Rotation de fingerprint optionnelle
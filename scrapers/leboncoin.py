@@ -1,22 +1,29 @@
 from typing import List, Dict, Any
 import requests
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 from datetime import datetime
 import re
-import json
 from .base import BaseScraper
+from .browser_pool import PLAYWRIGHT_AVAILABLE, STEALTH_INIT_SCRIPT, browser_pool
+from .embedded_json import EmbeddedJsonSpec, extract_list
+from .selector_plan import AdSelector, SelectorPlan
 
-# Import Playwright
-try:
-    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
-    PLAYWRIGHT_AVAILABLE = True
-except ImportError:
-    PLAYWRIGHT_AVAILABLE = False
+# Annonces dans le JSON Next.js des pages de recherche
+ADS_JSON = EmbeddedJsonSpec('next_data', ('props', 'pageProps', 'searchData', 'ads'))
 
 
 class LeboncoinScraper(BaseScraper):
     """Scraper pour leboncoin.fr - Playwright + fallback API/HTML"""
 
+    # Zone des annonces (parsing restreint)
+    ad_strainer = SoupStrainer(attrs={'data-qa-id': 'aditem_container'})
+
+    # Cascade de sélecteurs d'annonces (par priorité)
+    ad_plan = SelectorPlan('leboncoin', [
+        AdSelector(None, {'data-qa-id': 'aditem_container'}),
+        AdSelector('article'),
+    ])
+
     @property
     def site_key(self) -> str:
         return "leboncoin"
@@ -43,15 +50,15 @@ class LeboncoinScraper(BaseScraper):
             listings = self._scrape_api_geo(location, rayon, max_pages)
 
         # Méthode 2: Playwright
-        if not listings and PLAYWRIGHT_AVAILABLE:
+        if not listings and not self._site_unchanged and PLAYWRIGHT_AVAILABLE:
             listings = self._scrape_playwright(location, rayon, max_pages)
 
         # Méthode 3: API par texte
-        if not listings:
+        if not listings and not self._site_unchanged:
             listings = self._scrape_api(location, rayon, max_pages)
 
         # Méthode 4: HTML simple
-        if not listings:
+        if not listings and not self._site_unchanged:
             listings = self._scrape_html(location, rayon, max_pages)
 
         self._print_stats(listings)
@@ -118,14 +125,19 @@ class LeboncoinScraper(BaseScraper):
 
                         print(f"    📄 Page {page_num}: {len(ads)} annonces")
 
-                        for ad in ads:
-                            listing = self._parse_api_ad(ad, location['ville'])
-                            if listing:
-                                # Enrichir avec métadonnées
-                                listing = self._enrich_listing(listing, location)
-                                should_reject, reason = self._should_reject_listing(listing)
-                                if not should_reject:
-                                    listings.append(listing)
+                        page_listings = [l for l in (self._parse_api_ad(ad, location['ville']) for ad in ads) if l]
+                        known = self._should_stop_pagination(page_num, [l['lien'] for l in page_listings])
+                        if self._site_unchanged:
+                            break
+
+                        for listing in page_listings:
+                            # Enrichir avec métadonnées
+                            listing = self._enrich_listing(listing, location)
+                            if not self._is_rejected(listing):
+                                listings.append(listing)
+
+                        if known:
+                            break
 
                     elif response.status_code == 403:
                         print(f"    🚫 Bloqué (403), arrêt...")
@@ -142,107 +154,73 @@ class LeboncoinScraper(BaseScraper):
 
                 except Exception as e:
                     print(f"    ⚠️ Erreur API: {e}")
+                    self._truncated = True
                     break
+            else:
+                # Limite de pages atteinte: d'autres annonces peuvent suivre
+                self._truncated = True
 
         except Exception as e:
             print(f"  ⚠️ Erreur API géo: {e}")
+            self._truncated = True
 
         return listings
 
     def _scrape_playwright(self, location: dict, rayon: int, max_pages: int) -> List[Dict[str, Any]]:
         """Scrape avec Playwright et fingerprint furtif"""
-        listings = []
         import random
 
         try:
             print("  🎭 Mode Playwright (furtif)...")
 
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-
-                # Fingerprint randomisé
-                viewports = [
-                    {'width': 1920, 'height': 1080},
-                    {'width': 1366, 'height': 768},
-                    {'width': 1536, 'height': 864},
-                ]
-                user_agents = [
-                    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                ]
-
-                context = browser.new_context(
-                    user_agent=random.choice(user_agents),
-                    viewport=random.choice(viewports),
-                    locale='fr-FR',
-                    timezone_id='Europe/Paris',
-                )
-
-                # Script anti-détection
-                context.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                    window.chrome = {runtime: {}};
-                """)
-
-                page = context.new_page()
-                page.route("**/*.{png,jpg,jpeg,gif,svg,woff,woff2}", lambda route: route.abort())
-
-                # Construire l'URL avec code postal si disponible
-                search_term = location['code_postal'] or location['ville']
-                search_encoded = search_term.replace(' ', '%20')
-
-                for page_num in range(1, max_pages + 1):
-                    try:
-                        # WAIT AVANT navigation (timing humain)
-                        self._wait()
-
-                        # URL avec localisation + PARTICULIERS UNIQUEMENT
-                        url = f"https://www.leboncoin.fr/recherche?category=9&owner_type=private&text={search_encoded}&page={page_num}"
-
-                        if location['lat'] and location['lon']:
-                            url += f"&lat={location['lat']}&lng={location['lon']}&radius={rayon * 1000}"
-
-                        print(f"    📄 Page {page_num}...")
-                        page.goto(url, wait_until='networkidle', timeout=35000)
-
-                        try:
-                            page.wait_for_selector('[data-qa-id="aditem_container"], article', timeout=12000)
-                        except:
-                            pass
+            # Fingerprint randomisé
+            viewports = [
+                {'width': 1920, 'height': 1080},
+                {'width': 1366, 'height': 768},
+                {'width': 1536, 'height': 864},
+            ]
+            user_agents = [
+                'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            ]
+
+            return browser_pool.run(
+                lambda context: self._playwright_session(context, location, rayon, max_pages),
+                init_script=STEALTH_INIT_SCRIPT,
+                user_agent=random.choice(user_agents),
+                viewport=random.choice(viewports),
+                locale='fr-FR',
+                timezone_id='Europe/Paris',
+            )
 
-                        html = page.content()
-                        soup = BeautifulSoup(html, 'html.parser')
-
-                        ads = soup.select('[data-qa-id="aditem_container"]')
-                        if not ads:
-                            ads = soup.find_all('article')
+        except Exception as e:
+            print(f"  ⚠️ Erreur Playwright: {e}")
+            return []
 
-                        if not ads:
-                            break
+    def _playwright_session(self, context, location: dict, rayon: int, max_pages: int) -> List[Dict[str, Any]]:
+        """Parcourt les pages de résultats dans un contexte du pool"""
+        page = context.new_page()
+        self._prepare_page(page)
 
-                        print(f"    📋 {len(ads)} annonces")
+        # Construire l'URL avec code postal si disponible
+        search_term = location['code_postal'] or location['ville']
+        search_encoded = search_term.replace(' ', '%20')
 
-                        for ad in ads[:15]:
-                            listing = self._extract_listing_html(ad, location['ville'])
-                            if listing:
-                                listing = self._enrich_listing(listing, location)
-                                should_reject, reason = self._should_reject_listing(listing)
-                                if not should_reject:
-                                    listings.append(listing)
+        def fetch(page_num):
+            # URL avec localisation + PARTICULIERS UNIQUEMENT
+            url = f"https://www.leboncoin.fr/recherche?category=9&owner_type=private&text={search_encoded}&page={page_num}"
 
-                    except PlaywrightTimeout:
-                        print(f"    ⏱️ Timeout page {page_num}")
-                        break
-                    except Exception as e:
-                        print(f"    ⚠️ Erreur: {str(e)[:40]}")
-                        break
+            if location['lat'] and location['lon']:
+                url += f"&lat={location['lat']}&lng={location['lon']}&radius={rayon * 1000}"
 
-                browser.close()
+            print(f"    📄 Page {page_num}...")
+            self._goto(page, url)
 
-        except Exception as e:
-            print(f"  ⚠️ Erreur Playwright: {e}")
+            # JSON embarqué d'abord (pas de DOM), sinon le rendu
+            return self._submit_parse(page.content(), location)
 
-        return listings
+        # WAIT AVANT navigation (timing humain), parsing pendant l'attente suivante
+        return self._paginate(fetch, location, max_pages)
 
     def _scrape_api(self, location: dict, rayon: int, max_pages: int) -> List[Dict[str, Any]]:
         """Scrape via l'API par texte avec headers furtifs"""
@@ -298,21 +276,32 @@ class LeboncoinScraper(BaseScraper):
 
                         print(f"    📄 Page {page_num}: {len(ads)} annonces")
 
-                        for ad in ads:
-                            listing = self._parse_api_ad(ad, location['ville'])
-                            if listing:
-                                listings.append(listing)
+                        page_listings = [l for l in (self._parse_api_ad(ad, location['ville']) for ad in ads) if l]
+                        known = self._should_stop_pagination(page_num, [l['lien'] for l in page_listings])
+                        if self._site_unchanged:
+                            break
+
+                        listings.extend(page_listings)
+
+                        if known:
+                            break
 
                         self._wait()
                     else:
+                        self._truncated = True
                         break
 
                 except Exception as e:
                     print(f"    ⚠️ Erreur: {e}")
+                    self._truncated = True
                     break
+            else:
+                # Limite de pages atteinte: d'autres annonces peuvent suivre
+                self._truncated = True
 
         except Exception as e:
             print(f"  ⚠️ Erreur API: {e}")
+            self._truncated = True
 
         return listings
 
@@ -330,55 +319,32 @@ class LeboncoinScraper(BaseScraper):
 
             search_term = location['code_postal'] or location['ville']
 
-            for page_num in range(1, max_pages + 1):
-                # WAIT AVANT requête
-                self._wait()
-
+            def fetch(page_num):
                 url = f"https://www.leboncoin.fr/recherche?category=9&owner_type=private&text={search_term}&page={page_num}"
+                return self._request_page(session, url, location)
 
-                try:
-                    response = session.get(url, timeout=20)
-
-                    if response.status_code == 403:
-                        print(f"    🚫 Bloqué (403)")
-                        self._record_failure(403)
-                        break
-                    elif response.status_code != 200:
-                        print(f"    ⚠️ Status {response.status_code}")
-                        break
-
-                    self._record_success()
-
-                    soup = BeautifulSoup(response.content, 'html.parser')
-
-                    # Chercher JSON __NEXT_DATA__
-                    script = soup.find('script', id='__NEXT_DATA__')
-                    if script and script.string:
-                        try:
-                            data = json.loads(script.string)
-                            ads = self._find_ads_in_json(data)
-
-                            if ads:
-                                print(f"    📄 Page {page_num}: {len(ads)} annonces")
-                                for ad in ads:
-                                    listing = self._parse_json_ad(ad, location['ville'])
-                                    if listing:
-                                        listing = self._enrich_listing(listing, location)
-                                        should_reject, reason = self._should_reject_listing(listing)
-                                        if not should_reject:
-                                            listings.append(listing)
-                        except:
-                            pass
-
-                except Exception as e:
-                    print(f"    ⚠️ Erreur: {e}")
-                    break
+            # WAIT AVANT chaque requête, parsing pendant l'attente suivante
+            listings = self._paginate(fetch, location, max_pages)
 
         except Exception as e:
             print(f"  ⚠️ Erreur HTML: {e}")
 
         return listings
 
+    def _parse_listing_page(self, content, location: dict) -> List[Dict[str, Any]]:
+        """Extrait les annonces du JSON __NEXT_DATA__ d'une page de recherche (sinon du rendu HTML)"""
+        ads = extract_list(content, ADS_JSON) or []
+        # Même format que l'API (list_id, location, owner, attributes...)
+        page_listings = [l for l in (self._parse_api_ad(ad, location['ville']) for ad in ads) if l]
+        if page_listings:
+            return page_listings
+
+        # Pas d'annonces dans le JSON embarqué: rendu HTML
+        soup, ads = self._parse_ads(content)
+        page_listings = [l for l in (self._extract_listing_html(ad, location['ville']) for ad in ads[:15]) if l]
+        soup.decompose()
+        return page_listings
+
     def _extract_listing_html(self, ad, ville: str) -> Dict[str, Any]:
         """Extrait une annonce du HTML"""
         try:
@@ -444,16 +410,17 @@ class LeboncoinScraper(BaseScraper):
             return None
 
     def _parse_api_ad(self, ad: dict, ville: str) -> Dict[str, Any]:
-        """Parse une annonce de l'API"""
+        """Parse une annonce de l'API ou du JSON __NEXT_DATA__"""
         try:
             owner = ad.get('owner', {})
             is_pro = owner.get('type') == 'pro'
 
             attributes = {attr.get('key'): attr.get('value') for attr in ad.get('attributes', [])}
 
-            photos = []
-            for img in ad.get('images', {}).get('urls_large', [])[:5]:
-                photos.append(img)
+            images = ad.get('images') or {}
+            if isinstance(images, dict):
+                images = images.get('urls_large') or images.get('urls') or []
+            photos = list(images)[:5]
 
             price = ad.get('price', [0])
             if isinstance(price, list):
@@ -465,12 +432,17 @@ class LeboncoinScraper(BaseScraper):
             if location.get('zipcode'):
                 localisation = f"{localisation} ({location.get('zipcode')})"
 
+            # Lien: url du JSON Next.js (absolue ou relative), sinon list_id
+            lien = ad.get('url') or f"/ad/ventes_immobilieres/{ad.get('list_id')}"
+            if not lien.startswith('http'):
+                lien = f"https://www.leboncoin.fr{lien}"
+
             return {
                 'titre': ad.get('subject', 'Annonce LeBonCoin'),
                 'date_publication': ad.get('first_publication_date', '')[:10] or datetime.now().strftime('%Y-%m-%d'),
                 'prix': int(price) if price else 0,
                 'localisation': localisation,
-                'lien': f"https://www.leboncoin.fr/ad/ventes_immobilieres/{ad.get('list_id')}",
+                'lien': lien,
                 'site_source': self.site_name,
                 'photos': photos,
                 'telephone': None,
@@ -481,48 +453,6 @@ class LeboncoinScraper(BaseScraper):
         except:
             return None
 
-    def _parse_json_ad(self, ad: dict, ville: str) -> Dict[str, Any]:
-        """Parse une annonce JSON"""
-        try:
-            location = ad.get('location', {})
-            localisation = location.get('city', ville) if isinstance(location, dict) else ville
-
-            return {
-                'titre': ad.get('subject', ad.get('title', 'Annonce LeBonCoin')),
-                'date_publication': datetime.now().strftime('%Y-%m-%d'),
-                'prix': self._safe_int(ad.get('price')),
-                'localisation': localisation,
-                'lien': f"https://www.leboncoin.fr{ad.get('url', '')}",
-                'site_source': self.site_name,
-                'photos': ad.get('images', [])[:3] if isinstance(ad.get('images'), list) else [],
-                'telephone': None,
-                'surface': None,
-                'pieces': None,
-                'description': ''
-            }
-        except:
-            return None
-
-    def _find_ads_in_json(self, data: dict, depth=0) -> list:
-        """Cherche les annonces dans le JSON"""
-        if depth > 6:
-            return []
-
-        if isinstance(data, dict):
-            if 'ads' in data and isinstance(data['ads'], list):
-                return data['ads']
-            for value in data.values():
-                result = self._find_ads_in_json(value, depth + 1)
-                if result:
-                    return result
-        elif isinstance(data, list):
-            for item in data:
-                result = self._find_ads_in_json(item, depth + 1)
-                if result:
-                    return result
-
-        return []
-
     def _safe_int(self, value) -> int:
         try:
             if isinstance(value, list):
@@ -0,0 +1,219 @@
+"""
+Archive des pages de résultats récupérées (HTML compressé, adressé par hash).
+
+Chaque page parsée est archivée: le corps est compressé (zstd si le
+module zstandard est installé, sinon zlib) et stocké sous son hash
+sha256, une seule fois même si la page est récupérée à chaque passage.
+Un index (JSON lines) garde site, URL, date et localisation de recherche
+de chaque récupération.
+
+Quand un site change son balisage, il suffit de corriger le parser puis
+de relancer l'extraction sur les pages archivées (voir reparse_archive.py),
+sans aucune requête réseau.
+
+    page_archive.store('pap', url, content, location)
+    for entry in page_archive.entries(sites=['pap']):
+        content = page_archive.load(entry.hash)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+# zstd: meilleur ratio et décompression plus rapide que zlib
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+# Répertoire de l'archive (désactivée si PAGE_ARCHIVE_DIR est vide)
+PAGE_ARCHIVE_DIR = os.getenv('PAGE_ARCHIVE_DIR', '')
+# Niveau de compression (zstd 1-22, zlib plafonné à 9)
+PAGE_ARCHIVE_LEVEL = int(os.getenv('PAGE_ARCHIVE_LEVEL', 10))
+
+# Extension des blobs selon leur compression
+_CODEC_EXT = {'zstd': '.zst', 'zlib': '.z'}
+
+
+@dataclass
+class ArchivedPage:
+    """Une récupération de page (entrée de l'index)."""
+
+    hash: str
+    site: str
+    url: str
+    fetched_at: float
+    size: int
+    location: Dict[str, Any] = field(default_factory=dict)
+
+
+class PageArchive:
+    """
+    Archive disque des pages de résultats, dédupliquée par contenu.
+
+    Arborescence:
+        <dir>/index.jsonl        une ligne par récupération
+        <dir>/blobs/ab/abcd….zst corps compressé (un par contenu distinct)
+    """
+
+    def __init__(self, archive_dir: str = PAGE_ARCHIVE_DIR, level: int = PAGE_ARCHIVE_LEVEL):
+        self.archive_dir = archive_dir
+        self.enabled = bool(archive_dir)
+        self.level = level
+        self.codec = 'zstd' if ZSTD_AVAILABLE else 'zlib'
+        self._lock = threading.Lock()
+        self._stats = {
+            'pages': 0,         # Récupérations archivées
+            'blobs': 0,         # Contenus distincts écrits
+            'duplicates': 0,    # Contenus déjà archivés
+            'bytes_raw': 0,     # Octets des blobs écrits (avant compression)
+            'bytes_stored': 0,  # Octets des blobs écrits (compressés)
+        }
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.archive_dir, 'index.jsonl')
+
+    def _blob_path(self, digest: str, codec: str) -> str:
+        return os.path.join(self.archive_dir, 'blobs', digest[:2], digest + _CODEC_EXT[codec])
+
+    def _compress(self, content: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level).compress(content)
+        return zlib.compress(content, min(self.level, 9))
+
+    def store(self, site: str, url: str, content, location: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Archive une page récupérée.
+
+        Args:
+            site: Clé du site
+            url: URL de la page
+            content: HTML (bytes ou str)
+            location: Localisation de recherche (nécessaire au parser)
+
+        Returns:
+            Hash du contenu, ou None si l'archive est désactivée / en erreur
+        """
+        if not self.enabled or not content:
+            return None
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+
+        digest = hashlib.sha256(content).hexdigest()
+        entry = ArchivedPage(digest, site, url or '', time.time(), len(content), location or {})
+
+        try:
+            written = self._write_blob(digest, content)
+            line = json.dumps(asdict(entry), ensure_ascii=False, default=str) + '\n'
+            with self._lock:
+                with open(self.index_path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+        except OSError as e:
+            print(f"⚠️ Archive HTML: écriture impossible ({e})")
+            return None
+
+        with self._lock:
+            self._stats['pages'] += 1
+            if written:
+                self._stats['blobs'] += 1
+                self._stats['bytes_raw'] += len(content)
+                self._stats['bytes_stored'] += written
+            else:
+                self._stats['duplicates'] += 1
+        return digest
+
+    def _write_blob(self, digest: str, content: bytes) -> int:
+        """Écrit le blob s'il n'existe pas encore (octets écrits, 0 si doublon)."""
+        if self._find_blob(digest):
+            return 0
+        path = self._blob_path(digest, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = self._compress(content)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def _find_blob(self, digest: str) -> Optional[tuple]:
+        for codec in _CODEC_EXT:
+            path = self._blob_path(digest, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None
+
+    def load(self, digest: str) -> Optional[bytes]:
+        """Contenu d'une page archivée (décompressé), ou None si absent."""
+        found = self._find_blob(digest)
+        if not found:
+            return None
+        path, codec = found
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            if codec == 'zstd':
+                if zstandard is None:
+                    print(f"⚠️ Archive HTML: {digest[:12]} compressé en zstd (module zstandard requis)")
+                    return None
+                return zstandard.ZstdDecompressor().decompress(data)
+            return zlib.decompress(data)
+        except (OSError, zlib.error) as e:
+            print(f"⚠️ Archive HTML: lecture de {digest[:12]} impossible ({e})")
+            return None
+
+    def entries(
+        self,
+        sites: Optional[List[str]] = None,
+        since: Optional[float] = None,
+        latest: bool = False
+    ) -> Iterator[ArchivedPage]:
+        """
+        Récupérations archivées, dans l'ordre d'archivage.
+
+        Args:
+            sites: Clés des sites à garder (None = tous)
+            since: Timestamp minimum de récupération
+            latest: Seulement la dernière récupération de chaque (site, URL)
+        """
+        try:
+            f = open(self.index_path, 'r', encoding='utf-8')
+        except OSError:
+            return
+
+        selected = []
+        with f:
+            for line in f:
+                try:
+                    entry = ArchivedPage(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue  # Ligne tronquée (arrêt pendant l'écriture)
+                if sites and entry.site not in sites:
+                    continue
+                if since is not None and entry.fetched_at < since:
+                    continue
+                selected.append(entry)
+
+        if latest:
+            last = {(e.site, e.url or e.hash): e for e in selected}
+            selected = sorted(last.values(), key=lambda e: e.fetched_at)
+        yield from selected
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pages archivées, doublons et taux de compression."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['codec'] = self.codec
+        stats['ratio'] = round(stats['bytes_raw'] / stats['bytes_stored'], 1) if stats['bytes_stored'] else 0
+        return stats
+
+
+# Instance globale
+page_archive = PageArchive()
@@ -0,0 +1,151 @@
+"""
+Parsing des pages de résultats hors du thread de scraping.
+
+Deux backends (PARSE_BACKEND):
+- 'thread' (défaut): les pages sont parsées dans des threads de parsing
+  du processus. Suffisant pour un petit déploiement, mais BeautifulSoup
+  garde le GIL et ralentit les threads Flask qui servent le dashboard.
+- 'process': les threads de parsing délèguent à un pool de processus.
+  Le worker reçoit le HTML brut, la clé du site et le sélecteur gagnant
+  connu, et renvoie les annonces (dicts) extraites par le parser du site
+  avec les compteurs de son plan de sélecteurs, fusionnés ici (la santé
+  des parsers reste visible dans /api/parser-health).
+
+    page_listings = parse_pool.parse(self, response.content, location)
+"""
+
+import atexit
+import importlib
+import os
+import pickle
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .selector_plan import stats_delta
+
+# 'thread' (parsing dans le processus) ou 'process' (pool de processus)
+PARSE_BACKEND = os.getenv('PARSE_BACKEND', 'thread').lower()
+# Threads de parsing: la page N est parsée pendant le délai avant la page N+1
+PARSE_THREADS = int(os.getenv('PARSE_THREADS', 4))
+# Processus de parsing (backend 'process')
+PARSE_PROCESSES = int(os.getenv('PARSE_PROCESSES', 2))
+
+# Scrapers instanciés dans un processus worker (un par site)
+_worker_scrapers: Dict[str, Any] = {}
+
+
+def _parse_in_worker(
+    site_key: str,
+    scraper_class: str,
+    content,
+    location: Dict[str, Any],
+    winner: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Exécuté dans un processus du pool: parser du site sur le HTML brut.
+
+    Returns:
+        Tuple (annonces, compteurs du plan de sélecteurs pour cette page)
+    """
+    scraper = _worker_scrapers.get(site_key)
+    if scraper is None:
+        module, name = scraper_class.rsplit('.', 1)
+        scraper = getattr(importlib.import_module(module), name)()
+        _worker_scrapers[site_key] = scraper
+
+    plan = scraper.ad_plan
+    if plan is None:
+        return scraper._parse_listing_page(content, location), None
+    if winner and plan.winner is None:
+        plan.set_winner(winner)
+    before = plan.get_stats()
+    page_listings = scraper._parse_listing_page(content, location)
+    return page_listings, stats_delta(before, plan.get_stats())
+
+
+class ParsePool:
+    """
+    Threads de parsing, avec pool de processus optionnel.
+
+    Usage:
+        future = parse_pool.submit(lambda: parse_pool.parse(scraper, content, location))
+    """
+
+    def __init__(self, backend: str = PARSE_BACKEND, threads: int = PARSE_THREADS, processes: int = PARSE_PROCESSES):
+        if backend not in ('thread', 'process'):
+            print(f"⚠️ PARSE_BACKEND inconnu ({backend}), parsing dans les threads")
+            backend = 'thread'
+        self.backend = backend
+        self.threads = max(1, threads)
+        self.processes = max(1, processes)
+
+        self._threads = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='parse')
+        self._processes = None  # Démarré au premier parsing
+        self._lock = threading.Lock()
+        self._stats = {'pages': 0, 'in_process': 0, 'fallbacks': 0}
+
+    def submit(self, fn: Callable[[], Any]) -> Future:
+        """Exécute fn sur un thread de parsing."""
+        return self._threads.submit(fn)
+
+    def parse(self, scraper, content, location: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Annonces brutes d'une page (scraper._parse_listing_page).
+
+        Backend 'process': parsé dans un processus du pool (repli dans le
+        thread appelant si le pool est cassé).
+        """
+        with self._lock:
+            self._stats['pages'] += 1
+
+        if self.backend == 'process':
+            scraper_class = f"{type(scraper).__module__}.{type(scraper).__qualname__}"
+            try:
+                pool = self._process_pool()
+                plan = scraper.ad_plan
+                page_listings, selector_stats = pool.submit(
+                    _parse_in_worker, scraper.site_key, scraper_class, content, location,
+                    plan.winner if plan is not None else None
+                ).result()
+                if selector_stats and plan is not None:
+                    plan.merge(selector_stats)
+                with self._lock:
+                    self._stats['in_process'] += 1
+                return page_listings
+            except (BrokenProcessPool, pickle.PicklingError) as e:
+                print(f"    ⚠️ Pool de parsing indisponible ({type(e).__name__}), parsing local")
+                with self._lock:
+                    self._stats['fallbacks'] += 1
+                    self._processes = None
+
+        return scraper._parse_listing_page(content, location)
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._processes is None:
+                # spawn: pas de fork d'un processus avec threads (Flask, Playwright)
+                self._processes = ProcessPoolExecutor(max_workers=self.processes, mp_context=get_context('spawn'))
+            return self._processes
+
+    def close(self):
+        """Arrête les threads et processus de parsing."""
+        self._threads.shutdown(wait=False)
+        with self._lock:
+            processes, self._processes = self._processes, None
+        if processes is not None:
+            processes.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Backend, pages parsées, pages parsées hors processus, replis."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['backend'] = self.backend
+        stats['workers'] = self.processes if self.backend == 'process' else self.threads
+        return stats
+
+
+parse_pool = ParsePool()
+atexit.register(parse_pool.close)
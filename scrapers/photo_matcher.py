@@ -0,0 +1,248 @@
+"""
+Détection des doublons par la première photo des annonces (optionnel).
+
+Un même bien publié sur plusieurs sites réutilise ses photos même quand
+le texte diffère. Après le dédoublonnage textuel, la première photo de
+chaque annonce est téléchargée par un pool borné de workers et réduite
+à un hash perceptuel (dHash, voir utils/photo_hash.py):
+- hash mis en cache par URL de photo: chaque image n'est traitée qu'une fois
+- un arbre BK par utilisateur garde les photos des annonces déjà vues
+  (une entrée par annonce, au plus PHOTO_TREE_SIZE: les annonces les
+  moins récemment vues sont oubliées)
+- une annonce dont la photo est à distance <= PHOTO_MATCH_DISTANCE d'une
+  autre est un doublon: fusionnée dans l'annonce du même passage, ou
+  écartée si le bien a été vu lors d'un passage précédent
+
+Désactivé par défaut (PHOTO_MATCH_WORKERS=0) ou sans Pillow.
+
+    listings = photo_matcher.merge(user_id, listings)
+"""
+
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from utils.canonical_url import listing_key
+from utils.near_duplicates import NearDuplicateMerger
+from utils.photo_hash import PIL_AVAILABLE, BKTree, dhash
+
+# Téléchargements simultanés (0 = étape désactivée)
+PHOTO_MATCH_WORKERS = int(os.getenv('PHOTO_MATCH_WORKERS', 0))
+# Distance de Hamming maximale entre deux photos du même bien (sur 64 bits)
+PHOTO_MATCH_DISTANCE = int(os.getenv('PHOTO_MATCH_DISTANCE', 6))
+# Hash gardés en cache (par URL de photo)
+PHOTO_CACHE_SIZE = int(os.getenv('PHOTO_CACHE_SIZE', 20000))
+# Annonces gardées dans l'arbre de chaque utilisateur
+PHOTO_TREE_SIZE = int(os.getenv('PHOTO_TREE_SIZE', 5000))
+
+# Photo ignorée au-delà de cette taille
+PHOTO_MAX_BYTES = 3 * 1024 * 1024
+PHOTO_TIMEOUT = 10
+
+_PHOTO_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8',
+}
+
+
+def download_photo(url: str) -> Optional[bytes]:
+    """Contenu d'une photo (None si erreur ou trop lourde)."""
+    try:
+        with requests.get(url, headers=_PHOTO_HEADERS, timeout=PHOTO_TIMEOUT, stream=True) as response:
+            if response.status_code != 200:
+                return None
+            data = b''
+            for chunk in response.iter_content(64 * 1024):
+                data += chunk
+                if len(data) > PHOTO_MAX_BYTES:
+                    return None
+            return data
+    except requests.RequestException:
+        return None
+
+
+class PhotoMatcher:
+    """
+    Hash perceptuels des premières photos et doublons par utilisateur.
+
+    Usage:
+        matcher = PhotoMatcher(workers=4)
+        duplicates = matcher.find_duplicates(user_id, listings)  # {index: lien de l'original}
+        listings = matcher.merge(user_id, listings)
+    """
+
+    def __init__(
+        self,
+        workers: int = PHOTO_MATCH_WORKERS,
+        max_distance: int = PHOTO_MATCH_DISTANCE,
+        cache_size: int = PHOTO_CACHE_SIZE,
+        tree_size: int = PHOTO_TREE_SIZE,
+        fetch: Callable[[str], Optional[bytes]] = download_photo
+    ):
+        self.workers = workers
+        self.max_distance = max_distance
+        self.cache_size = cache_size
+        self.tree_size = max(1, tree_size)
+        self.enabled = workers > 0 and PIL_AVAILABLE
+        self._fetch = fetch
+
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._cache: 'OrderedDict[str, Optional[int]]' = OrderedDict()  # URL photo -> hash (None = illisible)
+        self._trees: Dict[str, BKTree] = {}  # Photos déjà vues, par utilisateur
+        self._entries: Dict[str, 'OrderedDict[str, tuple]'] = {}  # Clé d'annonce -> (hash, lien), par utilisateur
+        self._lock = threading.Lock()
+        self._stats = {'photos': 0, 'hashed': 0, 'cache_hits': 0, 'failed': 0, 'duplicates': 0, 'forgotten': 0}
+
+    def _hash_photo(self, url: str) -> Optional[int]:
+        data = self._fetch(url)
+        if data is None:
+            return None
+        try:
+            return dhash(data)
+        except Exception:
+            return None
+
+    def hash_photos(self, urls: List[str]) -> Dict[str, Optional[int]]:
+        """Hash de chaque photo: cache, sinon téléchargement dans le pool borné."""
+        hashes = {}
+        missing = []
+        with self._lock:
+            for url in dict.fromkeys(urls):
+                if url in self._cache:
+                    self._cache.move_to_end(url)
+                    hashes[url] = self._cache[url]
+                    self._stats['cache_hits'] += 1
+                else:
+                    missing.append(url)
+            if missing and self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='photo-hash')
+
+        if missing:
+            for url, value in zip(missing, self._pool.map(self._hash_photo, missing)):
+                hashes[url] = value
+
+            with self._lock:
+                for url in missing:
+                    self._cache[url] = hashes[url]
+                    self._stats['hashed' if hashes[url] is not None else 'failed'] += 1
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return hashes
+
+    def find_duplicates(self, user_id: str, listings: List[Dict[str, Any]]) -> Dict[int, str]:
+        """
+        Annonces dont la première photo correspond à une photo déjà vue.
+
+        Returns:
+            {indice de l'annonce: lien de l'annonce originale}
+        """
+        firsts = {i: l['photos'][0] for i, l in enumerate(listings) if l.get('photos')}
+        if not self.enabled or not firsts:
+            return {}
+        hashes = self.hash_photos(list(firsts.values()))
+
+        duplicates = {}
+        with self._lock:
+            tree = self._trees.setdefault(user_id, BKTree())
+            entries = self._entries.setdefault(user_id, OrderedDict())
+            self._stats['photos'] += len(firsts)
+            for i, photo_url in firsts.items():
+                value = hashes.get(photo_url)
+                if value is None:
+                    continue
+                lien = listings[i]['lien']
+                key = listing_key(listings[i])
+                # Même annonce revue lors d'un autre passage: pas un doublon
+                match = next((url for _, (url, other) in tree.find(value, self.max_distance) if other != key), None)
+                if match is not None:
+                    duplicates[i] = match
+                elif key in entries:
+                    entries.move_to_end(key)  # Déjà dans l'arbre: seulement rafraîchie
+                else:
+                    entries[key] = (value, lien)
+                    tree.add(value, (lien, key))
+            if len(entries) > self.tree_size:
+                self._forget_oldest(user_id)
+            self._stats['duplicates'] += len(duplicates)
+        return duplicates
+
+    def _forget_oldest(self, user_id: str):
+        """Oublie les annonces les moins récemment vues (10% de marge) et reconstruit l'arbre."""
+        entries = self._entries[user_id]
+        keep = self.tree_size - self.tree_size // 10
+        while len(entries) > keep:
+            entries.popitem(last=False)
+            self._stats['forgotten'] += 1
+        tree = self._trees[user_id] = BKTree()
+        for key, (value, lien) in entries.items():
+            tree.add(value, (lien, key))
+
+    def merge(self, user_id: str, listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Annonces sans doublons photo.
+
+        Un doublon d'une annonce du même passage y est fusionné (sources,
+        champs manquants); un doublon d'une annonce déjà vue est écarté.
+        """
+        duplicates = self.find_duplicates(user_id, listings)
+        if not duplicates:
+            return listings
+
+        by_url = {l['lien']: i for i, l in enumerate(listings)}
+
+        def root(i: int) -> Optional[int]:
+            """Original d'un doublon, en remontant les chaînes (None si vu lors d'un passage précédent)."""
+            visited = set()
+            while i in duplicates and i not in visited:
+                visited.add(i)
+                i = by_url.get(duplicates[i])
+                if i is None:
+                    return None
+            return None if i in duplicates else i
+
+        groups: Dict[int, List[int]] = {}
+        for i in duplicates:
+            original = root(i)
+            if original is not None:
+                groups.setdefault(original, []).append(i)
+
+        merged = []
+        for i, listing in enumerate(listings):
+            if i in duplicates:
+                continue
+            if i in groups:
+                group = [listing] + [listings[j] for j in groups[i]]
+                listing = NearDuplicateMerger.canonical(group)
+                # Sources déjà fusionnées (quasi-doublons textuels) conservées
+                listing['sources'] = [
+                    source
+                    for l in group
+                    for source in l.get('sources') or [{'site_source': l.get('site_source'), 'lien': l.get('lien'), 'prix': l.get('prix')}]
+                ]
+            merged.append(listing)
+        return merged
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Photos comparées, téléchargées, servies par le cache, en échec, doublons."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cache_size'] = len(self._cache)
+            stats['users'] = len(self._trees)
+            stats['tree_entries'] = sum(len(entries) for entries in self._entries.values())
+        stats['enabled'] = self.enabled
+        return stats
+
+
+# Instance globale
+photo_matcher = PhotoMatcher()
+atexit.register(photo_matcher.close)
@@ -0,0 +1,125 @@
+"""
+Détection des annonces probablement retirées, par recherche et par site.
+
+Une annonce revue n'était comptée que comme doublon: last_seen_at ne
+bougeait plus après l'insertion, et une annonce retirée du site restait
+"Nouveau" indéfiniment.
+
+Après chaque passage complet d'un site (toutes les pages lues: ni arrêt
+par le watermark, ni erreur, ni limite de pages), les clés canoniques vues
+sont comparées à celles des passages précédents de la même recherche:
+- différence d'ensembles: les clés absentes voient leur compteur augmenter,
+  les clés vues le remettent à zéro
+- absente REMOVED_AFTER_RUNS passages complets de suite: probablement
+  retirée (signalée une fois, puis oubliée)
+
+Un passage incomplet n'apporte aucune information: les annonces non lues
+peuvent être sur les pages suivantes. Le watermark arrête la plupart des
+passages dès les pages déjà connues; un passage sur PRESENCE_SWEEP_EVERY
+(ou le suivant si le balayage échoue) est donc un balayage: toutes les
+pages sont lues sans arrêt anticipé. Comme les watermarks, l'état est
+en mémoire.
+
+    sweep = presence.plan_run(scope, site_key)  # True: lire toutes les pages
+    removed = presence.observe(scope, site_key, links)  # clés à marquer
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from utils.canonical_url import canonical_url
+
+# Passages complets consécutifs sans l'annonce avant de la considérer retirée
+REMOVED_AFTER_RUNS = int(os.getenv('REMOVED_AFTER_RUNS', 3))
+# Un passage sur N lit toutes les pages, sans arrêt par le watermark (0 = jamais)
+PRESENCE_SWEEP_EVERY = int(os.getenv('PRESENCE_SWEEP_EVERY', 5))
+
+
+class PresenceTracker:
+    """
+    Passages manqués de chaque annonce, par (recherche, site).
+
+    Usage:
+        tracker = PresenceTracker(removed_after=3, sweep_every=5)
+        tracker.plan_run('user:lyon:10', 'pap')  # True tous les 5 passages
+        tracker.observe('user:lyon:10', 'pap', links)  # [] puis clés retirées
+    """
+
+    def __init__(self, removed_after: int = REMOVED_AFTER_RUNS, sweep_every: int = PRESENCE_SWEEP_EVERY):
+        self.removed_after = max(1, removed_after)
+        self.sweep_every = sweep_every
+        self._missed: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._runs_since: Dict[Tuple[str, str], int] = {}  # Passages depuis le dernier passage complet
+        self._lock = threading.Lock()
+        self._stats = {'runs': 0, 'sweeps': 0, 'missing': 0, 'removed': 0}
+
+    def plan_run(self, scope: str, site_key: str) -> bool:
+        """
+        Compte un passage de la recherche sur le site.
+
+        Returns:
+            True si ce passage doit lire toutes les pages (balayage sans watermark)
+        """
+        if self.sweep_every <= 0:
+            return False
+        with self._lock:
+            runs = self._runs_since.get((scope, site_key), 0) + 1
+            self._runs_since[(scope, site_key)] = runs
+            sweep = runs >= self.sweep_every
+            if sweep:
+                self._stats['sweeps'] += 1
+        return sweep
+
+    def observe(self, scope: str, site_key: str, links: Iterable[str]) -> List[str]:
+        """
+        Enregistre les liens d'un passage complet.
+
+        Returns:
+            Clés canoniques absentes depuis removed_after passages (à marquer retirées)
+        """
+        seen = {canonical_url(link) for link in links if link}
+        if not seen:
+            return []
+
+        removed = []
+        with self._lock:
+            missed = self._missed.setdefault((scope, site_key), {})
+            missing = missed.keys() - seen
+            for key in missing:
+                count = missed[key] + 1
+                if count >= self.removed_after:
+                    removed.append(key)
+                    del missed[key]
+                else:
+                    missed[key] = count
+            missed.update(dict.fromkeys(seen, 0))
+            self._runs_since[(scope, site_key)] = 0
+
+            self._stats['runs'] += 1
+            self._stats['missing'] += len(missing)
+            self._stats['removed'] += len(removed)
+        return removed
+
+    def reset(self, scope: str = None):
+        """Oublie l'état (d'une recherche, ou tout)."""
+        with self._lock:
+            if scope is None:
+                self._missed.clear()
+                self._runs_since.clear()
+            else:
+                for key in [k for k in self._missed if k[0] == scope]:
+                    del self._missed[key]
+                for key in [k for k in self._runs_since if k[0] == scope]:
+                    del self._runs_since[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Passages comparés, balayages, absences constatées, annonces signalées retirées, clés suivies."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['tracked'] = sum(len(missed) for missed in self._missed.values())
+        return stats
+
+
+# Instance globale
+presence = PresenceTracker()
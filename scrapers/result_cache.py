@@ -0,0 +1,145 @@
+"""
+Cache TTL des résultats de recherche par site.
+
+Clé: (site, localisation normalisée, rayon). La durée de vie est le
+list_refresh_min du profil du site: deux scrapings de la même zone à
+quelques minutes d'intervalle ne refont aucune requête réseau.
+
+Seuls les résultats valables pour tous les utilisateurs sont partagés
+(cache et fetchs simultanés, voir fetch_shared): un passage arrêté par
+le watermark ou filtré par l'index des annonces vues d'un utilisateur
+n'est ni mis en cache ni transmis aux autres jobs. Chaque consommateur
+applique ensuite son propre index aux résultats partagés.
+"""
+
+import copy
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .seen_index import seen_index
+from .singleflight import SingleFlight, inflight
+
+
+def normalize_location(ville: str) -> str:
+    """Normalise une localisation ("  Saint-Étienne " -> "saint-etienne")."""
+    text = unicodedata.normalize('NFKD', ville.strip().lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.split())
+
+
+@dataclass
+class CacheEntry:
+    """Résultats mis en cache pour une recherche sur un site."""
+
+    listings: List[Dict[str, Any]]
+    stored_at: float
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.stored_at
+
+    @property
+    def age_minutes(self) -> int:
+        return int(self.age_seconds // 60)
+
+
+class ResultCache:
+    """Cache en mémoire des annonces normalisées (partagé par tous les jobs)."""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, int], CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(site_key: str, ville: str, rayon: int) -> Tuple[str, str, int]:
+        return (site_key, normalize_location(ville), int(rayon))
+
+    def get(self, site_key: str, ville: str, rayon: int, ttl_minutes: int) -> Optional[CacheEntry]:
+        """
+        Récupère les résultats s'ils ont moins de ttl_minutes.
+
+        Returns:
+            CacheEntry avec une copie des annonces, ou None si absent/expiré
+        """
+        key = self.make_key(site_key, ville, rayon)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.age_seconds > ttl_minutes * 60:
+                del self._entries[key]
+                return None
+            # Copie: chaque job modifie ses annonces (_distance_km, etc.)
+            return CacheEntry(copy.deepcopy(entry.listings), entry.stored_at)
+
+    def put(self, site_key: str, ville: str, rayon: int, listings: List[Dict[str, Any]]):
+        """Met en cache les résultats complets d'un scraping."""
+        key = self.make_key(site_key, ville, rayon)
+        with self._lock:
+            self._entries[key] = CacheEntry(copy.deepcopy(listings), time.time())
+
+    def age_minutes(self, site_key: str, ville: str, rayon: int, ttl_minutes: int) -> Optional[int]:
+        """Âge (minutes) des résultats en cache, None si absent/expiré."""
+        key = self.make_key(site_key, ville, rayon)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.age_seconds > ttl_minutes * 60:
+                return None
+            return entry.age_minutes
+
+    def invalidate(self, site_key: str = None):
+        """Vide le cache (d'un site, ou entièrement)."""
+        with self._lock:
+            if site_key is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == site_key]:
+                    del self._entries[key]
+
+
+# Instance globale
+result_cache = ResultCache()
+
+
+def fetch_shared(
+    scraper,
+    ville: str,
+    rayon: int,
+    max_pages: int,
+    user_id: Optional[str] = None,
+    cache: ResultCache = result_cache,
+    flight: SingleFlight = inflight
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Scrape un site, en partageant le fetch avec les recherches identiques en cours.
+
+    Le résultat n'est mis en cache et transmis aux autres jobs que si
+    scraper.shareable (sinon chaque job suivant refait son propre fetch).
+
+    Args:
+        scraper: Scraper configuré pour l'utilisateur (watermark, index des vues)
+        user_id: Utilisateur dont l'index filtre les résultats partagés
+
+    Returns:
+        Tuple (annonces, shared)
+    """
+    site_key = scraper.site_key
+
+    def fetch():
+        result = scraper.scrape(ville, rayon, max_pages=max_pages)
+        shareable = scraper.shareable
+        if result and shareable:
+            cache.put(site_key, ville, rayon, result)
+        return result, shareable
+
+    (listings, shareable), shared = flight.do(cache.make_key(site_key, ville, rayon), fetch)
+    if shared and not shareable:
+        # Fetch tronqué par le watermark ou filtré par l'index d'un autre utilisateur
+        listings, _ = fetch()
+        shared = False
+    elif shared and user_id is not None:
+        listings = seen_index.drop_known(user_id, listings)
+    return listings, shared
@@ -0,0 +1,257 @@
+"""
+Index persistant des annonces déjà vues, par utilisateur.
+
+Une annonce déjà enregistrée traversait tout le pipeline (enrichissement,
+validation, dédoublonnage) puis un aller-retour en base pour finir comptée
+comme doublon. Avec l'index, les scrapers l'écartent dès que son lien
+est extrait de la page de résultats.
+
+- Filtre de Bloom par utilisateur (fichier mappé en mémoire, taille fixe:
+  ~1,2 Mo pour 1 million d'URLs à 1% de faux positifs): un lien absent
+  du filtre est nouveau, sans autre lecture
+- Magasin exact SQLite sur disque (hash 16 octets de chaque URL canonique,
+  voir utils/canonical_url.py): confirme
+  les "peut-être" du filtre, pas de faux positif au final
+- Les liens ne sont ajoutés qu'une fois les annonces sauvegardées
+
+La mémoire reste bornée quel que soit le nombre d'URLs (balayage d'un
+département entier): filtres et base sont sur disque, seules les pages
+utilisées sont chargées par le système.
+
+Désactivé si SEEN_INDEX_DIR est vide.
+
+    known = seen_index.filter_known(user_id, links)
+    fresh = seen_index.drop_known(user_id, cached_listings)
+    seen_index.add(user_id, saved_links)
+"""
+
+import atexit
+import hashlib
+import math
+import mmap
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from utils.canonical_url import canonical_url
+
+# Répertoire de l'index (désactivé si vide)
+SEEN_INDEX_DIR = os.getenv('SEEN_INDEX_DIR', '')
+# Capacité des filtres de Bloom (URLs par utilisateur) et taux de faux positifs
+SEEN_INDEX_CAPACITY = int(os.getenv('SEEN_INDEX_CAPACITY', 1000000))
+SEEN_INDEX_ERROR_RATE = float(os.getenv('SEEN_INDEX_ERROR_RATE', 0.01))
+
+# Hashes confirmés par requête SQLite (limite de paramètres)
+_SQL_BATCH = 500
+
+
+def url_digest(url: str) -> bytes:
+    """Hash 16 octets de l'URL canonique (clé du filtre et du magasin exact)."""
+    return hashlib.blake2b(canonical_url(url).encode(), digest_size=16).digest()
+
+
+class BloomFilter:
+    """
+    Filtre de Bloom sur un tampon d'octets (bytearray ou fichier mappé).
+
+    Les k positions d'un élément sont dérivées de son hash 16 octets
+    (double hachage h1 + i·h2).
+    """
+
+    def __init__(self, capacity: int, error_rate: float, buffer=None):
+        self.num_bits = self.size_for(capacity, error_rate) * 8
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = buffer if buffer is not None else bytearray(self.num_bits // 8)
+
+    @staticmethod
+    def size_for(capacity: int, error_rate: float) -> int:
+        """Taille en octets pour capacity éléments au taux d'erreur donné."""
+        bits = -capacity * math.log(error_rate) / (math.log(2) ** 2)
+        return max(64, int(math.ceil(bits / 8)))
+
+    def _positions(self, digest: bytes):
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, digest: bytes):
+        bits = self._bits
+        for pos in self._positions(digest):
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+
+class SeenIndex:
+    """
+    Liens vus par utilisateur: filtre de Bloom + magasin exact SQLite.
+
+    Usage:
+        index = SeenIndex('/var/lib/prospection/seen')
+        index.add(user_id, ['https://www.pap.fr/annonces/r1'])
+        index.filter_known(user_id, links)  # sous-ensemble déjà vu
+    """
+
+    def __init__(
+        self,
+        index_dir: str = SEEN_INDEX_DIR,
+        capacity: int = SEEN_INDEX_CAPACITY,
+        error_rate: float = SEEN_INDEX_ERROR_RATE
+    ):
+        self.index_dir = index_dir
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._filters: Dict[str, BloomFilter] = {}
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._lock = threading.Lock()
+        self._stats = {'checked': 0, 'bloom_negative': 0, 'known': 0, 'added': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.index_dir)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(self.index_dir, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(self.index_dir, 'seen.sqlite3'), check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS seen (user_id TEXT NOT NULL, digest BLOB NOT NULL, '
+                'PRIMARY KEY (user_id, digest)) WITHOUT ROWID'
+            )
+        return self._db
+
+    def _bloom_path(self, user_id: str) -> str:
+        name = hashlib.sha1(user_id.encode()).hexdigest()[:16]
+        return os.path.join(self.index_dir, f'{name}.bloom')
+
+    def _filter(self, user_id: str) -> BloomFilter:
+        """Filtre de l'utilisateur (fichier mappé; reconstruit depuis SQLite s'il manque)."""
+        bloom = self._filters.get(user_id)
+        if bloom is not None:
+            return bloom
+
+        db = self._connect()
+        path = self._bloom_path(user_id)
+        size = BloomFilter.size_for(self.capacity, self.error_rate)
+        rebuild = not os.path.exists(path) or os.path.getsize(path) != size
+
+        if rebuild:
+            with open(path, 'wb') as f:
+                f.truncate(size)
+        with open(path, 'r+b') as f:
+            buffer = mmap.mmap(f.fileno(), size)
+        bloom = BloomFilter(self.capacity, self.error_rate, buffer)
+
+        if rebuild:
+            for (digest,) in db.execute('SELECT digest FROM seen WHERE user_id = ?', (user_id,)):
+                bloom.add(digest)
+            buffer.flush()
+
+        self._maps[user_id] = buffer
+        self._filters[user_id] = bloom
+        return bloom
+
+    def filter_known(self, user_id: str, links: Iterable[str]) -> Set[str]:
+        """Liens déjà vus par l'utilisateur (exact: les faux positifs du filtre sont écartés)."""
+        links = [link for link in links if link]
+        if not self.enabled or not links:
+            return set()
+
+        with self._lock:
+            bloom = self._filter(user_id)
+            maybe = {}
+            for link in links:
+                digest = url_digest(link)
+                if digest in bloom:
+                    maybe[digest] = link
+
+            known = set()
+            digests = list(maybe)
+            for start in range(0, len(digests), _SQL_BATCH):
+                batch = digests[start:start + _SQL_BATCH]
+                rows = self._db.execute(
+                    f"SELECT digest FROM seen WHERE user_id = ? AND digest IN ({','.join('?' * len(batch))})",
+                    [user_id, *batch]
+                )
+                known.update(maybe[digest] for (digest,) in rows)
+
+            self._stats['checked'] += len(links)
+            self._stats['bloom_negative'] += len(links) - len(maybe)
+            self._stats['known'] += len(known)
+        return known
+
+    def drop_known(self, user_id: str, listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Annonces dont le lien n'a pas encore été vu par l'utilisateur."""
+        known = self.filter_known(user_id, [l.get('lien') for l in listings])
+        if not known:
+            return listings
+        return [l for l in listings if l.get('lien') not in known]
+
+    def add(self, user_id: str, links: Iterable[str]) -> int:
+        """Enregistre des liens vus (après sauvegarde des annonces). Retourne le nombre de liens."""
+        digests = [url_digest(link) for link in dict.fromkeys(links) if link]
+        if not self.enabled or not digests:
+            return 0
+
+        with self._lock:
+            bloom = self._filter(user_id)
+            with self._db:
+                self._db.executemany(
+                    'INSERT OR IGNORE INTO seen (user_id, digest) VALUES (?, ?)',
+                    [(user_id, digest) for digest in digests]
+                )
+            for digest in digests:
+                bloom.add(digest)
+            self._maps[user_id].flush()
+            self._stats['added'] += len(digests)
+        return len(digests)
+
+    def forget(self, user_id: str):
+        """Oublie les liens d'un utilisateur (filtre reconstruit vide)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute('DELETE FROM seen WHERE user_id = ?', (user_id,))
+            self._filters.pop(user_id, None)
+            buffer = self._maps.pop(user_id, None)
+            if buffer is not None:
+                buffer.close()
+            path = self._bloom_path(user_id)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def count(self, user_id: str) -> int:
+        """Nombre de liens enregistrés pour l'utilisateur."""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM seen WHERE user_id = ?', (user_id,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            for buffer in self._maps.values():
+                buffer.close()
+            self._maps.clear()
+            self._filters.clear()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Liens vérifiés, écartés par le filtre seul, déjà vus, ajoutés."""
+        with self._lock:
+            return dict(self._stats)
+
+
+# Instance globale
+seen_index = SeenIndex()
+atexit.register(seen_index.close)
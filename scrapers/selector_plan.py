@@ -0,0 +1,221 @@
+"""
+Plan de sélecteurs d'annonces mémorisé par site.
+
+Chaque scraper déclare sa cascade de sélecteurs (par priorité), au format
+de soup.find_all (tag + attributs, regex précompilées). Le plan essaie
+d'abord le sélecteur gagnant du dernier passage; sinon toute la cascade
+est évaluée en un seul parcours de l'arbre, et le premier sélecteur (par
+priorité) qui a des résultats est retenu.
+
+Les sélecteurs qui matchent sont comptés (santé des parsers): une
+cascade qui bascule vers le fallback signale un changement de balisage.
+Avec PARSE_BACKEND=process, le parsing a lieu dans les workers: chaque
+worker renvoie les compteurs de sa page (stats_delta), fusionnés dans le
+plan du processus principal (merge) et reçoit le gagnant connu.
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Pattern, Union
+
+AttrValue = Union[str, bool, Pattern]
+
+
+@dataclass
+class AdSelector:
+    """Un sélecteur de la cascade: tag + attributs (+ condition optionnelle)."""
+
+    tag: Optional[str]  # None = tout tag
+    attrs: Dict[str, AttrValue] = field(default_factory=dict)
+    require: Optional[Callable[[Any], Any]] = None  # ex: lambda ad: ad.find('a', href=True)
+    label: str = ''
+
+    def __post_init__(self):
+        if not self.label:
+            parts = [f"{k}~{getattr(v, 'pattern', v)}" for k, v in self.attrs.items()]
+            self.label = (self.tag or '*') + (f"[{','.join(parts)}]" if parts else '')
+
+    def matches(self, tag) -> bool:
+        """Même sémantique que find_all (classes testées une à une puis jointes)."""
+        if self.tag is not None and tag.name != self.tag:
+            return False
+        for key, expected in self.attrs.items():
+            value = tag.get(key)
+            if value is None:
+                return False
+            if expected is True:
+                continue
+            candidates = value + [' '.join(value)] if isinstance(value, list) else [value]
+            if isinstance(expected, str):
+                if expected not in candidates:
+                    return False
+            elif not any(expected.search(c) for c in candidates):
+                return False
+        return True
+
+    def find_all(self, soup) -> list:
+        found = soup.find_all(self.tag, self.attrs)
+        if self.require is not None:
+            found = [el for el in found if self.require(el)]
+        return found
+
+
+class SelectorPlan:
+    """
+    Cascade de sélecteurs d'un site avec mémorisation du gagnant.
+
+    Usage:
+        plan = SelectorPlan('pap', [
+            AdSelector('div', {'class': re.compile(r'search-list-item', re.I)}),
+            AdSelector('article', {'class': re.compile(r'annonce', re.I)}),
+        ], fallback=lambda soup: soup.find_all('a', href=...))
+        ads = plan.find(soup)
+    """
+
+    def __init__(
+        self,
+        site_key: str,
+        selectors: List[AdSelector],
+        fallback: Callable[[Any], list] = None,
+        min_count: int = 1
+    ):
+        self.site_key = site_key
+        self.selectors = selectors
+        self.fallback = fallback
+        self.min_count = min_count
+        self._winner: Optional[int] = None
+
+        # Sélecteurs indexés par tag (un seul test de nom par élément)
+        self._by_tag: Dict[Optional[str], List[tuple]] = {}
+        for i, selector in enumerate(selectors):
+            self._by_tag.setdefault(selector.tag, []).append((i, selector))
+        wildcard = self._by_tag.get(None, [])
+        for tag in self._by_tag:
+            if tag is not None:
+                self._by_tag[tag] = sorted(self._by_tag[tag] + wildcard, key=lambda item: item[0])
+
+        self._lock = threading.Lock()
+        self._hits: Counter = Counter()
+        self._stats = dict.fromkeys(_COUNTERS, 0)
+
+        _registry[site_key] = self
+
+    def find(self, soup, use_fallback: bool = True) -> list:
+        """
+        Annonces d'une page (liste vide si rien ne matche).
+
+        Args:
+            soup: Arbre BeautifulSoup
+            use_fallback: False pour un arbre partiel (la page entière suivra)
+        """
+        winner = self._winner
+        if winner is not None:
+            ads = self.selectors[winner].find_all(soup)
+            if len(ads) >= self.min_count:
+                self._record(self.selectors[winner].label, memo=True)
+                return ads
+
+        index, ads = self._run_cascade(soup)
+        if index is not None:
+            self._winner = index
+            self._record(self.selectors[index].label)
+            return ads
+
+        if not use_fallback:
+            return []
+
+        ads = self.fallback(soup) if self.fallback else []
+        if len(ads) >= self.min_count:
+            self._record('fallback')
+            return ads
+
+        self._record('empty')
+        return []
+
+    def _run_cascade(self, soup):
+        """Tous les sélecteurs en un seul parcours; le premier (priorité) qui matche gagne."""
+        buckets: List[list] = [[] for _ in self.selectors]
+        by_tag = self._by_tag
+        wildcard = by_tag.get(None, ())
+
+        for element in soup.descendants:
+            name = getattr(element, 'name', None)
+            if name is None:
+                continue  # Texte / commentaire
+            for i, selector in by_tag.get(name, wildcard):
+                if selector.matches(element):
+                    buckets[i].append(element)
+
+        for i, selector in enumerate(self.selectors):
+            ads = buckets[i]
+            if selector.require is not None:
+                ads = [el for el in ads if selector.require(el)]
+            if len(ads) >= self.min_count:
+                return i, ads
+        return None, []
+
+    def _record(self, hit: str, memo: bool = False):
+        with self._lock:
+            self._stats['pages'] += 1
+            if memo:
+                self._stats['memo_hits'] += 1
+            if hit in ('fallback', 'empty'):
+                self._stats[hit] += 1
+            else:
+                self._hits[hit] += 1
+
+    @property
+    def winner(self) -> Optional[str]:
+        """Label du sélecteur gagnant mémorisé (None si aucun)."""
+        winner = self._winner
+        return self.selectors[winner].label if winner is not None else None
+
+    def set_winner(self, label: Optional[str]):
+        """Mémorise un gagnant connu par son label (trouvé dans un autre processus)."""
+        for i, selector in enumerate(self.selectors):
+            if selector.label == label:
+                self._winner = i
+                return
+
+    def merge(self, delta: Dict[str, Any]):
+        """Ajoute les compteurs d'un parsing fait dans un worker (voir stats_delta)."""
+        with self._lock:
+            for key in _COUNTERS:
+                self._stats[key] += delta.get(key, 0)
+            self._hits.update(delta.get('hits', {}))
+        if delta.get('winner'):
+            self.set_winner(delta['winner'])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Sélecteur gagnant et nombre de pages par sélecteur."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['hits'] = dict(self._hits)
+        stats['winner'] = self.winner
+        return stats
+
+
+# Compteurs de pages d'un plan (hors sélecteurs)
+_COUNTERS = ('pages', 'memo_hits', 'fallback', 'empty')
+
+
+def stats_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Compteurs ajoutés entre deux get_stats() d'un plan, avec le gagnant final."""
+    delta = {key: after[key] - before[key] for key in _COUNTERS}
+    delta['hits'] = {
+        label: count - before['hits'].get(label, 0)
+        for label, count in after['hits'].items()
+        if count > before['hits'].get(label, 0)
+    }
+    delta['winner'] = after['winner']
+    return delta
+
+
+# Plans déclarés (un par site)
+_registry: Dict[str, SelectorPlan] = {}
+
+
+def get_selector_stats() -> Dict[str, Dict[str, Any]]:
+    """Santé des parsers: statistiques de sélecteurs de tous les sites."""
+    return {site_key: plan.get_stats() for site_key, plan in _registry.items()}
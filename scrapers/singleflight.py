@@ -0,0 +1,91 @@
+"""
+Coalescence des recherches identiques en cours (single-flight).
+
+Quand plusieurs membres de l'équipe scrapent la même ville sur les mêmes
+sites en même temps, un seul fetch est lancé: les jobs suivants attendent
+son résultat et en reçoivent chacun une copie.
+"""
+
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """Fetch en cours partagé par plusieurs consommateurs."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.consumers = 1
+
+
+class SingleFlight:
+    """
+    Exécute une seule fois les appels identiques simultanés.
+
+    Usage:
+        flight = SingleFlight()
+        result, shared = flight.do(('pap', 'paris', 10), lambda: scraper.scrape(...))
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Exécute fn, ou attend le résultat d'un appel identique déjà en cours.
+
+        Args:
+            key: Clé de coalescence
+            fn: Fonction à exécuter (sans argument)
+
+        Returns:
+            Tuple (result, shared)
+            - shared: True si le résultat vient du fetch d'un autre job
+              (dans ce cas result est une copie indépendante)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.consumers += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result), True
+
+        result = None
+        try:
+            result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                consumers = call.consumers
+            if consumers > 1 and call.error is None:
+                # Snapshot figé avant que le leader ne modifie ses annonces
+                call.result = copy.deepcopy(result)
+                print(f"  🔗 Fetch partagé entre {consumers} jobs: {key}")
+            call.done.set()
+
+        return result, False
+
+    def in_flight(self) -> int:
+        """Nombre de fetchs en cours."""
+        with self._lock:
+            return len(self._calls)
+
+
+# Instance globale (recherches par site)
+inflight = SingleFlight()
@@ -4,11 +4,37 @@ Basé sur strat-scraping-anti-blocage-v3-sites.md
 """
 
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+import threading
 import time
 import random
 
 
+# Domaines de tracking / publicité jamais utiles au scraping
+TRACKER_DOMAINS: Tuple[str, ...] = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+    'googlesyndication.com', 'adservice.google.com', 'facebook.net',
+    'hotjar.com', 'criteo.com', 'criteo.net', 'taboola.com', 'outbrain.com',
+    'xiti.com', 'at-internet.com', 'smartadserver.com', 'amazon-adsystem.com',
+    'scorecardresearch.com', 'didomi.io', 'sentry.io', 'newrelic.com',
+)
+
+
+@dataclass
+class LoadPolicy:
+    """Stratégie de chargement Playwright d'un site."""
+
+    # 'domcontentloaded' (+ ready_selector) ou 'networkidle'
+    wait_until: str = 'domcontentloaded'
+    ready_selector: str = ''  # Sélecteur CSS attendu avant lecture du DOM
+    timeout_ms: int = 20000
+    ready_timeout_ms: int = 10000
+
+    # Blocage des requêtes (types Playwright: image, media, font, stylesheet...)
+    block_resource_types: Tuple[str, ...] = ('image', 'media', 'font')
+    block_domains: Tuple[str, ...] = TRACKER_DOMAINS
+
+
 @dataclass
 class SiteProfile:
     """Profil de configuration pour un site de scraping."""
@@ -29,10 +55,12 @@ class SiteProfile:
     # Pagination
     max_pages: int = 5
     stop_early_if_unchanged: bool = True
+    known_page_ratio: float = 0.8  # Arrêt si >= 80% des annonces d'une page sont connues
 
     # Refresh intervals (en minutes)
     list_refresh_min: int = 15
     detail_refresh_hours: int = 72
+    fetch_details: bool = True  # Pages de détail récupérées (voir detail_fetcher.py)
 
     # Retry/Backoff (en secondes)
     backoff_sequence: List[int] = None  # [10, 30, 60, 120]
@@ -44,9 +72,14 @@ class SiteProfile:
     # Validation localisation
     strict_location: bool = False  # Si True, rejette les annonces sans CP
 
+    # Chargement Playwright (attente + blocage des ressources)
+    load_policy: LoadPolicy = None
+
     def __post_init__(self):
         if self.backoff_sequence is None:
             self.backoff_sequence = [10, 30, 60, 120]
+        if self.load_policy is None:
+            self.load_policy = LoadPolicy()
 
 
 # ============================================================================
@@ -69,7 +102,12 @@ SITE_PROFILES = {
         backoff_sequence=[30, 60, 120, 240, 300],  # Plus agressif
         circuit_breaker_fails=5,  # Réduit de 10 à 5
         circuit_breaker_pause=30,  # Augmenté de 20 à 30
-        strict_location=True  # Activé pour filtrer les fausses localisations
+        strict_location=True,  # Activé pour filtrer les fausses localisations
+        load_policy=LoadPolicy(
+            ready_selector='div[class*="search-list-item"], div[class*="item-listing"], article[class*="annonce"], li[class*="annonce"]',
+            timeout_ms=25000,
+            block_resource_types=('image', 'media', 'font', 'stylesheet')
+        )
     ),
 
     # ParuVendu - Site classique
@@ -86,7 +124,11 @@ SITE_PROFILES = {
         backoff_sequence=[30, 60, 120, 240],
         circuit_breaker_fails=5,
         circuit_breaker_pause=30,
-        strict_location=True
+        strict_location=True,
+        load_policy=LoadPolicy(
+            ready_selector='div[class*="annonce"], article[class*="annonce"], li[class*="annonce"]',
+            block_resource_types=('image', 'media', 'font', 'stylesheet')
+        )
     ),
 
     # EntreParticuliers - Site classique
@@ -103,7 +145,11 @@ SITE_PROFILES = {
         backoff_sequence=[30, 60, 120, 240],
         circuit_breaker_fails=5,
         circuit_breaker_pause=30,
-        strict_location=True
+        strict_location=True,
+        load_policy=LoadPolicy(
+            ready_selector='article[class*="annonce"], div[class*="listing-item"], div[class*="property-card"], li[class*="annonce"]',
+            block_resource_types=('image', 'media', 'font', 'stylesheet')
+        )
     ),
 
     # Leboncoin - Site très surveillé, hybrid
@@ -121,7 +167,14 @@ SITE_PROFILES = {
         backoff_sequence=[60, 120, 240, 300, 600],  # Backoff très long
         circuit_breaker_fails=3,  # Très sensible
         circuit_breaker_pause=60,  # 1 heure de pause
-        strict_location=True
+        strict_location=True,
+        load_policy=LoadPolicy(
+            # CSS conservé: la protection anti-bot vérifie le rendu
+            ready_selector='[data-qa-id="aditem_container"], article',
+            timeout_ms=35000,
+            ready_timeout_ms=12000,
+            block_resource_types=('image', 'media', 'font')
+        )
     ),
 
     # Figaro Immo - DÉSACTIVÉ (scrape articles au lieu d'annonces)
@@ -139,7 +192,11 @@ SITE_PROFILES = {
         backoff_sequence=[30, 60, 120, 240, 300],
         circuit_breaker_fails=4,
         circuit_breaker_pause=45,
-        strict_location=True
+        strict_location=True,
+        load_policy=LoadPolicy(
+            ready_selector='article, div[class*="classified-card"], div[class*="annonce-item"]',
+            block_resource_types=('image', 'media', 'font', 'stylesheet')
+        )
     ),
 
     # MoteurImmo - Agrégateur
@@ -156,7 +213,11 @@ SITE_PROFILES = {
         backoff_sequence=[30, 60, 120, 240, 300],
         circuit_breaker_fails=4,
         circuit_breaker_pause=45,
-        strict_location=True
+        strict_location=True,
+        load_policy=LoadPolicy(
+            ready_selector='div[class*="annonce"], div[class*="result-item"], article[class*="listing"], li[class*="annonce"]',
+            block_resource_types=('image', 'media', 'font', 'stylesheet')
+        )
     ),
 
     # Facebook Marketplace - DÉSACTIVÉ (trop hostile)
@@ -171,10 +232,14 @@ SITE_PROFILES = {
         max_pages=1,
         list_refresh_min=120,
         detail_refresh_hours=168,
+        fetch_details=False,  # Pages d'annonce réservées aux comptes connectés
         backoff_sequence=[120, 300, 600, 1800],
         circuit_breaker_fails=2,
         circuit_breaker_pause=120,
-        strict_location=True
+        strict_location=True,
+        load_policy=LoadPolicy(
+            block_resource_types=('image', 'media', 'font')
+        )
     ),
 }
 
@@ -195,11 +260,20 @@ def get_all_enabled_sites() -> List[str]:
     return [key for key, profile in SITE_PROFILES.items() if profile.enabled]
 
 
+def get_site_key(site_name: str) -> Optional[str]:
+    """Clé d'un site depuis son nom (site_source des annonces), None si inconnu."""
+    for key, profile in SITE_PROFILES.items():
+        if profile.name == site_name:
+            return key
+    return None
+
+
 class RateLimiter:
     """Rate limiter avec jitter pour un site."""
 
     def __init__(self, profile: SiteProfile):
         self.profile = profile
+        self._lock = threading.Lock()
         self.last_request_time = 0
         self.request_count = 0
         self.fail_count = 0
@@ -210,38 +284,56 @@ class RateLimiter:
     def wait(self):
         """Attend le temps nécessaire avant la prochaine requête."""
         # Vérifier circuit breaker
+        self._close_expired()
         if self.circuit_open:
-            if time.time() < self.circuit_open_until:
-                remaining = int(self.circuit_open_until - time.time())
-                print(f"  ⚡ Circuit ouvert, pause {remaining}s restantes")
-                time.sleep(min(remaining, 60))  # Attendre max 60s à la fois
-                return
-            else:
-                print(f"  ✅ Circuit fermé, reprise du scraping")
-                self.circuit_open = False
-                self.fail_count = 0
+            remaining = int(self.circuit_open_until - time.time())
+            print(f"  ⚡ Circuit ouvert, pause {remaining}s restantes")
+            time.sleep(min(remaining, 60))  # Attendre max 60s à la fois
+            return
+
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
 
+    def reserve(self, min_delay: float = 0.0) -> float:
+        """
+        Réserve le prochain créneau de requête du site, sans attendre.
+
+        Le créneau respecte l'intervalle du profil (rps + jitter) depuis la
+        dernière requête réservée, listes et pages de détail confondues, et
+        n'arrive pas avant min_delay (délai humain du scraper).
+
+        Returns:
+            Attente avant la requête (en secondes), à dormir par l'appelant
+        """
         # Calculer le délai avec jitter
-        min_delay = 1.0 / self.profile.rps
+        min_interval = 1.0 / self.profile.rps
         jitter_ms = random.randint(*self.profile.jitter_range)
-        jitter_s = jitter_ms / 1000.0
-        total_delay = min_delay + jitter_s
+        total_delay = min_interval + jitter_ms / 1000.0
 
-        # Attendre depuis la dernière requête
-        elapsed = time.time() - self.last_request_time
-        if elapsed < total_delay:
-            sleep_time = total_delay - elapsed
-            time.sleep(sleep_time)
-
-        self.last_request_time = time.time()
+        # Réserver le créneau (limiteur partagé entre threads)
+        with self._lock:
+            now = time.time()
+            slot = max(now + min_delay, self.last_request_time + total_delay)
+            self.last_request_time = slot
+        return slot - now
 
     def record_success(self):
         """Enregistre une requête réussie."""
         self.fail_count = 0
         self.current_backoff_index = 0
 
+    def _close_expired(self):
+        """Ferme le circuit si sa pause est écoulée (compteur d'échecs remis à zéro)."""
+        if self.circuit_open and time.time() >= self.circuit_open_until:
+            print(f"  ✅ Circuit fermé, reprise du scraping")
+            self.circuit_open = False
+            self.fail_count = 0
+
     def record_failure(self, status_code: int = None):
         """Enregistre un échec et applique le backoff si nécessaire."""
+        # Pause écoulée: un nouvel échec ne rouvre pas aussitôt le circuit
+        self._close_expired()
         self.fail_count += 1
 
         # Vérifier circuit breaker
@@ -263,7 +355,29 @@ class RateLimiter:
 
     def should_stop(self) -> bool:
         """Vérifie si on doit arrêter (circuit ouvert trop longtemps)."""
-        return self.circuit_open and (time.time() < self.circuit_open_until)
+        self._close_expired()
+        return self.circuit_open
+
+
+# Limiteurs partagés: un budget de requêtes par site (listes et pages de détail).
+# L'état est global au processus: tous les jobs (tous utilisateurs) et le
+# thread des pages de détail d'un même site partagent le rythme des requêtes
+# (BaseScraper._pace / _wait réservent leurs créneaux via reserve()),
+# les échecs et le circuit breaker. Un circuit ouvert par un job (403 répétés)
+# suspend le site pour tous jusqu'à la fin de circuit_breaker_pause; les jobs
+# suivants reprennent ensuite normalement. Chaque processus (worker gunicorn)
+# a ses propres limiteurs.
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(site_key: str) -> RateLimiter:
+    """Rate limiter (et circuit breaker) partagé d'un site, global au processus (voir ci-dessus)."""
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(site_key)
+        if limiter is None:
+            limiter = _rate_limiters[site_key] = RateLimiter(get_profile(site_key))
+        return limiter
 
 
 class SiteManager:
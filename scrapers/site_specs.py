@@ -0,0 +1,207 @@
+"""
+Description déclarative des sites de petites annonces HTML.
+
+Chaque site est décrit par une SiteSpec: URLs de recherche, pagination,
+cascade de conteneurs d'annonces et sélecteurs des champs. La spec est
+compilée une fois en plan d'extraction (voir extraction_plan.py) et
+exploitée par le scraper générique (voir spec_scraper.py).
+
+Ajouter un site = une entrée SITE_SPECS + un SiteProfile (site_config.py)
++ une sous-classe de SpecScraper qui ne déclare que spec_key.
+
+Comportement commun à tous les sites décrits ici, différent des anciens
+scrapers écrits à la main:
+- Playwright comme HTTP passent par la pagination commune: les annonces
+  sont enrichies (_enrich_listing) et filtrées (_is_rejected: prix,
+  localisation, exclusions) dans les deux modes. paruvendu, moteurimmo et
+  entreparticuliers ne le faisaient qu'en HTTP: en Playwright, leurs
+  annonces hors zone ou sans prix ne remontent plus.
+- Les photos relatives (/img/...) sont préfixées par base_url au lieu
+  d'être ignorées (pap) ou gardées relatives (figaro).
+- Un sélecteur '.title' cherche une classe (l'ancien find('title') ne
+  trouvait rien) et un texte de prix n'est lu que sur le montant trouvé.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional, Pattern, Tuple, Union
+
+from .selector_plan import AdSelector
+
+# Sélecteur de champ: 'h2', '.title', 'span.price' ou AdSelector (regex)
+FieldSelector = Union[str, AdSelector]
+
+
+@dataclass
+class SiteSpec:
+    """Description d'un site: URLs, annonces et champs à extraire."""
+
+    # Identification
+    site_name: str  # site_source des annonces
+    label: str  # Titre par défaut: "Annonce <label>"
+    base_url: str  # Préfixe des liens et photos relatifs
+
+    # URLs de recherche, essayées dans l'ordre. Champs: {slug}, {code_postal},
+    # {departement}, {ville}; une URL dont un champ est vide est ignorée
+    search_urls: Tuple[str, ...] = ()
+    # Page N en HTTP: {url}, {sep} ('?' ou '&'), {page}. None = une seule page
+    page_url: Optional[str] = '{url}{sep}page={page}'
+    page_one_plain: bool = True  # Page 1 = URL de recherche telle quelle
+
+    # Annonces: cascade de conteneurs (par priorité), sélecteur de secours
+    containers: Tuple[AdSelector, ...] = ()
+    fallback: Optional[Callable] = None
+    min_count: int = 1
+    max_ads: int = 15  # Annonces retenues par page
+    strainer: Optional[Pattern] = None  # Classe de la zone des annonces (parsing restreint)
+    next_selector: str = 'a.next, a[rel="next"]'  # Page suivante (Playwright)
+
+    # Champs: sélecteurs essayés par priorité (premier élément trouvé)
+    title: Tuple[FieldSelector, ...] = ('h2', 'h3')
+    title_from_link: bool = False  # Titre de secours: texte du lien (sinon de l'annonce)
+    title_max: int = 80
+    price: Tuple[FieldSelector, ...] = ()  # Sinon premier texte "… €", puis prix du texte
+    location: Tuple[FieldSelector, ...] = ()  # Si pas de "Ville (12345)" dans le texte
+    location_in_title: bool = False  # Chercher aussi la localisation dans le titre
+    photo_attrs: Tuple[str, ...] = ('src', 'data-src', 'data-lazy-src')
+
+    # Récupération
+    stealth_session: bool = True  # Headers Chrome complets + warm-up (sinon session simple)
+    stealth_browser: bool = False  # Contexte Playwright furtif (UA / viewport aléatoires)
+    timeout: int = 20
+
+
+def _paruvendu_fallback(soup) -> list:
+    links = soup.find_all('a', href=re.compile(r'/immobilier/vente/'))
+    return [l for l in links if 'annonce' in str(l.get('class', []))] or links[:20]
+
+
+# ============================================================================
+# SPECS PAR SITE
+# ============================================================================
+
+SITE_SPECS = {
+    # PAP - 100% particuliers
+    'pap': SiteSpec(
+        site_name='pap.fr',
+        label='PAP',
+        base_url='https://www.pap.fr',
+        search_urls=(
+            'https://www.pap.fr/annonce/vente-immobilier-{slug}',
+            'https://www.pap.fr/annonce/vente-immobilier-{code_postal}',
+            'https://www.pap.fr/annonce/vente-immobilier-departement-{departement}',
+            'https://www.pap.fr/annonces/vente-{slug}',
+            'https://www.pap.fr/annonce/vente-appartement-maison-{slug}',
+        ),
+        page_url='{url}-page-{page}',
+        containers=(
+            AdSelector('div', {'class': re.compile(r'search-list-item|item-listing|annonce-row', re.I)}),
+            AdSelector('article', {'class': re.compile(r'annonce', re.I)}),
+            AdSelector('div', {'class': 'annonce'}),
+            AdSelector('li', {'class': re.compile(r'annonce|listing', re.I)}),
+        ),
+        fallback=lambda soup: soup.find_all('a', href=re.compile(r'/annonces/[a-z]+-[0-9]+')),
+        strainer=re.compile(r'search-list-item|item-listing|annonce|listing', re.I),
+        next_selector='a.next, a[rel="next"], .pagination a:last-child',
+        title=('h2', 'h3', '.item-title', '.title', '.annonce-titre'),
+        price=('.item-price', '.price', '.prix', '.montant'),
+        location=('.item-location', '.location', '.ville', '.lieu'),
+        stealth_browser=True,
+    ),
+
+    # ParuVendu - pa=1: particuliers uniquement
+    'paruvendu': SiteSpec(
+        site_name='paruvendu.fr',
+        label='ParuVendu',
+        base_url='https://www.paruvendu.fr',
+        search_urls=(
+            'https://www.paruvendu.fr/immobilier/vente/{code_postal}/?pa=1',
+            'https://www.paruvendu.fr/immobilier/vente/{slug}/?pa=1',
+        ),
+        page_url='{url}{sep}p={page}',
+        page_one_plain=False,
+        containers=(
+            AdSelector('div', {'class': re.compile(r'annonce|ergov3-annonce', re.I)}),
+            AdSelector('article', {'class': re.compile(r'annonce', re.I)}),
+            AdSelector('li', {'class': re.compile(r'annonce', re.I)}),
+        ),
+        fallback=_paruvendu_fallback,
+        strainer=re.compile(r'annonce', re.I),
+        title=('h2', 'h3', AdSelector(None, {'class': re.compile(r'titre', re.I)})),
+        price=(AdSelector(None, {'class': re.compile(r'prix|price', re.I)}),),
+    ),
+
+    # EntreParticuliers - 100% particuliers
+    'entreparticuliers': SiteSpec(
+        site_name='entreparticuliers.com',
+        label='EntreParticuliers',
+        base_url='https://www.entreparticuliers.com',
+        search_urls=(
+            'https://www.entreparticuliers.com/achat-immobilier/{slug}',
+            'https://www.entreparticuliers.com/achat-immobilier/{code_postal}',
+            'https://www.entreparticuliers.com/achat-immobilier/departement-{departement}',
+        ),
+        containers=(
+            AdSelector('article', {'class': re.compile(r'annonce', re.I)}),
+            AdSelector('div', {'class': re.compile(r'listing-item|annonce|property-card', re.I)}),
+            AdSelector('li', {'class': re.compile(r'annonce', re.I)}),
+        ),
+        fallback=lambda soup: soup.find_all('a', href=re.compile(r'/annonce/')),
+        strainer=re.compile(r'annonce|listing-item|property-card', re.I),
+        next_selector='a.next, a[rel="next"], .pagination-next',
+        title=('h2', 'h3', '.titre', '.title'),
+    ),
+
+    # MoteurImmo - agrégateur, particulier=1 pour filtrer
+    'moteurimmo': SiteSpec(
+        site_name='moteurimmo.fr',
+        label='MoteurImmo',
+        base_url='https://www.moteurimmo.fr',
+        search_urls=(
+            'https://www.moteurimmo.fr/recherche/achat/{code_postal}?particulier=1',
+            'https://www.moteurimmo.fr/recherche/achat/{slug}?particulier=1',
+        ),
+        page_one_plain=False,
+        containers=(
+            AdSelector('div', {'class': re.compile(r'annonce|listing|result-item', re.I)}),
+            AdSelector('article', {'class': re.compile(r'listing|annonce', re.I)}),
+            AdSelector('li', {'class': re.compile(r'annonce|listing', re.I)}),
+        ),
+        fallback=lambda soup: soup.find_all('a', href=re.compile(r'/annonce/')),
+        strainer=re.compile(r'annonce|listing|result-item', re.I),
+        next_selector='a.next, a[rel="next"], a:has-text("Suivant")',
+        title=('h2', 'h3', 'h4'),
+        price=(AdSelector(None, {'class': re.compile(r'prix|price', re.I)}),),
+        stealth_session=False,
+        timeout=15,
+    ),
+
+    # Figaro Immobilier / explorimmo - une page par URL
+    'figaro': SiteSpec(
+        site_name='figaro-immo',
+        label='Figaro',
+        base_url='https://immobilier.lefigaro.fr',
+        search_urls=(
+            'https://immobilier.lefigaro.fr/annonces/immobilier-vente-bien-{slug}.html',
+            'https://immobilier.lefigaro.fr/annonces/immobilier-vente-bien-{code_postal}.html',
+            'https://www.explorimmo.com/resultat/vente/{slug}',
+        ),
+        page_url=None,
+        containers=(
+            AdSelector('article', require=lambda ad: ad.find('a', href=True)),
+            AdSelector('div', {'class': re.compile(r'classified-card|annonce-item|listing-item|card', re.I)}),
+            AdSelector('li', {'class': re.compile(r'annonce', re.I)}),
+        ),
+        min_count=3,
+        max_ads=20,
+        title=('h2', 'h3', 'h4'),
+        title_from_link=True,
+        title_max=100,
+        location_in_title=True,
+    ),
+}
+
+
+def get_spec(site_key: str) -> SiteSpec:
+    """Spec d'un site (KeyError si le site n'est pas déclaratif)."""
+    return SITE_SPECS[site_key]
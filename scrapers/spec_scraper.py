@@ -0,0 +1,201 @@
+"""
+Scraper générique des sites décrits par une SiteSpec (voir site_specs.py).
+
+Récupération (Playwright puis HTTP), pagination en pipeline,
+enrichissement et rejet sont communs; seuls les URLs, conteneurs et
+sélecteurs de champs viennent de la spec du site.
+
+    class ParuvenduScraper(SpecScraper):
+        spec_key = 'paruvendu'
+"""
+
+import random
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from .base import BaseScraper
+from .browser_pool import browser_pool, STEALTH_INIT_SCRIPT
+from .extraction_plan import ExtractionPlan, get_plan
+
+try:
+    from playwright.sync_api import TimeoutError as PlaywrightTimeout
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    PLAYWRIGHT_AVAILABLE = False
+
+# Contexte Playwright furtif (spec.stealth_browser): fingerprint randomisé
+STEALTH_VIEWPORTS = [
+    {'width': 1920, 'height': 1080},
+    {'width': 1366, 'height': 768},
+    {'width': 1536, 'height': 864},
+]
+STEALTH_USER_AGENTS = [
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+]
+
+
+class SpecScraper(BaseScraper):
+    """Scraper piloté par la spec déclarative du site (spec_key)."""
+
+    # Clé du site dans SITE_SPECS (à déclarer par la sous-classe)
+    spec_key: str = ''
+
+    # Plan compilé depuis la spec (renseigné à la déclaration de la sous-classe)
+    plan: Optional[ExtractionPlan] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.spec_key:
+            cls.plan = get_plan(cls.spec_key)
+            cls.ad_plan = cls.plan.ad_plan
+            cls.ad_strainer = cls.plan.strainer
+            cls.next_selector = cls.plan.spec.next_selector
+
+    @property
+    def site_key(self) -> str:
+        return self.spec_key
+
+    @property
+    def site_name(self) -> str:
+        return self.plan.spec.site_name
+
+    def scrape(self, ville: str, rayon: int, max_pages: int = 5) -> List[Dict[str, Any]]:
+        location = self.get_location_info(ville)
+        ville_name = location['ville']
+        code_postal = location['code_postal']
+
+        print(f"🔍 Scraping {self.site_name} pour {ville_name}", end="")
+        if code_postal:
+            print(f" ({code_postal})", end="")
+        print(f" - rayon: {rayon}km")
+
+        listings = []
+
+        # Méthode 1: Playwright
+        if PLAYWRIGHT_AVAILABLE:
+            listings = self._scrape_playwright(location, max_pages)
+
+        # Méthode 2: Requests/BeautifulSoup
+        if not listings and not self._site_unchanged:
+            listings = self._scrape_html(location, max_pages)
+
+        self._print_stats(listings)
+        return listings
+
+    def _scrape_playwright(self, location: dict, max_pages: int) -> List[Dict[str, Any]]:
+        try:
+            if self.plan.spec.stealth_browser:
+                print("  🎭 Mode Playwright (furtif)")
+                options = {
+                    'init_script': STEALTH_INIT_SCRIPT,
+                    'user_agent': random.choice(STEALTH_USER_AGENTS),
+                    'viewport': random.choice(STEALTH_VIEWPORTS),
+                    'timezone_id': 'Europe/Paris',
+                }
+            else:
+                print("  🎭 Mode Playwright")
+                options = {'user_agent': self.user_agent, 'viewport': {'width': 1920, 'height': 1080}}
+
+            return browser_pool.run(
+                lambda context: self._playwright_session(context, location, max_pages),
+                locale='fr-FR',
+                **options
+            )
+
+        except Exception as e:
+            print(f"  ⚠️ Erreur Playwright: {e}")
+            return []
+
+    def _playwright_session(self, context, location: dict, max_pages: int) -> List[Dict[str, Any]]:
+        """Parcourt les pages de résultats dans un contexte du pool"""
+        listings = []
+        page = context.new_page()
+        self._prepare_page(page)
+
+        for url in self._build_urls(location):
+            try:
+                print(f"  🔗 {url[:60]}...")
+
+                def fetch(page_num, url=url):
+                    return self._fetch_browser_page(page, page_num, url, location)
+
+                # WAIT AVANT navigation et avant chaque click, parsing pendant l'attente
+                listings.extend(self._paginate(fetch, location, max_pages))
+
+                if listings or self._site_unchanged:
+                    break
+
+            except PlaywrightTimeout:
+                print(f"    ⏱️ Timeout, essai suivant...")
+                continue
+            except Exception as e:
+                print(f"    ⚠️ Erreur: {str(e)[:40]}")
+                continue
+
+        return listings
+
+    def _create_session(self) -> requests.Session:
+        """Session HTTP du site: headers Chrome complets + warm-up, ou session simple."""
+        if self.plan.spec.stealth_session:
+            session = self._create_session_with_headers()
+            self._warm_session(session)
+            return session
+
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': self.user_agent,
+            'Accept': 'text/html,application/xhtml+xml',
+            'Accept-Language': 'fr-FR,fr;q=0.9',
+        })
+        return session
+
+    def detail_session(self) -> requests.Session:
+        """Session des pages de détail: celle des listes du site."""
+        return self._create_session()
+
+    def _scrape_html(self, location: dict, max_pages: int) -> List[Dict[str, Any]]:
+        listings = []
+        session = self._create_session()
+
+        for base_url in self._build_urls(location):
+            def fetch(page_num, base_url=base_url):
+                url = self.plan.page_url(base_url, page_num)
+                if url is None:
+                    return None
+                print(f"  📄 Page {page_num}: {url[:60]}...")
+
+                # Mettre à jour le Referer pour navigation interne
+                if page_num > 1:
+                    session.headers['Referer'] = base_url
+                    session.headers['Sec-Fetch-Site'] = 'same-origin'
+
+                return self._request_page(session, url, location, timeout=self.plan.spec.timeout)
+
+            # WAIT AVANT chaque requête, parsing pendant l'attente suivante
+            listings.extend(self._paginate(fetch, location, max_pages))
+
+            if listings or self._site_unchanged:
+                break
+
+        return listings
+
+    def _parse_listing_page(self, content, location: dict) -> List[Dict[str, Any]]:
+        """Extrait les annonces (brutes) d'une page de résultats"""
+        soup, ads = self._parse_ads(content)
+        page_listings = [l for l in (self._extract_listing(ad, location) for ad in ads[:self.plan.spec.max_ads]) if l]
+        soup.decompose()
+        return page_listings
+
+    def _build_urls(self, location: dict) -> List[str]:
+        """URLs de recherche du site (modèles de la spec)"""
+        return self.plan.build_urls(location)
+
+    def _extract_listing(self, ad, location: dict) -> Optional[Dict[str, Any]]:
+        """Extrait une annonce via le plan compilé"""
+        try:
+            return self.plan.extract(ad, location)
+        except Exception:
+            return None
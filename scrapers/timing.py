@@ -106,6 +106,20 @@ class HumanTimer:
         Returns:
             Durée d'attente effectuée (en secondes)
         """
+        delay = self.next_delay()
+        time.sleep(delay)
+        return delay
+
+    def next_delay(self) -> float:
+        """
+        Tire le délai avant la prochaine requête, sans attendre.
+
+        Permet d'utiliser le délai (parsing de la page précédente) avant
+        de dormir le reste, voir BaseScraper._paginate.
+
+        Returns:
+            Délai à respecter avant la requête (en secondes)
+        """
         p = self.profile
         roll = random.random()
 
@@ -143,7 +157,6 @@ class HumanTimer:
         self._page_count += 1
         self._last_request_time = time.time()
 
-        time.sleep(delay)
         return delay
 
     def wait_after_error(self, error_code: int, attempt: int = 1) -> float:
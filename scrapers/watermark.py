@@ -0,0 +1,97 @@
+"""
+Watermark des annonces déjà vues, par recherche et par site.
+
+Les recherches sont triées par date (plus récentes d'abord) : dès qu'une page
+ne contient presque plus que des annonces connues, les pages suivantes sont
+forcément connues aussi et la pagination peut s'arrêter.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def page_fingerprint(links: List[str]) -> str:
+    """Empreinte d'une page de résultats (indépendante de l'ordre des annonces)."""
+    joined = '\n'.join(sorted(set(links)))
+    return hashlib.md5(joined.encode()).hexdigest()
+
+
+class SiteWatermark:
+    """
+    Annonces vues pour un couple (recherche, site).
+
+    Garde les N dernières URLs vues (LRU) et l'empreinte de la page 1
+    du dernier passage.
+    """
+
+    def __init__(self, max_urls: int = 2000):
+        self.max_urls = max_urls
+        self.first_page_fingerprint: Optional[str] = None
+        self.updated_at: float = 0
+        self._urls: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def known_ratio(self, links: List[str]) -> float:
+        """Proportion des liens d'une page déjà vus (0.0 à 1.0)."""
+        if not links:
+            return 0.0
+        with self._lock:
+            known = sum(1 for link in links if link in self._urls)
+        return known / len(links)
+
+    def record(self, links: Iterable[str], first_page_fingerprint: Optional[str] = None):
+        """Enregistre les liens vus lors d'un passage réussi."""
+        now = time.time()
+        with self._lock:
+            for link in links:
+                if not link:
+                    continue
+                self._urls[link] = now
+                self._urls.move_to_end(link)
+
+            while len(self._urls) > self.max_urls:
+                self._urls.popitem(last=False)
+
+            if first_page_fingerprint:
+                self.first_page_fingerprint = first_page_fingerprint
+            self.updated_at = now
+
+
+class WatermarkStore:
+    """Registre en mémoire des watermarks (partagé par tous les jobs)."""
+
+    def __init__(self):
+        self._watermarks: Dict[Tuple[str, str], SiteWatermark] = {}
+        self._lock = threading.Lock()
+
+    def get(self, scope: str, site_key: str) -> SiteWatermark:
+        """Récupère (ou crée) le watermark d'une recherche pour un site."""
+        key = (scope, site_key)
+        with self._lock:
+            if key not in self._watermarks:
+                self._watermarks[key] = SiteWatermark()
+            return self._watermarks[key]
+
+    def reset(self, scope: str = None):
+        """Oublie les watermarks (d'une recherche, ou tous)."""
+        with self._lock:
+            if scope is None:
+                self._watermarks.clear()
+            else:
+                for key in [k for k in self._watermarks if k[0] == scope]:
+                    del self._watermarks[key]
+
+
+def make_scope(user_id: str, ville: str, rayon: int) -> str:
+    """Clé de recherche: un watermark par utilisateur, ville et rayon."""
+    return f"{user_id}:{ville.strip().lower()}:{rayon}"
+
+
+# Instance globale
+watermarks = WatermarkStore()
@@ -7,6 +7,19 @@ Lance un test rapide sur chaque scraper pour vérifier le bon fonctionnement.
 import sys
 import time
 
+
+def make_listing(n: int = 1, site: str = 'pap.fr', **fields) -> dict:
+    """Annonce de test au format des scrapers; fields complète ou remplace les champs."""
+    listing = {
+        'titre': f'Maison {n}', 'date_publication': '2026-10-01', 'prix': 200000 + n,
+        'localisation': 'Lyon (69003)', 'lien': f'https://www.{site}/annonces/r{n}',
+        'site_source': site, 'photos': [], 'telephone': None, 'surface': None, 'pieces': None,
+        'description': '',
+    }
+    listing.update(fields)
+    return listing
+
+
 def test_imports():
     """Teste que tous les imports fonctionnent."""
     print("=" * 60)
@@ -178,6 +191,1724 @@ def test_scraper_init():
     return all_ok
 
 
+def test_parsing():
+    """Teste le parsing lxml restreint (mêmes annonces que html.parser)."""
+    print("\n" + "=" * 60)
+    print("TEST PARSING HTML")
+    print("=" * 60)
+
+    from bs4 import BeautifulSoup
+    from scrapers.pap import PapScraper
+
+    html = (
+        '<html><body><nav><a href="/rubrique">Rubrique</a></nav>'
+        '<div class="search-list-item"><a href="/annonces/maison-lyon-r1"><h2>Maison 4 pièces 90 m²</h2></a>'
+        '<span class="item-price">250 000 €</span><p>Lyon 3E (69003)</p></div>'
+        '<div class="search-list-item"><a href="/annonces/appartement-lyon-r2"><h2>Appartement 2 pièces 45 m²</h2></a>'
+        '<span class="item-price">180 000 €</span><p>Lyon 7E (69007)</p></div>'
+        '</body></html>'
+    )
+    location = {'ville': 'Lyon', 'code_postal': '69003'}
+    scraper = PapScraper()
+
+    soup = BeautifulSoup(html, 'html.parser')
+    expected = [scraper._extract_listing(ad, location) for ad in scraper._find_ads(soup)]
+    listings = scraper._parse_listing_page(html, location)
+
+    for listing in listings:
+        print(f"  {listing['lien']} | {listing['prix']}€ | {listing['localisation']}")
+
+    return [l['lien'] for l in listings] == [l['lien'] for l in expected] and len(listings) == 2
+
+
+def test_watermark_stop():
+    """Teste l'arrêt de la pagination aux annonces déjà vues (watermark)."""
+    print("\n" + "=" * 60)
+    print("TEST WATERMARK (SCRAPING INCRÉMENTAL)")
+    print("=" * 60)
+
+    from concurrent.futures import Future
+    from scrapers.pap import PapScraper
+    from scrapers.watermark import SiteWatermark, make_scope, watermarks
+
+    def link(n):
+        return f'https://www.pap.fr/annonces/maison-r{n}'
+
+    def run(pages, commit=False):
+        """Un passage sur des pages de liens; retourne (scraper, annonces, pages demandées)."""
+        scraper = PapScraper()
+        scraper._timer.next_delay = lambda: 0
+        scraper.use_watermark(scope)
+        requested = []
+
+        def fetch(page_num):
+            if page_num > len(pages):
+                return None
+            requested.append(page_num)
+            future = Future()
+            future.set_result([{'lien': link(n)} for n in pages[page_num - 1]])
+            return future
+
+        listings = scraper._paginate(fetch, {}, 5, enrich=False)
+        if commit:
+            scraper.commit_watermark()
+        return scraper, listings, requested
+
+    scope = make_scope('test-watermark', ' Lyon ', 10)
+    watermarks.reset(scope)
+    try:
+        first, first_listings, first_pages = run([range(0, 10), range(10, 20), range(20, 30)], commit=True)
+        # 3 nouvelles + 7 connues (70% < 80%), puis une page entièrement connue: arrêt
+        partial, partial_listings, partial_pages = run([list(range(100, 103)) + list(range(7)), range(7, 17), range(17, 27)])
+        # Page 1 identique au dernier passage: site ignoré
+        unchanged, unchanged_listings, unchanged_pages = run([range(0, 10), range(10, 20)])
+    finally:
+        watermarks.reset(scope)
+
+    # LRU: seules les max_urls dernières URLs sont gardées
+    lru = SiteWatermark(max_urls=3)
+    lru.record([link(n) for n in range(5)])
+    print(f"  1er passage: pages {first_pages}, {len(first_listings)} annonces, complet: {first.complete_run}")
+    print(f"  2e passage: pages {partial_pages}, arrêt anticipé: {partial.stopped_early}, partageable: {partial.shareable}")
+    print(f"  3e passage: pages {unchanged_pages}, site inchangé: {unchanged.site_unchanged}")
+
+    return (
+        first_pages == [1, 2, 3] and len(first_listings) == 30
+        and not first.stopped_early and first.complete_run and first.shareable
+        and partial_pages == [1, 2] and len(partial_listings) == 20
+        and partial.stopped_early and not partial.complete_run and not partial.shareable
+        and unchanged_pages == [1] and unchanged_listings == []
+        and unchanged.site_unchanged and not unchanged.shareable
+        and len(lru) == 3 and lru.known_ratio([link(0), link(4)]) == 0.5
+    )
+
+
+def test_result_cache():
+    """Teste le cache TTL des résultats: clé normalisée, expiration, copies, invalidation."""
+    print("\n" + "=" * 60)
+    print("TEST CACHE DES RÉSULTATS (TTL)")
+    print("=" * 60)
+
+    from scrapers.result_cache import ResultCache
+
+    cache = ResultCache()
+    listings = [{'lien': 'https://www.pap.fr/annonces/maison-r1', 'prix': 250000}]
+    cache.put('pap', '  Saint-Étienne ', '10', listings)
+    listings[0]['prix'] = 1  # Le cache garde sa propre copie
+
+    hit = cache.get('pap', 'saint-etienne', 10, ttl_minutes=30)
+    hit.listings[0]['_distance_km'] = 3.2  # Modifié par un job, pas par le suivant
+    again = cache.get('pap', 'SAINT-ETIENNE', 10, ttl_minutes=30)
+    other_rayon = cache.get('pap', 'saint-etienne', 20, ttl_minutes=30)
+    other_site = cache.get('figaro', 'saint-etienne', 10, ttl_minutes=30)
+
+    # Vieillissement: 31 minutes
+    cache._entries[cache.make_key('pap', 'saint-etienne', 10)].stored_at -= 31 * 60
+    age = cache.age_minutes('pap', 'saint-etienne', 10, ttl_minutes=60)
+    still_fresh = cache.get('pap', 'saint-etienne', 10, ttl_minutes=60)
+    expired = cache.get('pap', 'saint-etienne', 10, ttl_minutes=30)
+    after_expiry = cache.get('pap', 'saint-etienne', 10, ttl_minutes=60)  # Entrée supprimée
+
+    cache.put('pap', 'Lyon', 10, listings)
+    cache.put('figaro', 'Lyon', 10, listings)
+    cache.invalidate('pap')
+    invalidated = (cache.get('pap', 'Lyon', 10, 30), cache.get('figaro', 'Lyon', 10, 30) is not None)
+    print(f"  Hit: {hit.listings[0]['prix']} €, âge après 31 min: {age}, expiré à 30 min: {expired}")
+
+    return (
+        hit is not None and hit.listings[0]['prix'] == 250000
+        and '_distance_km' not in again.listings[0]
+        and other_rayon is None and other_site is None
+        and age == 31 and still_fresh is not None and still_fresh.age_minutes == 31
+        and expired is None and after_expiry is None
+        and invalidated == (None, True)
+    )
+
+
+def test_singleflight():
+    """Teste la coalescence des fetchs identiques: un seul appel, copies, erreurs, clés distinctes."""
+    print("\n" + "=" * 60)
+    print("TEST SINGLE-FLIGHT")
+    print("=" * 60)
+
+    import threading
+    import time
+    from scrapers.result_cache import ResultCache, fetch_shared
+    from scrapers.singleflight import SingleFlight
+
+    flight = SingleFlight()
+    key = ResultCache.make_key('pap', 'Lyon', 10)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return [{'lien': 'https://www.pap.fr/annonces/maison-r1'}]
+
+    def join(fn, results, errors, key=key):
+        def target():
+            try:
+                results.append(flight.do(key, fn))
+            except Exception as e:
+                errors.append(e)
+        thread = threading.Thread(target=target)
+        thread.start()
+        return thread
+
+    def wait_consumers(count):
+        deadline = time.time() + 5
+        while time.time() < deadline and (key not in flight._calls or flight._calls[key].consumers < count):
+            time.sleep(0.01)
+
+    # 4 jobs simultanés sur la même clé (même ville normalisée): un seul fetch
+    results, errors = [], []
+    threads = [join(fetch, results, errors)]
+    wait_consumers(1)
+    threads += [join(fetch, results, errors, ResultCache.make_key('pap', ' lyon ', '10')) for _ in range(3)]
+    wait_consumers(4)
+    other_results = []
+    other = join(lambda: 'autre', other_results, errors, ('pap', 'paris', 10))  # Autre clé: pas d'attente
+    other.join(5)
+    other_done = other_results == [('autre', False)]
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    shared_flags = sorted(shared for _, shared in results)
+    results[0][0][0]['prix'] = 1
+    independent = sum(1 for listings, _ in results if 'prix' in listings[0]) == 1
+
+    # Erreur du leader propagée aux jobs en attente
+    failing = threading.Event()
+
+    def fail():
+        failing.wait(5)
+        raise RuntimeError('bloqué')
+
+    failed, fail_errors = [], []
+    fail_threads = [join(fail, failed, fail_errors)]
+    wait_consumers(1)
+    fail_threads.append(join(fail, failed, fail_errors))
+    wait_consumers(2)
+    failing.set()
+    for thread in fail_threads:
+        thread.join(5)
+
+    # Clé libérée: l'appel suivant refait un fetch
+    release.set()
+    flight.do(key, fetch)
+    print(f"  Fetchs: {len(calls)}, partagés: {shared_flags}, erreurs propagées: {[str(e) for e in fail_errors]}")
+
+    # Leader arrêté par son watermark (résultat incomplet): ni cache, ni partage
+    cache, truncated_flight, scrapes = ResultCache(), SingleFlight(), []
+    leader_started, leader_release = threading.Event(), threading.Event()
+
+    class Scraper:
+        site_key = 'pap'
+
+        def __init__(self, name, shareable):
+            self.name, self.shareable = name, shareable
+
+        def scrape(self, ville, rayon, max_pages=None):
+            scrapes.append(self.name)
+            if self.name == 'leader':
+                leader_started.set()
+                leader_release.wait(5)
+            return [{'lien': f'https://www.pap.fr/annonces/{self.name}'}]
+
+    outcomes = {}
+
+    def shared_job(name, shareable):
+        outcomes[name] = fetch_shared(Scraper(name, shareable), 'Lyon', 10, 1, cache=cache, flight=truncated_flight)
+
+    leader = threading.Thread(target=shared_job, args=('leader', False))
+    leader.start()
+    leader_started.wait(5)
+    follower = threading.Thread(target=shared_job, args=('follower', True))
+    follower.start()
+    deadline = time.time() + 5
+    while time.time() < deadline and truncated_flight._calls[key].consumers < 2:
+        time.sleep(0.01)
+    leader_release.set()
+    leader.join(5)
+    follower.join(5)
+    cached = cache.get('pap', 'lyon', 10, ttl_minutes=5)
+    print(f"  Leader tronqué: fetchs {scrapes}, cache: {[l['lien'] for l in cached.listings] if cached else None}")
+
+    return (
+        other_done and not errors
+        and shared_flags == [False, True, True, True] and independent
+        and not failed and [str(e) for e in fail_errors] == ['bloqué', 'bloqué']
+        and len(calls) == 2 and key not in flight._calls
+        and scrapes == ['leader', 'follower']
+        and outcomes['follower'] == ([{'lien': 'https://www.pap.fr/annonces/follower'}], False)
+        and cached is not None and cached.listings == outcomes['follower'][0]
+    )
+
+
+def test_browser_pool():
+    """Teste le pool de navigateurs (Playwright simulé): réutilisation, recyclage, erreurs."""
+    print("\n" + "=" * 60)
+    print("TEST POOL DE NAVIGATEURS")
+    print("=" * 60)
+
+    import scrapers.browser_pool as pool_module
+    from scrapers.browser_pool import BrowserPool
+
+    events = []
+
+    class Page:
+        def __init__(self):
+            self.handlers = []
+
+        def on(self, event, handler):
+            self.handlers.append(handler)
+
+    class Context:
+        def __init__(self, options):
+            self.options, self.page_handlers, self.init_scripts = options, [], []
+
+        def add_init_script(self, script):
+            self.init_scripts.append(script)
+
+        def on(self, event, handler):
+            self.page_handlers.append(handler)
+
+        def load_pages(self, count):
+            for _ in range(count):
+                page = Page()
+                for handler in self.page_handlers:
+                    handler(page)
+                for handler in page.handlers:
+                    handler(None)
+
+        def close(self):
+            events.append('context_closed')
+
+    class Browser:
+        def __init__(self):
+            self.connected = True
+
+        def is_connected(self):
+            return self.connected
+
+        def new_context(self, **options):
+            return Context(options)
+
+        def close(self):
+            events.append('browser_closed')
+
+    class Playwright:
+        class chromium:
+            @staticmethod
+            def launch(headless=True):
+                events.append('launch')
+                return Browser()
+
+        def stop(self):
+            events.append('stopped')
+
+    def task(pages):
+        def fn(context):
+            context.load_pages(pages)
+            return (context.options, context.init_scripts)
+        return fn
+
+    def fail(context):
+        raise RuntimeError('navigation')
+
+    saved = pool_module.sync_playwright, pool_module.PLAYWRIGHT_AVAILABLE
+    pool_module.sync_playwright = lambda: type('Starter', (), {'start': lambda self: Playwright()})()
+    pool_module.PLAYWRIGHT_AVAILABLE = True
+    pool = BrowserPool(size=1, max_pages=3, max_rss_mb=0)
+    try:
+        first = pool.run(task(2), init_script='stealth', locale='fr-FR')
+        pool.run(task(2))  # 4 pages >= 3: recyclé après ce contexte
+        pool.run(task(1))  # Nouveau navigateur
+        try:
+            pool.run(fail)
+            error = None
+        except RuntimeError as e:
+            error = str(e)
+        pool.run(task(3))  # 4 pages: recyclé
+    finally:
+        pool.close()  # Attend le worker (recyclage fait après la réponse)
+        pool_module.sync_playwright, pool_module.PLAYWRIGHT_AVAILABLE = saved
+    stats = pool.get_stats()
+    print(f"  {stats['launches']} lancements, {stats['reuses']} réutilisations, {stats['recycles']} recyclages, "
+          f"{stats['pages']} pages, erreur propagée: {error}")
+
+    return (
+        first == ({'locale': 'fr-FR'}, ['stealth'])
+        and error == 'navigation'
+        and stats['launches'] == 2 and stats['reuses'] == 3 and stats['recycles'] == 2
+        and stats['contexts'] == 5 and stats['pages'] == 8
+        and events.count('context_closed') == 5 and events[-1] == 'stopped'
+    )
+
+
+def test_load_policy():
+    """Teste la politique de chargement Playwright: blocage par type et domaine, attente du sélecteur."""
+    print("\n" + "=" * 60)
+    print("TEST POLITIQUE DE CHARGEMENT")
+    print("=" * 60)
+
+    from types import SimpleNamespace
+    from scrapers.leboncoin import LeboncoinScraper
+    from scrapers.pap import PapScraper
+
+    class Page:
+        def __init__(self, ready_error=False):
+            self.calls, self.handlers, self.ready_error = [], {}, ready_error
+
+        def route(self, pattern, handler):
+            self.handlers['route'] = handler
+
+        def on(self, event, handler):
+            self.handlers[event] = handler
+
+        def goto(self, url, wait_until=None, timeout=None):
+            self.calls.append(('goto', wait_until, timeout))
+
+        def wait_for_selector(self, selector, timeout=None):
+            self.calls.append(('selector', selector, timeout))
+            if self.ready_error:
+                raise TimeoutError(selector)
+
+    def route_results(scraper, requests):
+        page = Page()
+        scraper._prepare_page(page)
+        results = []
+        for url, resource_type in requests:
+            route = SimpleNamespace(request=SimpleNamespace(url=url, resource_type=resource_type))
+            route.abort = lambda: results.append('abort')
+            route.continue_ = lambda: results.append('continue')
+            page.handlers['route'](route)
+        return page, results
+
+    requests = [
+        ('https://www.pap.fr/annonce/vente', 'document'),
+        ('https://www.pap.fr/img/1.jpg', 'image'),
+        ('https://www.pap.fr/css/site.css', 'stylesheet'),
+        ('https://www.google-analytics.com/collect', 'xhr'),
+        ('https://notgoogle-analytics.com/app.js', 'script'),
+    ]
+    pap = PapScraper()
+    pap_page, pap_results = route_results(pap, requests)
+    lbc = LeboncoinScraper()
+    _, lbc_results = route_results(lbc, requests)
+
+    # Octets des requêtes terminées
+    pap_page.handlers['requestfinished'](SimpleNamespace(sizes=lambda: {'responseHeadersSize': 200, 'responseBodySize': 800}))
+
+    # Navigation: wait_until et timeouts du profil; sélecteur absent toléré
+    policy = pap._profile.load_policy
+    page = Page(ready_error=True)
+    pap._goto(page, 'https://www.pap.fr/annonce/vente')
+    stats = pap.get_load_stats()
+    print(f"  pap: {pap_results}")
+    print(f"  leboncoin (CSS gardé): {lbc_results}")
+    print(f"  {stats}")
+
+    return (
+        pap_results == ['continue', 'abort', 'abort', 'abort', 'continue']
+        and lbc_results == ['continue', 'abort', 'continue', 'abort', 'continue']
+        and page.calls == [('goto', policy.wait_until, policy.timeout_ms),
+                           ('selector', policy.ready_selector, policy.ready_timeout_ms)]
+        and stats['blocked'] == 3 and stats['requests'] == 1 and stats['bytes'] == 1000 and stats['pages'] == 1
+    )
+
+
+def test_embedded_json():
+    """Teste l'extraction du JSON embarqué (Next.js, JSON-LD, état initial)."""
+    print("\n" + "=" * 60)
+    print("TEST JSON EMBARQUÉ")
+    print("=" * 60)
+
+    from scrapers.embedded_json import EmbeddedJsonSpec, JSON_BACKEND, extract_list
+
+    html = (
+        '<html><head><script>var s = "__NEXT_DATA__";</script>'
+        '<script type="application/ld+json">{"@type": "ItemList", "itemListElement": [{"url": "/a/1"}]}</script>'
+        '</head><body><script>window.__INITIAL_STATE__ = {"search": {"results": [{"id": 7}]}};</script>'
+        '<script id="__NEXT_DATA__" type="application/json">'
+        '{"props": {"pageProps": {"searchData": {"ads": [{"url": "/ad/1"}, {"url": "/ad/2"}]}}}}'
+        '</script></body></html>'
+    )
+    cases = [
+        (EmbeddedJsonSpec('next_data', ('props', 'pageProps', 'searchData', 'ads')), 2),
+        (EmbeddedJsonSpec('next_data', ('props', 'renamed')), 2),  # Recherche récursive de 'ads'
+        (EmbeddedJsonSpec('json_ld', ('itemListElement',)), 1),
+        (EmbeddedJsonSpec('assignment', ('search', 'results')), 1),
+    ]
+
+    print(f"Backend JSON: {JSON_BACKEND}")
+    all_ok = True
+    for spec, expected in cases:
+        items = extract_list(html, spec) or []
+        ok = len(items) == expected
+        print(f"  {'✅' if ok else '❌'} {spec.source} {spec.path}: {len(items)} éléments")
+        all_ok = all_ok and ok
+
+    return all_ok and extract_list('<html></html>', cases[0][0]) is None
+
+
+def test_leboncoin_next_data():
+    """Teste le parsing d'une annonce leboncoin du JSON __NEXT_DATA__ (même format que l'API)."""
+    print("\n" + "=" * 60)
+    print("TEST LEBONCOIN __NEXT_DATA__")
+    print("=" * 60)
+
+    import json
+    from scrapers.leboncoin import LeboncoinScraper
+
+    ad = {
+        'list_id': 2456789012,
+        'first_publication_date': '2026-10-12 08:31:04',
+        'subject': 'Maison 5 pièces 110 m² avec jardin',
+        'url': 'https://www.leboncoin.fr/ad/ventes_immobilieres/2456789012',
+        'price': [289000],
+        'images': {'nb_images': 2, 'urls_large': [
+            'https://img.leboncoin.fr/api/v1/lbcpb1/images/aa/bb/1.jpg?rule=ad-large',
+            'https://img.leboncoin.fr/api/v1/lbcpb1/images/aa/bb/2.jpg?rule=ad-large',
+        ]},
+        'attributes': [
+            {'key': 'real_estate_type', 'value': '1', 'value_label': 'Maison'},
+            {'key': 'square', 'value': '110', 'value_label': '110 m²'},
+            {'key': 'rooms', 'value': '5', 'value_label': '5'},
+        ],
+        'location': {'city': 'Villeurbanne', 'zipcode': '69100', 'department_id': '69'},
+        'owner': {'store_id': '123', 'type': 'pro', 'name': 'Agence du Parc'},
+    }
+    relative = dict(ad, list_id=2456789013, url='/ad/ventes_immobilieres/2456789013', owner={'type': 'private'})
+    html = (
+        '<html><body><script id="__NEXT_DATA__" type="application/json">'
+        + json.dumps({'props': {'pageProps': {'searchData': {'ads': [ad, relative]}}}})
+        + '</script></body></html>'
+    ).encode('utf-8')
+
+    scraper = LeboncoinScraper()
+    location = {'ville': 'Lyon', 'code_postal': '69003'}
+    listings = scraper._parse_listing_page(html, location)
+    for listing in listings:
+        print(f"  {listing['lien']} | {listing['localisation']} | {listing['surface']} m² | "
+              f"{listing['pieces']} p. | {listing['description'] or 'particulier'}")
+    enriched = scraper._enrich_listing(dict(listings[0]), location) if listings else {}
+
+    return (
+        len(listings) == 2
+        and [l['lien'] for l in listings] == [
+            'https://www.leboncoin.fr/ad/ventes_immobilieres/2456789012',
+            'https://www.leboncoin.fr/ad/ventes_immobilieres/2456789013',
+        ]
+        and listings[0]['localisation'] == 'Villeurbanne (69100)'
+        and listings[0]['prix'] == 289000
+        and (listings[0]['surface'], listings[0]['pieces']) == (110, 5)
+        and [l['description'] for l in listings] == ['PRO', '']
+        and listings[0]['date_publication'] == '2026-10-12'
+        and len(listings[0]['photos']) == 2
+        and enriched.get('_geo_cp') == '69100'
+    )
+
+
+def test_selector_plan():
+    """Teste le plan de sélecteurs: priorité, gagnant mémorisé, condition, fallback."""
+    print("\n" + "=" * 60)
+    print("TEST PLAN DE SÉLECTEURS")
+    print("=" * 60)
+
+    import re
+    from bs4 import BeautifulSoup
+    from scrapers.selector_plan import AdSelector, SelectorPlan, _registry, get_selector_stats
+
+    plan = SelectorPlan('test_plan', [
+        AdSelector('div', {'class': re.compile(r'search-list-item', re.I)}),
+        AdSelector('article', {'class': 'annonce'}, require=lambda ad: ad.find('a', href=True)),
+    ], fallback=lambda soup: soup.find_all('a', href=re.compile(r'/annonces/')))
+
+    def soup(body):
+        return BeautifulSoup(f'<html><body>{body}</body></html>', 'html.parser')
+
+    div = '<div class="item search-list-item"><a href="/annonces/d">d</a></div>'
+    article = '<article class="annonce"><a href="/annonces/a">a</a></article>'
+    no_link = '<article class="annonce">sans lien</article>'
+    link = '<p><a href="/annonces/x">x</a></p>'
+
+    try:
+        both = len(plan.find(soup(div + article)))           # Cascade: priorité au 1er sélecteur
+        winner_first = plan.get_stats()['winner']
+        articles = len(plan.find(soup(article + no_link)))   # Gagnant absent: cascade, condition appliquée
+        winner_second = plan.get_stats()['winner']
+        memo = len(plan.find(soup(div + article * 2)))       # Gagnant mémorisé (2e sélecteur)
+        partial = plan.find(soup(link), use_fallback=False)  # Arbre partiel: pas de fallback, non compté
+        fallback = len(plan.find(soup(link)))
+        empty = plan.find(soup('<p>rien</p>'))
+        stats = get_selector_stats()['test_plan']
+    finally:
+        _registry.pop('test_plan', None)
+    print(f"  {stats}")
+
+    return (
+        both == 1 and winner_first.startswith('div')
+        and articles == 1 and winner_second == 'article[class~annonce]'
+        and memo == 2 and partial == [] and fallback == 1 and empty == []
+        and stats['memo_hits'] == 1 and stats['fallback'] == 1 and stats['empty'] == 1 and stats['pages'] == 5
+        and stats['hits'] == {winner_first: 1, 'article[class~annonce]': 2}
+        and 'test_plan' not in _registry
+    )
+
+
+def test_extraction():
+    """Teste l'extraction en un seul parcours (CP, ville, prix, surface, pièces)."""
+    print("\n" + "=" * 60)
+    print("TEST EXTRACTION TEXTE")
+    print("=" * 60)
+
+    from utils.extraction import extract_fields
+
+    cases = [
+        ("Maison 4 pièces 120 m² 250 000 € Lyon 3E (69003)", ("Lyon 3E (69003)", 250000, 120, 4)),
+        ("Appartement T3 65m2, 69003 Lyon. 189000€", ("Lyon (69003)", 189000, 65, 3)),
+        ("Maison, L'Isle-d'Abeau (38080), 5 PIÈCES", ("L'Isle-d'Abeau (38080)", 0, None, 5)),
+        ("Réf 123456 jardin, 3 pièces", (None, 0, None, 3)),
+        ("", (None, 0, None, None)),
+    ]
+
+    all_ok = True
+    for text, expected in cases:
+        fields = extract_fields(text)
+        got = (fields.localisation, fields.prix, fields.surface, fields.pieces)
+        ok = got == expected
+        print(f"  {'✅' if ok else '❌'} {text[:40]!r}: {got}")
+        all_ok = all_ok and ok
+
+    return all_ok
+
+
+def test_pagination():
+    """Teste la pagination en pipeline (parsing pendant le délai, requêtes espacées)."""
+    print("\n" + "=" * 60)
+    print("TEST PAGINATION PIPELINE")
+    print("=" * 60)
+
+    import time
+    from scrapers.pap import PapScraper
+
+    delay, parse_s, pages = 0.1, 0.08, 4
+    scraper = PapScraper()
+    scraper._timer.next_delay = lambda: delay
+
+    def parse(content, location):
+        time.sleep(parse_s)
+        return [{'lien': f'https://www.pap.fr/annonces/{content}-{i}'} for i in range(3)]
+
+    scraper._parse_listing_page = parse
+    requests_at = []
+
+    def fetch(page_num):
+        requests_at.append(time.perf_counter())
+        return scraper._submit_parse(page_num, {})
+
+    start = time.perf_counter()
+    listings = scraper._paginate(fetch, {}, pages, enrich=False)
+    elapsed = time.perf_counter() - start
+
+    gaps = [b - a for a, b in zip(requests_at, requests_at[1:])]
+    sequential = pages * (delay + parse_s)
+    print(f"  {len(listings)} annonces en {elapsed:.2f}s (séquentiel: {sequential:.2f}s)")
+    print(f"  écart min entre requêtes: {min(gaps):.3f}s (délai {delay}s)")
+
+    return len(listings) == pages * 3 and min(gaps) >= delay and elapsed < sequential - 0.1
+
+
+def test_parse_pool():
+    """Teste le parsing dans un pool de processus (mêmes annonces que dans le thread)."""
+    print("\n" + "=" * 60)
+    print("TEST POOL DE PARSING")
+    print("=" * 60)
+
+    from scrapers.parse_pool import ParsePool
+    from scrapers.pap import PapScraper
+
+    html = (
+        '<html><body>'
+        '<div class="search-list-item"><a href="/annonces/maison-lyon-r1"><h2>Maison 4 pièces 90 m²</h2></a>'
+        '<span class="item-price">250 000 €</span><p>Lyon 3E (69003)</p></div>'
+        '</body></html>'
+    ).encode('utf-8')
+    location = {'ville': 'Lyon', 'code_postal': '69003'}
+    scraper = PapScraper()
+
+    pool = ParsePool(backend='process', threads=1, processes=1)
+    before = scraper.ad_plan.get_stats()
+    try:
+        listings = pool.submit(lambda: pool.parse(scraper, html, location)).result(timeout=60)
+        stats = pool.get_stats()
+    finally:
+        pool.close()
+    # Compteurs du plan de sélecteurs remontés du worker
+    after = scraper.ad_plan.get_stats()
+
+    expected = scraper._parse_listing_page(html, location)
+    print(f"  {len(listings)} annonce(s), {stats['in_process']} page(s) parsée(s) hors processus")
+    print(f"  Plan de sélecteurs: {before['pages']} -> {after['pages']} page(s), gagnant {after['winner']}")
+
+    return (
+        stats['in_process'] == 1 and [l['lien'] for l in listings] == [l['lien'] for l in expected]
+        and after['pages'] == before['pages'] + 1 and after['winner'] is not None
+    )
+
+
+def test_page_archive():
+    """Teste l'archive HTML (dédoublonnage par contenu) et la relecture hors réseau."""
+    print("\n" + "=" * 60)
+    print("TEST ARCHIVE HTML")
+    print("=" * 60)
+
+    import tempfile
+    from scrapers.page_archive import PageArchive
+    from scrapers.pap import PapScraper
+
+    html = (
+        '<html><body>'
+        '<div class="search-list-item"><a href="/annonces/maison-lyon-r1"><h2>Maison 4 pièces 90 m²</h2></a>'
+        '<span class="item-price">250 000 €</span><p>Lyon 3E (69003)</p></div>'
+        '</body></html>'
+    ).encode('utf-8')
+    location = {'ville': 'Lyon', 'code_postal': '69003'}
+    scraper = PapScraper()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = PageArchive(tmp)
+        digest = archive.store('pap', 'https://www.pap.fr/p1', html, location)
+        archive.store('pap', 'https://www.pap.fr/p1', html, location)  # Même contenu: pas de nouveau blob
+        archive.store('leboncoin', 'https://www.leboncoin.fr/p1', b'<html></html>', location)
+
+        entries = list(archive.entries(sites=['pap'], latest=True))
+        stats = archive.get_stats()
+        listings = scraper._parse_listing_page(archive.load(entries[0].hash), entries[0].location)
+
+    print(f"  {stats['pages']} pages, {stats['blobs']} blobs ({stats['codec']}), {len(listings)} annonce(s) relue(s)")
+
+    expected = scraper._parse_listing_page(html, location)
+    return (
+        stats['blobs'] == 2 and stats['duplicates'] == 1
+        and len(entries) == 1 and entries[0].hash == digest
+        and [l['lien'] for l in listings] == [l['lien'] for l in expected]
+    )
+
+
+def test_site_specs():
+    """Teste les specs déclaratives (URLs, pagination, champs par priorité)."""
+    print("\n" + "=" * 60)
+    print("TEST SPECS DE SITES")
+    print("=" * 60)
+
+    from bs4 import BeautifulSoup
+    from scrapers.extraction_plan import get_plan
+
+    paruvendu = get_plan('paruvendu')
+    urls = paruvendu.build_urls({'ville': 'Lyon', 'slug': 'lyon', 'code_postal': '', 'departement': '69'})
+    page_2 = paruvendu.page_url(urls[0], 2)
+    print(f"  {urls} -> {page_2}")
+
+    pap = get_plan('pap')
+    ad = BeautifulSoup(
+        '<div class="search-list-item"><a href="/annonces/maison-lyon-r1"><span class="title">Maison</span></a>'
+        '<p>350 000 €</p><p>Lyon 3E (69003) - 90 m²</p><img data-src="/photos/1.jpg"></div>',
+        'html.parser'
+    ).div
+    listing = pap.extract(ad, {'ville': 'Lyon', 'code_postal': '69003'})
+    print(f"  {listing['titre']} | {listing['prix']}€ | {listing['localisation']} | {listing['photos']}")
+
+    return (
+        urls == ['https://www.paruvendu.fr/immobilier/vente/lyon/?pa=1']
+        and page_2 == 'https://www.paruvendu.fr/immobilier/vente/lyon/?pa=1&p=2'
+        and get_plan('figaro').page_url(urls[0], 2) is None
+        and listing['titre'] == 'Maison' and listing['prix'] == 350000
+        and listing['localisation'] == 'Lyon 3E (69003)' and listing['surface'] == 90
+        and listing['photos'] == ['https://www.pap.fr/photos/1.jpg']
+    )
+
+
+def test_shared_circuit_breaker():
+    """Teste le circuit breaker partagé par site: ouvert pour tous les jobs, puis reprise après la pause."""
+    print("\n" + "=" * 60)
+    print("TEST CIRCUIT BREAKER PARTAGÉ")
+    print("=" * 60)
+
+    import dataclasses
+    import scrapers.site_config as site_config
+    from scrapers.pap import PapScraper
+    from scrapers.site_config import RateLimiter, get_profile, get_rate_limiter
+
+    profile = dataclasses.replace(get_profile('pap'), rps=1000, jitter_range=(0, 0), circuit_breaker_fails=2, backoff_sequence=[0])
+    saved = get_rate_limiter('pap')
+    site_config._rate_limiters['pap'] = RateLimiter(profile)
+    try:
+        job_a, job_b = PapScraper(), PapScraper()
+        shared = job_a._rate_limiter is job_b._rate_limiter is get_rate_limiter('pap')
+        job_a._record_failure(403)
+        job_a._record_failure(403)
+        blocked = (job_a._should_stop(), job_b._should_stop(), get_rate_limiter('pap').should_stop())
+
+        # Pause écoulée: un nouveau job reprend, un échec isolé ne rouvre pas le circuit
+        get_rate_limiter('pap').circuit_open_until = time.time() - 1
+        job_c = PapScraper()
+        resumed = not job_c._should_stop()
+        job_c._record_failure(500)
+        after_one_failure = job_c._should_stop()
+        job_c._record_success()
+        get_rate_limiter('pap').wait()
+        state = (get_rate_limiter('pap').fail_count, get_rate_limiter('pap').circuit_open)
+    finally:
+        site_config._rate_limiters['pap'] = saved
+    print(f"  Partagé: {shared}, bloqué (A, B, détails): {blocked}, reprise: {resumed}, "
+          f"après un échec: {after_one_failure}, état: {state}")
+
+    return (
+        shared and blocked == (True, True, True)
+        and resumed and not after_one_failure and state == (0, False)
+        and not job_c.complete_run
+    )
+
+
+def test_shared_site_pacer():
+    """Teste le rythme partagé par site: créneaux du limiteur réservés par les listes et les pages de détail."""
+    print("\n" + "=" * 60)
+    print("TEST RYTHME PARTAGÉ LISTES / DÉTAILS")
+    print("=" * 60)
+
+    import dataclasses
+    from types import SimpleNamespace
+    import scrapers.detail_fetcher as detail_module
+    import scrapers.site_config as site_config
+    from scrapers.detail_fetcher import DetailFetcher
+    from scrapers.pap import PapScraper
+    from scrapers.site_config import RateLimiter, get_profile, get_rate_limiter
+
+    # 4 requêtes/s sans jitter: un créneau toutes les 250 ms
+    limiter = RateLimiter(dataclasses.replace(get_profile('pap'), rps=4, jitter_range=(0, 0)))
+    first = limiter.reserve()
+    second = limiter.reserve()
+    human = limiter.reserve(2.0)  # Délai humain plus long que l'intervalle
+    print(f"  Créneaux: {first:.2f}s, {second:.2f}s, {human:.2f}s")
+
+    events = []
+
+    class Session:
+        def get(self, url, timeout=None):
+            status = int(url.rsplit('/', 1)[-1])
+            events.append(('get', status))
+            return SimpleNamespace(status_code=status, content=b'<html><div class="description">Maison</div></html>')
+
+    class Db:
+        connected = True
+
+        def get_detail_candidates(self, user_id, stale_before, status=None, limit=None):
+            if status:
+                return []
+            return [{'id': str(code), 'source': 'pap.fr', 'status': 'Nouveau', 'details_fetched_at': None,
+                     'url': f'https://www.pap.fr/annonces/{code}'} for code in (200, 403, 404)]
+
+        def update_listing_details(self, user_id, batch):
+            events.append(('update', sorted(row['id'] for row in batch)))
+            return len(batch)
+
+    def create_scraper(site_key):
+        scraper = PapScraper()
+        scraper._timer = SimpleNamespace(
+            next_delay=lambda: 0.0,
+            wait_after_error=lambda code, attempt=1: events.append(('pause', code)),
+        )
+        scraper.detail_session = Session
+        return scraper
+
+    reserved = []
+    shared = RateLimiter(dataclasses.replace(get_profile('pap'), rps=1000, jitter_range=(0, 0), circuit_breaker_fails=5))
+    shared_reserve = shared.reserve
+    shared.reserve = lambda min_delay=0.0: reserved.append(min_delay) or shared_reserve(min_delay)
+    saved_limiter, saved_factory = get_rate_limiter('pap'), detail_module.create_scraper
+    site_config._rate_limiters['pap'] = shared
+    detail_module.create_scraper = create_scraper
+    try:
+        list_scraper = PapScraper()
+        list_scraper._timer = SimpleNamespace(next_delay=lambda: 0.0)
+        list_scraper._wait()
+        stats = DetailFetcher(max_per_run=10).run(Db(), 'user-1')
+        fail_count = shared.fail_count
+    finally:
+        site_config._rate_limiters['pap'] = saved_limiter
+        detail_module.create_scraper = saved_factory
+    print(f"  Créneaux réservés: {len(reserved)}, événements: {events}, {stats}")
+
+    return (
+        first == 0 and 0.2 <= second <= 0.3 and 1.9 <= human <= 2.1
+        and len(reserved) == 4
+        and events == [('get', 200), ('get', 403), ('pause', 403), ('get', 404), ('update', ['200', '404'])]
+        and stats == {'fetched': 1, 'updated': 2, 'failed': 1, 'blocked': 0}
+        and fail_count == 0
+    )
+
+
+def test_detail_fetcher():
+    """Teste la lecture des pages de détail et la sélection par fraîcheur / priorité."""
+    print("\n" + "=" * 60)
+    print("TEST PAGES DE DÉTAIL")
+    print("=" * 60)
+
+    from datetime import datetime
+    from scrapers.detail_fetcher import parse_detail_page, select_candidates
+
+    html = (
+        '<html><head><meta property="og:image" content="https://img.pap.fr/1.jpg">'
+        '<script type="application/ld+json">{"@type": "Product", '
+        '"description": "Maison avec jardin, contact au 06.12.34.56.78"}</script></head>'
+        '<body><div class="description">Maison avec jardin</div></body></html>'
+    )
+    details = parse_detail_page(html.encode('utf-8'))
+    print(f"  {details}")
+
+    listings = [
+        {'id': 'nouvelle', 'source': 'pap.fr', 'status': 'Nouveau', 'details_fetched_at': None},
+        {'id': 'fraiche', 'source': 'pap.fr', 'status': 'Intéressé', 'details_fetched_at': datetime.now().isoformat()},
+        {'id': 'perimee', 'source': 'pap.fr', 'status': 'Nouveau', 'details_fetched_at': '2020-01-01T00:00:00'},
+        {'id': 'suivie', 'source': 'paruvendu.fr', 'status': 'Intéressé', 'details_fetched_at': '2020-01-01T00:00:00'},
+        {'id': 'facebook', 'source': 'facebook-marketplace', 'status': 'Nouveau', 'details_fetched_at': None},
+    ]
+    order = [l['id'] for l in select_candidates(listings)]
+    print(f"  Ordre: {order}")
+
+    return (
+        details['telephone'] == '06 12 34 56 78'
+        and details['photos'] == ['https://img.pap.fr/1.jpg']
+        and order == ['suivie', 'nouvelle', 'perimee']
+    )
+
+
+def test_listing_pipeline():
+    """Vérifie que l'étape fusionnée retient les mêmes annonces que la chaîne de filtres."""
+    print("\n" + "=" * 60)
+    print("TEST VALIDATION FUSIONNÉE")
+    print("=" * 60)
+
+    import contextlib
+    import io
+    from utils.validator import (
+        ListingPipeline, validate_listing, filter_agencies, filter_by_location,
+        deduplicate_by_url, deduplicate_by_signature,
+    )
+
+    listings = [
+        make_listing(1),
+        make_listing(2, prix=0),
+        make_listing(3, titre=''),
+        make_listing(4, prix='NC'),
+        make_listing(5, titre='Agence du centre - T3'),
+        make_listing(6, localisation='Marseille (13001)'),
+        make_listing(7, localisation='Lyon'),  # Sans département: gardée (métropole)
+        make_listing(8, lien='https://www.pap.fr/annonces/r1'),  # Même URL que 1
+        make_listing(1, lien='https://www.pap.fr/annonces/autre'),  # Même signature que 1
+        make_listing(9),
+    ]
+
+    for target, departement in (('Lyon 69003', None), ('Fort-de-France', '972'), ('Lyon', None)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            valid = [l for l in listings if validate_listing(l)]
+            located = filter_by_location(filter_agencies(valid), target, departement)
+            expected = deduplicate_by_signature(deduplicate_by_url(located))
+        pipeline = ListingPipeline(target, departement)
+        final = pipeline.run(listings)
+        print(f"  {target}: {len(final)} retenues ({pipeline.summary()})")
+        if final != expected:
+            print(f"  ❌ Attendu {[l['lien'] for l in expected]}, obtenu {[l['lien'] for l in final]}")
+            return False
+
+    pipeline = ListingPipeline('Lyon 69003')
+    pipeline.run(listings)
+    return (
+        pipeline.rejects == {'missing_prix': 1, 'missing_titre': 1, 'price_invalid': 1, 'agency': 1,
+                             'out_of_department': 1, 'duplicate_url': 1, 'duplicate_signature': 1}
+        and pipeline.stages['valid'] == 7 and pipeline.stages['final'] == 3
+    )
+
+
+def test_keyword_matcher():
+    """Teste la détection des agences par mots entiers et le mot-clé renvoyé."""
+    print("\n" + "=" * 60)
+    print("TEST MOTS-CLÉS AGENCES")
+    print("=" * 60)
+
+    from utils.keywords import KeywordMatcher
+    from utils.validator import agency_keyword
+
+    matcher = KeywordMatcher(['agence', 'immo', 'immobilier', 'sas', 'real estate'])
+    cases = {
+        'Agences du centre': 'agence',
+        'IMMO-Lyon vous propose': 'immo',
+        'Crédit immobilier possible': 'immobilier',
+        'Real   Estate Lyon': 'real estate',
+        'SAS Durand, T4': 'sas',
+        'Maison à Sassenage': None,  # "sas" dans un mot
+        'Résidence immobilière': None,  # "immo" dans un mot
+        '': None,
+    }
+    ok = True
+    for text, expected in cases.items():
+        found = matcher.search(text)
+        print(f"  {text!r}: {found}")
+        ok = ok and found == expected
+
+    listing = {'titre': 'Maison T4', 'description': 'Vendu par SARL Durand'}
+    return ok and agency_keyword(listing) == 'sarl' and agency_keyword({'titre': 'Maison', 'description': None}) is None
+
+
+def test_near_duplicates():
+    """Teste la fusion des quasi-doublons entre sites (MinHash/LSH + tolérances)."""
+    print("\n" + "=" * 60)
+    print("TEST QUASI-DOUBLONS")
+    print("=" * 60)
+
+    from utils.near_duplicates import NearDuplicateMerger
+
+    def listing(site, titre, prix, surface, **fields):
+        fields = {'pieces': 5, 'localisation': 'Villeurbanne (69100)', 'lien': f'https://{site}/{len(titre)}-{prix}', **fields}
+        return make_listing(site=site, titre=titre, prix=prix, surface=surface, **fields)
+
+    listings = [
+        listing('pap.fr', 'Maison 5 pièces 120 m² avec jardin', 350000, 120, photos=['https://pap/1.jpg']),
+        listing('leboncoin.fr', 'Maison 120m2 - 5 pieces, avec jardin', 345000, 120, telephone='06 12 34 56 78'),
+        listing('paruvendu.fr', 'Vends maison avec jardin 120 m²', 352000, 119, photos=['https://pv/1.jpg']),
+        listing('paruvendu.fr', 'Maison 5 pièces 120 m² avec jardin', 450000, 120),  # Prix trop différent
+        listing('pap.fr', 'Maison 5 pièces 120 m² avec jardin', 350000, 120, localisation='Marseille (13001)'),
+        listing('pap.fr', 'Appartement T2 45 m² lumineux', 180000, 45, pieces=2),
+    ]
+    merger = NearDuplicateMerger()
+    merged = merger.merge(listings)
+    for l in merged:
+        print(f"  {l['site_source']:<14} {l['titre'][:35]:<35} sources: {len(l.get('sources') or [])}")
+    print(f"  {merger.get_stats()}")
+
+    canonical = merged[0]
+    return (
+        len(merged) == 4
+        and [s['site_source'] for s in canonical['sources']] == ['pap.fr', 'leboncoin.fr', 'paruvendu.fr']
+        and canonical['telephone'] == '06 12 34 56 78'
+        and set(canonical['photos']) == {'https://pap/1.jpg', 'https://pv/1.jpg'}
+        and all('sources' not in l for l in merged[1:])
+    )
+
+
+def test_photo_matcher():
+    """Teste les hash perceptuels et les doublons photo sur des images locales."""
+    print("\n" + "=" * 60)
+    print("TEST DOUBLONS PHOTO")
+    print("=" * 60)
+
+    import io
+    import os
+    import random
+    import shutil
+    import tempfile
+    from scrapers.photo_matcher import PhotoMatcher
+    from utils.photo_hash import PIL_AVAILABLE, BKTree, dhash, hamming
+
+    if not PIL_AVAILABLE:
+        print("  ⚠️ Pillow non installé - test ignoré")
+        return True
+    from PIL import Image, ImageDraw, ImageEnhance
+
+    def photo(seed):
+        rng = random.Random(seed)
+        image = Image.new('RGB', (640, 480), (rng.randrange(256),) * 3)
+        draw = ImageDraw.Draw(image)
+        for _ in range(12):
+            x, y = rng.randrange(600), rng.randrange(440)
+            draw.rectangle([x, y, x + rng.randrange(40, 200), y + rng.randrange(40, 200)],
+                           fill=tuple(rng.randrange(256) for _ in range(3)))
+        return image
+
+    # Jeu d'images local: une maison en 3 versions (originale, réduite, plus claire) + 2 autres biens
+    fixtures = tempfile.mkdtemp()
+    house = photo(1)
+    variants = {
+        'maison.jpg': house,
+        'maison-petite.jpg': house.resize((320, 240)),
+        'maison-claire.jpg': ImageEnhance.Brightness(house).enhance(1.2),
+        'appartement.jpg': photo(2),
+        'studio.jpg': photo(3),
+    }
+    for name, image in variants.items():
+        image.save(os.path.join(fixtures, name), 'JPEG', quality=70)
+
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        with open(os.path.join(fixtures, url.rsplit('/', 1)[1]), 'rb') as f:
+            return f.read()
+
+    def read(name):
+        with open(os.path.join(fixtures, name), 'rb') as f:
+            return f.read()
+
+    same = hamming(dhash(read('maison.jpg')), dhash(read('maison-petite.jpg')))
+    other = hamming(dhash(read('maison.jpg')), dhash(read('appartement.jpg')))
+    print(f"  Distance même photo réduite: {same}, autre bien: {other}")
+
+    tree = BKTree()
+    for name in variants:
+        tree.add(dhash(read(name)), name)
+    near = [name for _, name in tree.find(dhash(read('maison-claire.jpg')), 6)]
+
+    def listing(site, photo_name):
+        return make_listing(site=site, titre=f'Annonce {site}', prix=250000, lien=f'https://{site}/{photo_name}',
+                            photos=[f'https://img.{site}/{photo_name}'])
+
+    matcher = PhotoMatcher(workers=2, fetch=fetch)
+    listings = [
+        listing('pap.fr', 'maison.jpg'),
+        listing('leboncoin.fr', 'maison-petite.jpg'),
+        listing('paruvendu.fr', 'appartement.jpg'),
+        listing('paruvendu.fr', 'maison.jpg'),  # Même URL de photo: servie par le cache
+    ]
+    listings[3]['photos'] = listings[0]['photos']
+    merged = matcher.merge('user', listings)
+    # Passage suivant: la maison revue sur un autre site est écartée
+    second = matcher.merge('user', [listing('figaro-immo', 'maison-claire.jpg'), listing('pap.fr', 'studio.jpg')])
+    matcher.hash_photos([listings[1]['photos'][0]])  # Déjà hashée: pas de téléchargement
+    # Annonces revues à chaque passage: une seule entrée par annonce dans l'arbre
+    for _ in range(5):
+        matcher.merge('user', [listing('pap.fr', 'maison.jpg'), listing('pap.fr', 'studio.jpg')])
+    stats = matcher.get_stats()
+    matcher.close()
+    shutil.rmtree(fixtures)
+    print(f"  Passage 1: {len(merged)} annonces, passage 2: {len(second)} annonces, {stats}")
+
+    # Arbre borné: les annonces les moins récemment vues sont oubliées
+    capped = PhotoMatcher(workers=1, max_distance=0, tree_size=10)
+    capped._hash_photo = lambda url: int(url.rsplit('-', 1)[1])
+    capped.merge('user', [make_listing(n, photos=[f'https://img.pap.fr/photo-{n}']) for n in range(25)])
+    capped_stats = capped.get_stats()
+    capped.close()
+
+    # Chaîne de doublons (C -> B -> A): tout est fusionné dans l'original A
+    chained = PhotoMatcher(workers=1)
+    chained.find_duplicates = lambda user_id, ls: {1: ls[0]['lien'], 2: ls[1]['lien']}
+    chain = chained.merge('user', [listing('pap.fr', 'a.jpg'), listing('leboncoin.fr', 'b.jpg'), listing('paruvendu.fr', 'c.jpg')])
+    print(f"  Arbre borné: {capped_stats['tree_entries']} entrées ({capped_stats['forgotten']} oubliées), "
+          f"chaîne: {[[s['site_source'] for s in l['sources']] for l in chain]}")
+
+    return (
+        same <= 6 < other
+        and set(near) == {'maison.jpg', 'maison-petite.jpg', 'maison-claire.jpg'}
+        and [l['site_source'] for l in merged] == ['pap.fr', 'paruvendu.fr']
+        and [s['site_source'] for s in merged[0]['sources']] == ['pap.fr', 'leboncoin.fr', 'paruvendu.fr']
+        and [l['site_source'] for l in second] == ['pap.fr']
+        and len(fetched) == len(set(fetched)) == 5
+        and stats['cache_hits'] == 11
+        and stats['tree_entries'] == 3
+        and capped_stats['tree_entries'] <= 10 and capped_stats['forgotten'] >= 15
+        and [[s['site_source'] for s in l['sources']] for l in chain] == [['pap.fr', 'leboncoin.fr', 'paruvendu.fr']]
+    )
+
+
+def test_seen_index():
+    """Teste l'index persistant des annonces vues et leur rejet dès l'extraction."""
+    print("\n" + "=" * 60)
+    print("TEST INDEX DES ANNONCES VUES")
+    print("=" * 60)
+
+    import os
+    import tempfile
+    from concurrent.futures import Future
+    from scrapers.pap import PapScraper
+    from scrapers.seen_index import SeenIndex, seen_index
+
+    links = [f'https://www.pap.fr/annonces/maison-r{n}' for n in range(1000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SeenIndex(tmp, capacity=10000)
+        index.add('alice', links[:500])
+        known = index.filter_known('alice', links)
+        other_user = index.filter_known('bob', links)
+        index.close()
+
+        # Réouverture, puis filtre supprimé: reconstruit depuis SQLite
+        reopened = SeenIndex(tmp, capacity=10000)
+        persisted = reopened.filter_known('alice', links)
+        reopened.close()
+        for name in os.listdir(tmp):
+            if name.endswith('.bloom'):
+                os.remove(os.path.join(tmp, name))
+        rebuilt = SeenIndex(tmp, capacity=10000)
+        after_rebuild = rebuilt.filter_known('alice', links)
+        stats = rebuilt.get_stats()
+        rebuilt.close()
+        print(f"  Connus: {len(known)}, autre utilisateur: {len(other_user)}, "
+              f"après réouverture: {len(persisted)}, après reconstruction: {len(after_rebuild)}")
+        print(f"  {stats}")
+
+        # Scraper: les annonces connues sont écartées avant enrichissement
+        seen_index.index_dir = tmp
+        try:
+            scraper = PapScraper()
+            scraper.use_seen_index('alice')
+            page = Future()
+            page.set_result([make_listing(lien=links[0], titre='connue'), make_listing(lien='https://www.pap.fr/annonces/neuve', titre='neuve')])
+            accepted = []
+            scraper._accept_page(1, page, {'ville': 'Lyon'}, accepted, enrich=False)
+        finally:
+            seen_index.close()
+            seen_index.index_dir = ''
+        print(f"  Page: {[l['titre'] for l in accepted]}, {scraper.get_pipeline_stats()['known']} connue(s) écartée(s)")
+
+    return (
+        known == set(links[:500]) and not other_user
+        and persisted == after_rebuild == known
+        and stats['bloom_negative'] >= 450
+        and [l['titre'] for l in accepted] == ['neuve']
+    )
+
+
+def test_canonical_url():
+    """Teste la clé canonique des URLs et le dédoublonnage des variantes d'une même annonce."""
+    print("\n" + "=" * 60)
+    print("TEST URLS CANONIQUES")
+    print("=" * 60)
+
+    from utils import ListingPipeline, canonical_url
+
+    variants = {
+        'leboncoin': [
+            'https://www.leboncoin.fr/ad/ventes_immobilieres/2412345678',
+            'https://leboncoin.fr/ventes_immobilieres/2412345678.htm?utm_source=alerte&xtor=EREC-1',
+            'http://www.leboncoin.fr/vi/2412345678.htm/',
+        ],
+        'pap': [
+            'https://www.pap.fr/annonces/maison-lyon-69003-r412345678',
+            'https://www.pap.fr/annonces/maison-lyon-69003-r412345678/?xtor=SEC-12#photos',
+        ],
+        'autre': [
+            'https://exemple.fr/annonce/42?b=2&a=1&utm_medium=mail',
+            'exemple.fr/annonce/42/?a=1&b=2',
+        ],
+    }
+    keys = {site: {canonical_url(url) for url in urls} for site, urls in variants.items()}
+    for site, site_keys in keys.items():
+        print(f"  {site}: {sorted(site_keys)}")
+
+    listings = [
+        make_listing(site='leboncoin.fr', titre='Maison 4 pièces', localisation='Lyon 69003', lien=url, prix=250000 + i)
+        for i, url in enumerate(variants['leboncoin'])
+    ]
+    pipeline = ListingPipeline()
+    kept = pipeline.run(listings)
+    print(f"  Pipeline: {len(kept)}/{len(listings)} gardée(s), clé {kept[0].get('url_key') if kept else None}")
+
+    return (
+        keys['leboncoin'] == {'leboncoin:2412345678'}
+        and keys['pap'] == {'pap:412345678'}
+        and keys['autre'] == {'exemple.fr/annonce/42?a=1&b=2'}
+        and canonical_url('https://www.pap.fr/annonces/maison-r412345679') != 'pap:412345678'
+        and len(kept) == 1 and kept[0]['url_key'] == 'leboncoin:2412345678'
+    )
+
+
+def test_listing_record():
+    """Teste l'enregistrement Listing: conversions dict / ligne, métadonnées à part, attributs stricts."""
+    print("\n" + "=" * 60)
+    print("TEST ENREGISTREMENT LISTING")
+    print("=" * 60)
+
+    from utils import Listing
+
+    scraped = make_listing(
+        titre='Maison 4 pièces', prix=250000, lien='https://www.pap.fr/annonces/maison-lyon-r412345678?xtor=1',
+        photos=['https://cdn.pap.fr/1.jpg'], surface=95, pieces=4,
+        _scraper='pap', _geo_confidence='high', _geo_cp='69003',
+    )
+    listing = Listing.from_dict(scraped)
+    row = listing.to_row('user-1', now='2026-10-01T12:00:00')
+    back = Listing.from_row(dict(row, id='abc'))
+    print(f"  {listing!r}, meta {sorted(listing.meta)}")
+    print(f"  Ligne: {sorted(row)}")
+
+    try:
+        listing.prixx = 1
+        strict = False
+    except AttributeError:
+        strict = True
+    print(f"  Attribut inconnu refusé: {strict}")
+
+    return (
+        strict and not hasattr(listing, '__dict__')
+        and listing.to_dict(meta=True) == dict(scraped, sources=None, url_key=None)
+        and set(listing.to_dict()) == set(scraped) - {'_scraper', '_geo_confidence', '_geo_cp'} | {'sources', 'url_key'}
+        and not any(column.startswith('_') for column in row)
+        and row['url_key'] == 'pap:412345678' and row['title'] == 'Maison 4 pièces' and row['rooms'] == 4
+        and back.prix == 250000 and back.lien == scraped['lien'] and back.meta['id'] == 'abc'
+        and listing.source_links() == [scraped['lien']]
+    )
+
+
+def test_reject_registry():
+    """Teste le registre des rejets: scrapers, pipeline et filtre département, exemples échantillonnés."""
+    print("\n" + "=" * 60)
+    print("TEST REGISTRE DES REJETS")
+    print("=" * 60)
+
+    import contextlib
+    import io
+    from scrapers.pap import PapScraper
+    from utils import ListingPipeline, filter_by_location
+    from utils.rejects import RejectRegistry
+
+    rejects = RejectRegistry(max_examples=2)
+    scraper = PapScraper()
+    scraper.track_rejects(rejects)
+    no_price = scraper._is_rejected({'lien': 'https://www.pap.fr/annonces/r1', 'prix': 0, 'titre': 'Sans prix'})
+    wrong_dept = scraper._is_rejected({'lien': 'https://www.pap.fr/annonces/r2', 'prix': 1, 'titre': 'Marseille',
+                                       '_expected_dept': '69', '_geo_cp': '13001'})
+
+    listings = [
+        make_listing(n, prix=200000, localisation='Marseille (13001)', lien=f'https://www.pap.fr/annonces/m-r{n}', _scraper='pap')
+        for n in range(10)
+    ] + [make_listing(titre='Agence Dupont', prix=200000, lien='https://www.pap.fr/annonces/a-r1', _scraper='pap')]
+    ListingPipeline('Lyon', '69', rejects=rejects).run([dict(l) for l in listings])
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        filter_by_location(listings, 'Lyon', '69', rejects=rejects)
+    stats = rejects.get_stats()
+    print(f"  {rejects.summary()}")
+    print(f"  Par site: {stats['by_site']}")
+
+    examples = stats['examples']['pipeline']['out_of_department']
+    return (
+        no_price and wrong_dept
+        and stats['by_stage']['scraper'] == {'no_price': 1, 'wrong_department': 1}
+        and stats['examples']['scraper']['wrong_department'][0]['detail'] == '13!=69'
+        and stats['by_stage']['pipeline'] == {'agency': 1, 'out_of_department': 10}
+        and stats['by_site']['pap']['location'] == {'out_of_department': 10}
+        and len(examples) == 2 and all(e['detail'] == '13!=69' for e in examples)
+        and stats['total'] == 23
+        and 'Exclu' not in output.getvalue()
+    )
+
+
+def test_write_behind():
+    """Teste la file d'écriture différée: lots, backpressure, relances idempotentes, drain."""
+    print("\n" + "=" * 60)
+    print("TEST ÉCRITURE DIFFÉRÉE")
+    print("=" * 60)
+
+    import contextlib
+    import io
+    import threading
+    import time
+    from database import InsertResult, WriteBehindQueue
+    from utils import Listing
+
+    stored = {}  # (user_id, clé) -> nombre d'écritures
+    calls = []
+    failures = [2]  # Deux lots échouent après une écriture partielle
+
+    def upsert(user_id, listings):
+        time.sleep(0.01)  # Base lente
+        calls.append(len(listings))
+        added = 0
+        for n, listing in enumerate(listings):
+            if failures[0] and n == len(listings) // 2:
+                failures[0] -= 1
+                raise Exception("Supabase 503: timeout")
+            key = (user_id, listing.key)
+            if key not in stored:
+                stored[key] = 1
+                added += 1
+        return InsertResult(added=added, duplicates=len(listings) - added)
+
+    writer = WriteBehindQueue(upsert, batch_size=50, interval=0.05, max_pending=20, retries=3, retry_delay=0.01)
+    listings = [Listing(titre=f'Maison {n}', prix=100000 + n, lien=f'https://www.pap.fr/annonces/m-r{100000 + n}')
+                for n in range(300)]
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        producer = threading.Thread(target=writer.put, args=('alice', listings[:200]))
+        producer.start()
+        writer.put('bob', listings[200:])
+        producer.join()
+        drained = writer.drain(timeout=10)
+    stats = writer.get_stats()
+    alice, bob = writer.take_result('alice'), writer.take_result('bob')
+    print(f"  Lots: {calls}")
+    print(f"  alice: {alice}, bob: {bob}")
+    print(f"  {stats}")
+    writer.close()
+
+    return (
+        drained and stats['pending'] == 0
+        and len(stored) == 300 and set(stored.values()) == {1}
+        and max(calls) <= 50
+        and stats['retries'] == 2 and stats['failed'] == 0
+        and stats['blocked'] >= 1 and stats['max_pending'] >= 100
+        and alice['failed'] == bob['failed'] == 0
+        and alice['added'] + alice['duplicates'] == 200 and bob['added'] + bob['duplicates'] == 100
+        and 'flush_ms' in stats
+    )
+
+
+def test_presence():
+    """Teste le suivi des annonces revues et la détection des annonces retirées."""
+    print("\n" + "=" * 60)
+    print("TEST ANNONCES REVUES / RETIRÉES")
+    print("=" * 60)
+
+    import contextlib
+    import io
+    from database import DatabaseManager
+    from scrapers.pap import PapScraper
+    from scrapers.presence import PresenceTracker
+
+    links = [f'https://www.pap.fr/annonces/maison-r{100000 + n}' for n in range(5)]
+    tracker = PresenceTracker(removed_after=2)
+    runs = [
+        tracker.observe('alice:lyon:10', 'pap', links),
+        tracker.observe('alice:lyon:10', 'pap', links[:3] + [links[3] + '?xtor=1']),  # r100004 absente
+        tracker.observe('bob:lyon:10', 'pap', links[:1]),  # autre recherche: indépendante
+        tracker.observe('alice:lyon:10', 'pap', links[:4]),  # absente 2 fois: retirée
+        tracker.observe('alice:lyon:10', 'pap', links[:4]),
+    ]
+    print(f"  Retirées par passage: {runs}, {tracker.get_stats()}")
+
+    # Passage complet seulement sans erreur ni arrêt anticipé
+    complete = PapScraper()
+    complete._should_stop_pagination(1, links)
+    failed = PapScraper()
+    failed._should_stop_pagination(1, links)
+    failed._truncated = True
+    print(f"  Passage complet: {complete.complete_run}, après erreur: {failed.complete_run}")
+
+    # Balayage un passage sur 3 (répété tant qu'aucun passage complet n'est observé)
+    sweeper = PresenceTracker(sweep_every=3)
+    plans = [sweeper.plan_run('alice:lyon:10', 'pap') for _ in range(4)]
+    sweeper.observe('alice:lyon:10', 'pap', links)
+    plans.append(sweeper.plan_run('alice:lyon:10', 'pap'))
+
+    # Page entièrement connue: arrêt par le watermark, sauf en balayage
+    from scrapers.watermark import SiteWatermark
+    known = SiteWatermark()
+    known.record(links, 'empreinte')
+    stopped, swept = PapScraper(), PapScraper()
+    for scraper, sweep in ((stopped, False), (swept, True)):
+        scraper._sweep = sweep
+        scraper._watermark = known
+        scraper._should_stop_pagination(2, links)
+    print(f"  Balayages: {plans}, complet: watermark {stopped.complete_run}, balayage {swept.complete_run}")
+
+    # Base: une requête pour toutes les annonces revues, lots PATCH sans la fonction SQL
+    calls = []
+
+    def api_request(method, table, params=None, data=None, prefer=None):
+        calls.append((method, table, params, data))
+        if table == 'rpc/touch_listings' and len(calls) > 1:
+            raise Exception("Supabase 404: function not found")
+        return 3 if table.startswith('rpc/') else [{'id': n} for n in range(len(params.get('url', params['url_key']).split(',')))]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = DatabaseManager()
+    db.connected = True
+    db._api_request = api_request
+    keys = [f'pap:{n}' for n in range(250)] + ['exemple.fr/a?b="c"']
+    with contextlib.redirect_stdout(io.StringIO()):
+        touched_rpc = db.touch_listings('u1', keys[:3])
+        touched_fallback = db.touch_listings('u1', keys)
+        removed = db.mark_listings_removed('u1', ['pap:100004'])
+    patches = [c for c in calls if c[0] == 'PATCH']
+    with contextlib.redirect_stdout(io.StringIO()):
+        touched_legacy = db.touch_listings('u1', keys[:1], links[:2])  # Lignes sans url_key: par url
+    print(f"  touch RPC: {touched_rpc}, par lots: {touched_fallback} en {len(patches) - 1} requêtes, retirées: {removed}")
+
+    legacy = [c for c in calls if c[0] == 'PATCH'][-1]
+    return (
+        runs == [[], [], [], ['pap:100004'], []]
+        and complete.complete_run and not failed.complete_run
+        and plans == [False, False, True, True, False]
+        and not stopped.complete_run and swept.complete_run
+        and calls[0][3]['p_urls'] == []
+        and touched_legacy == 3 and legacy[2]['url_key'] == 'is.null' and 'url' in legacy[2]
+        and touched_rpc == 3 and touched_fallback == 251 and removed == 1
+        and len(patches) == 3 and patches[1][2]['url_key'].endswith('"exemple.fr/a?b=\\"c\\""' + ')')
+        and patches[0][3]['removed_at'] is None
+        and patches[2][2]['removed_at'] == 'is.null'
+    )
+
+
+def test_url_key_backfill():
+    """Teste le calcul de url_key des annonces enregistrées avant la colonne."""
+    print("\n" + "=" * 60)
+    print("TEST MIGRATION URL_KEY")
+    print("=" * 60)
+
+    import contextlib
+    import io
+    from database import DatabaseManager
+
+    rows = [{'id': f'{n:03d}', 'url': f'https://www.pap.fr/annonces/maison-r{412345000 + n}'} for n in range(5)]
+    rows[2]['url'] = rows[1]['url'] + '?xtor=1'  # Doublon ancien: clé déjà prise
+    rows[4]['url'] = None
+    keys = {}
+
+    def api_request(method, table, params=None, data=None, prefer=None):
+        if method == 'GET':
+            after = params.get('id', 'gt.').split('.', 1)[1]
+            pending = [r for r in rows if r['id'] > after and r['id'] not in keys]
+            return pending[:int(params['limit'])]
+        if data['url_key'] in keys.values():
+            raise Exception("Supabase 409: duplicate key value violates unique constraint")
+        keys[params['id'][3:]] = data['url_key']
+        return []
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = DatabaseManager()
+    db.connected = True
+    db._api_request = api_request
+    counts = db.backfill_url_keys(batch_size=2)
+    print(f"  {counts}, clés: {keys}")
+
+    return (
+        counts == {'updated': 3, 'conflicts': 1, 'failed': 1}
+        and keys == {'000': 'pap:412345000', '001': 'pap:412345001', '003': 'pap:412345003'}
+    )
+
+
+def test_shared_fetch():
+    """Teste le fetch partagé entre deux utilisateurs dont l'index des vues diffère."""
+    print("\n" + "=" * 60)
+    print("TEST FETCH PARTAGÉ ENTRE UTILISATEURS")
+    print("=" * 60)
+
+    import tempfile
+    import threading
+    import time
+    from concurrent.futures import Future
+    from scrapers.pap import PapScraper
+    from scrapers.result_cache import ResultCache, fetch_shared
+    from scrapers.seen_index import seen_index
+    from scrapers.singleflight import SingleFlight
+
+    links = ['https://www.pap.fr/annonces/maison-r1', 'https://www.pap.fr/annonces/maison-r2']
+    key = ('pap', 'lyon', 10)
+
+    def run(leader, follower):
+        """Deux jobs simultanés: leader lance le fetch, follower le rejoint."""
+        cache, flight, calls, results = ResultCache(), SingleFlight(), [], {}
+
+        def make_scraper(user):
+            scraper = PapScraper()
+            scraper.use_seen_index(user)
+
+            def scrape(ville, rayon, max_pages=None):
+                calls.append(user)
+                deadline = time.time() + 5
+                while time.time() < deadline and key in flight._calls and flight._calls[key].consumers < 2:
+                    time.sleep(0.01)
+                page = Future()
+                page.set_result([make_listing(lien=link, titre=link[-2:]) for link in links])
+                accepted = []
+                scraper._accept_page(1, page, {'ville': ville}, accepted, enrich=False)
+                return accepted
+
+            scraper.scrape = scrape
+            return scraper
+
+        def job(user):
+            listings, shared = fetch_shared(make_scraper(user), 'Lyon', 10, 1, user_id=user, cache=cache, flight=flight)
+            results[user] = ([l['titre'] for l in listings], shared)
+
+        first = threading.Thread(target=job, args=(leader,))
+        first.start()
+        while key not in flight._calls:
+            time.sleep(0.01)
+        second = threading.Thread(target=job, args=(follower,))
+        second.start()
+        first.join()
+        second.join()
+        cached = cache.get('pap', 'lyon', 10, ttl_minutes=5)
+        return results, calls, cached and [l['titre'] for l in cached.listings]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seen_index.index_dir = tmp
+        try:
+            seen_index.add('alice', links[:1])
+            # Fetch filtré par l'index d'alice: ni partagé ni mis en cache, bob refait le sien
+            filtered, filtered_calls, filtered_cache = run('alice', 'bob')
+            # Fetch de bob (rien d'écarté): partagé, puis filtré par l'index d'alice
+            clean, clean_calls, clean_cache = run('bob', 'alice')
+        finally:
+            seen_index.close()
+            seen_index.index_dir = ''
+    print(f"  alice d'abord: {filtered} (fetchs: {filtered_calls}, cache: {filtered_cache})")
+    print(f"  bob d'abord: {clean} (fetchs: {clean_calls}, cache: {clean_cache})")
+
+    return (
+        filtered == {'alice': (['r2'], False), 'bob': (['r1', 'r2'], False)}
+        and filtered_calls == ['alice', 'bob'] and filtered_cache == ['r1', 'r2']
+        and clean == {'bob': (['r1', 'r2'], False), 'alice': (['r2'], True)}
+        and clean_calls == ['bob'] and clean_cache == ['r1', 'r2']
+    )
+
+
+def test_blocked_backoff():
+    """Teste le même backoff 403/429 pour les pages de résultats et les autres requêtes."""
+    print("\n" + "=" * 60)
+    print("TEST BACKOFF 403/429")
+    print("=" * 60)
+
+    from types import SimpleNamespace
+    from scrapers.pap import PapScraper
+
+    events = []
+
+    class Limiter:
+        def __init__(self):
+            self.open = False
+
+        def record_failure(self, status_code=None):
+            events.append(('failure', status_code))
+
+        def record_success(self):
+            pass
+
+        def should_stop(self):
+            return self.open
+
+        def reserve(self, min_delay=0.0):
+            return 0.0
+
+    class Session:
+        def __init__(self, status):
+            self.status = status
+
+        def get(self, url, timeout=None):
+            return SimpleNamespace(status_code=self.status)
+
+    scraper = PapScraper()
+    scraper._rate_limiter = Limiter()
+    scraper._timer = SimpleNamespace(
+        wait_after_error=lambda code, attempt=1: events.append(('pause', code)),
+        next_delay=lambda: 0.0,
+    )
+    scraper._fetch_page = lambda session, url, timeout: (session.get(url), None)
+
+    url = 'https://www.pap.fr/annonce/vente-maisons-lyon'
+    results = []
+    for status in (403, 429):
+        results.append(scraper._request_page(Session(status), url, {}))
+        results.append(scraper._make_request(Session(status), url))
+    paged = list(events)
+
+    # Circuit ouvert: pas de pause inutile
+    events.clear()
+    scraper._rate_limiter.open = True
+    scraper._request_page(Session(403), url, {})
+    print(f"  Événements: {paged}, circuit ouvert: {events}")
+
+    return (
+        results == [None] * 4
+        and paged == [('failure', 403), ('pause', 403)] * 2 + [('failure', 429)] * 2
+        and events == [('failure', 403)]
+        and not scraper.complete_run
+    )
+
+
+def test_http_cache():
+    """Teste le cache HTTP conditionnel: headers, 304, corps inchangé, éviction."""
+    print("\n" + "=" * 60)
+    print("TEST CACHE HTTP CONDITIONNEL")
+    print("=" * 60)
+
+    import os
+    import tempfile
+    import time
+    from types import SimpleNamespace
+    from scrapers.http_cache import HttpCache, http_cache
+    from scrapers.pap import PapScraper
+
+    url = 'https://www.pap.fr/annonce/vente-maisons-lyon'
+    listings = [{'lien': 'https://www.pap.fr/annonces/maison-r1', 'titre': 'Maison'}]
+    validators = {'ETag': '"v1"', 'Last-Modified': 'Mon, 12 Oct 2026 08:00:00 GMT'}
+
+    def response(status, content=b'', headers=None):
+        return SimpleNamespace(status_code=status, content=content, headers=headers or {})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HttpCache(tmp, max_pages=2)
+        before = cache.conditional_headers(url)
+        cache.store(url, response(200, b'<html>v1</html>', validators), listings, 12.5, parser_version=1)
+        headers = cache.conditional_headers(url, parser_version=1)
+        other_parser = cache.conditional_headers(url, parser_version=2)
+
+        not_modified = cache.lookup(url, response(304), parser_version=1)
+        same_body = cache.lookup(url, response(200, b'<html>v1</html>'), parser_version=1)
+        changed = cache.lookup(url, response(200, b'<html>v2</html>'), parser_version=1)
+        stale_parser = cache.lookup(url, response(304), parser_version=2)
+        print(f"  Headers: {headers}, autre parser: {other_parser}")
+        print(f"  304: {not_modified}, corps identique: {bool(same_body)}, modifié: {changed}")
+
+        # Éviction: au-delà de max_pages, les pages les plus anciennes sont supprimées
+        for n in range(2):
+            time.sleep(0.01)
+            cache.store(f'{url}?page={n + 2}', response(200, b'x'), [], 1.0)
+        evicted = cache.prune()
+        remaining = sorted(os.listdir(tmp))
+        stats = cache.get_stats()
+
+    # Scraper: 304 -> annonces du dernier passage, sans parsing
+    with tempfile.TemporaryDirectory() as tmp:
+        http_cache.cache_dir, http_cache.enabled = tmp, True
+        try:
+            scraper = PapScraper()
+            parsed = []
+
+            def parse(content, location):
+                parsed.append(content)
+                return [dict(l) for l in listings]
+
+            scraper._parse_listing_page = parse
+
+            class Session:
+                def get(self, url, timeout=None, headers=None):
+                    if headers and headers.get('If-None-Match') == validators['ETag']:
+                        return response(304)
+                    return response(200, b'<html>v1</html>', validators)
+
+            first = scraper._request_page(Session(), url, {}).result()
+            second = scraper._request_page(Session(), url, {}).result()
+            cache_stats = scraper.get_cache_stats()
+            complete_after_304 = not scraper._truncated
+
+            # 304 sans annonces en cache (page évincée): passage incomplet
+            for name in os.listdir(tmp):
+                os.remove(os.path.join(tmp, name))
+            evicted_page = scraper._request_page(SimpleNamespace(get=lambda *a, **k: response(304)), url, {})
+        finally:
+            http_cache.cache_dir, http_cache.enabled = '', False
+    print(f"  Scraper: {len(parsed)} parsing(s), {cache_stats}, 304 orphelin -> tronqué: {scraper._truncated}")
+
+    return (
+        before == {} and other_parser == {}
+        and headers == {'If-None-Match': '"v1"', 'If-Modified-Since': validators['Last-Modified']}
+        and not_modified.listings == listings and not_modified.bytes_saved == len(b'<html>v1</html>')
+        and same_body is not None and same_body.bytes_saved == 0
+        and changed is None and stale_parser is None
+        and evicted == 1 and len(remaining) == 2 and all(name.endswith('.json') for name in remaining)
+        and stats['not_modified'] == 1 and stats['unchanged_body'] == 1 and stats['evicted'] == 1
+        and first == second == listings and len(parsed) == 1
+        and cache_stats['cached_pages'] == 1 and complete_after_304
+        and evicted_page is None and scraper._truncated
+    )
+
+
 def main():
     """Lance tous les tests."""
     print("\n" + "=" * 60)
@@ -191,6 +1922,37 @@ def main():
     results.append(("Headers", test_headers()))
     results.append(("Timing", test_timing()))
     results.append(("Scrapers", test_scraper_init()))
+    results.append(("Parsing", test_parsing()))
+    results.append(("Watermark", test_watermark_stop()))
+    results.append(("Cache des résultats", test_result_cache()))
+    results.append(("Single-flight", test_singleflight()))
+    results.append(("Pool de navigateurs", test_browser_pool()))
+    results.append(("Politique de chargement", test_load_policy()))
+    results.append(("JSON embarqué", test_embedded_json()))
+    results.append(("Leboncoin __NEXT_DATA__", test_leboncoin_next_data()))
+    results.append(("Plan de sélecteurs", test_selector_plan()))
+    results.append(("Extraction texte", test_extraction()))
+    results.append(("Pagination pipeline", test_pagination()))
+    results.append(("Backoff 403/429", test_blocked_backoff()))
+    results.append(("Cache HTTP conditionnel", test_http_cache()))
+    results.append(("Pool de parsing", test_parse_pool()))
+    results.append(("Archive HTML", test_page_archive()))
+    results.append(("Specs de sites", test_site_specs()))
+    results.append(("Pages de détail", test_detail_fetcher()))
+    results.append(("Circuit breaker partagé", test_shared_circuit_breaker()))
+    results.append(("Rythme partagé listes / détails", test_shared_site_pacer()))
+    results.append(("Validation fusionnée", test_listing_pipeline()))
+    results.append(("Mots-clés agences", test_keyword_matcher()))
+    results.append(("Quasi-doublons", test_near_duplicates()))
+    results.append(("Doublons photo", test_photo_matcher()))
+    results.append(("Index des annonces vues", test_seen_index()))
+    results.append(("Fetch partagé entre utilisateurs", test_shared_fetch()))
+    results.append(("URLs canoniques", test_canonical_url()))
+    results.append(("Enregistrement Listing", test_listing_record()))
+    results.append(("Registre des rejets", test_reject_registry()))
+    results.append(("Écriture différée", test_write_behind()))
+    results.append(("Annonces revues / retirées", test_presence()))
+    results.append(("Migration url_key", test_url_key_backfill()))
 
     print("\n" + "=" * 60)
     print("RÉSUMÉ")
@@ -1,12 +1,29 @@
 from .validator import (
     validate_listing,
+    validation_error,
+    ListingPipeline,
     deduplicate_by_url,
     deduplicate_by_signature,
     is_agency,
+    agency_keyword,
     filter_agencies,
     filter_by_location,
     extract_department
 )
+from .keywords import (
+    KeywordMatcher,
+    agency_matcher
+)
+from .canonical_url import (
+    canonical_url,
+    listing_key
+)
+from .listing import Listing
+from .extraction import (
+    ListingFields,
+    extract_fields,
+    find_postal_code
+)
 from .geolocation import (
     GeoLocation,
     geo,
@@ -16,12 +33,23 @@ from .geolocation import (
 
 __all__ = [
     'validate_listing',
+    'validation_error',
+    'ListingPipeline',
     'deduplicate_by_url',
     'deduplicate_by_signature',
     'is_agency',
+    'agency_keyword',
+    'KeywordMatcher',
+    'agency_matcher',
+    'canonical_url',
+    'listing_key',
+    'Listing',
     'filter_agencies',
     'filter_by_location',
     'extract_department',
+    'ListingFields',
+    'extract_fields',
+    'find_postal_code',
     'GeoLocation',
     'geo',
     'get_location_info',
@@ -0,0 +1,85 @@
+"""
+Clé canonique des URLs d'annonces (identité stable d'une annonce).
+
+Une même annonce arrive sous plusieurs URLs: paramètres de suivi
+(utm_*, xtor...), http ou https, www ou non, slash final, et formes
+propres à chaque site (leboncoin /ad/ventes_immobilieres/123 et
+/ventes_immobilieres/123.htm). Comparer les liens bruts crée de fausses
+"nouvelles" annonces.
+
+- Sites connus: l'identifiant stable de l'annonce est extrait de l'URL
+  -> "leboncoin:2412345678"
+- Autres URLs (ou identifiant introuvable): URL normalisée sans schéma,
+  www, fragment, slash final ni paramètres de suivi, paramètres restants
+  triés -> "exemple.fr/annonce/42?id=7"
+
+Usage:
+    canonical_url('https://www.leboncoin.fr/ventes_immobilieres/2412345678.htm?utm_source=x')
+    # 'leboncoin:2412345678'
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Identifiant stable de l'annonce, par domaine (premier groupe capturé)
+AD_ID_PATTERNS: Dict[str, tuple] = {
+    'leboncoin.fr': ('leboncoin', re.compile(r'/(?:ad/[\w-]+/|ventes_immobilieres/|vi/)(\d{6,})')),
+    'pap.fr': ('pap', re.compile(r'-r(\d{5,})(?:\.html?)?$')),
+    'paruvendu.fr': ('paruvendu', re.compile(r'/(\d{8,}[A-Z0-9]*)$')),
+    'entreparticuliers.com': ('entreparticuliers', re.compile(r'/annonces?/.*?(\d{5,})(?:\.html?)?$')),
+    'moteurimmo.fr': ('moteurimmo', re.compile(r'/annonce/([\w-]+)$')),
+    'immobilier.lefigaro.fr': ('figaro', re.compile(r'(\d{6,})\.html?$')),
+    'explorimmo.com': ('figaro', re.compile(r'(\d{6,})\.html?$')),
+    'facebook.com': ('facebook', re.compile(r'/marketplace/item/(\d+)')),
+}
+
+# Paramètres de suivi ignorés (préfixes)
+TRACKING_PARAMS = ('utm_', 'xtor', 'at_', 'gclid', 'fbclid', 'msclkid', 'ref', 'from', 'origin', 'source', 'ksclid')
+
+# Sous-domaines sans signification pour l'identité
+_HOST_PREFIX_RE = re.compile(r'^(?:www\d*|m)\.')
+
+
+def _site_pattern(host: str) -> Optional[tuple]:
+    """Règle du domaine (ou d'un domaine parent)."""
+    while host:
+        rule = AD_ID_PATTERNS.get(host)
+        if rule is not None:
+            return rule
+        _, _, host = host.partition('.')
+        if '.' not in host:
+            return AD_ID_PATTERNS.get(host)
+    return None
+
+
+@lru_cache(maxsize=65536)
+def canonical_url(url: str) -> str:
+    """Clé canonique d'une URL d'annonce ('' si l'URL est vide)."""
+    url = (url or '').strip()
+    if not url:
+        return ''
+
+    parts = urlsplit(url if '//' in url else f'//{url}')
+    host = _HOST_PREFIX_RE.sub('', (parts.hostname or '').lower())
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/')
+
+    rule = _site_pattern(host)
+    if rule is not None:
+        site, pattern = rule
+        match = pattern.search(path)
+        if match:
+            return f"{site}:{match.group(1)}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    )
+    key = f"{host}{path}"
+    return f"{key}?{urlencode(query)}" if query else key
+
+
+def listing_key(listing: dict) -> str:
+    """Clé canonique d'une annonce (url_key déjà calculée, sinon depuis le lien)."""
+    return listing.get('url_key') or canonical_url(listing.get('lien', ''))
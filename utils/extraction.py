@@ -0,0 +1,157 @@
+"""
+Extraction des champs d'une annonce depuis son texte (motifs précompilés).
+
+Code postal, ville, prix, surface et pièces sont extraits en un seul
+parcours du texte: une alternation de motifs ancrés sur les chiffres,
+chaque champ gardant sa première occurrence (comme les re.search
+successifs qu'elle remplace, sauf qu'un code postal doit être un nombre
+de 5 chiffres isolé et qu'un prix ne déborde plus sur le nombre qui le
+précède: "T3 250 000 €" donne 250000 et non 3250000).
+
+Usage:
+    fields = extract_fields(ad.get_text())
+    fields.localisation  # "Lyon 3E (69003)"
+    fields.surface, fields.pieces, fields.prix
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# Caractères d'un nom de ville ("Paris 17E", "L'Isle-d'Abeau")
+_CITY_CHARS = r"A-Za-zÀ-ÿ0-9\s\-'"
+
+# Code postal seul (5 chiffres)
+CP_RE = re.compile(r'\b(\d{5})\b')
+
+# Montant suivi de € (recherche d'un nœud texte de prix)
+PRICE_TEXT_RE = re.compile(r'[\d\s]+€')
+
+_NON_DIGIT_RE = re.compile(r'[^\d]')
+
+# Parcours unique, ancré sur le premier caractère d'un champ (chiffre, "(", T/F):
+# le moteur saute directement aux positions candidates. Le premier chiffre
+# est consommé avant les branches, d'où les valeurs relues via match.start().
+# Le code postal (et "12345 Ville") est capturé en lookahead pour ne pas
+# masquer le prix ou le nombre qui commence au même endroit.
+_FIELDS_RE = re.compile(r"""
+    [\d(TFtf]
+    (?:
+        (?<=\()(?P<cp_paren>\d{5})\)
+      | (?<=[TFtf])(?P<type>\d+)
+      | (?<=\d)
+        (?:(?<!\w\d)(?=\d{4}(?!\d)(?P<cp>)(?:\s+(?P<city_after>[A-Za-zÀ-ÿ][A-Za-zÀ-ÿ\s\-']+))?))?
+        (?:
+            (?P<surface>\d*)\s*[mM][²2]
+          | (?P<pieces>\d*)\s*(?i:pièces?)
+          | (?P<price>[\d\s]*)€
+          | \d*
+        )
+    )
+""", re.X)
+
+# Nom de ville qui précède "(12345)", lu à l'envers depuis la parenthèse
+_CITY_BEFORE_RE = re.compile(f'[{_CITY_CHARS}]*')
+_LETTER_RE = re.compile(r'[A-Za-zÀ-ÿ]')
+
+
+@dataclass
+class ListingFields:
+    """Champs extraits du texte d'une annonce."""
+
+    cp: Optional[str] = None  # Premier code postal du texte
+    ville: Optional[str] = None  # Ville associée à loc_cp
+    loc_cp: Optional[str] = None
+    loc_source: Optional[str] = None  # 'pattern_ville_cp' ou 'pattern_cp_ville'
+    prix: int = 0
+    surface: Optional[int] = None
+    pieces: Optional[int] = None
+
+    @property
+    def localisation(self) -> Optional[str]:
+        """"Ville (12345)", ou None si aucun couple ville/code postal."""
+        if self.ville and self.loc_cp:
+            return f"{self.ville} ({self.loc_cp})"
+        return None
+
+
+def _city_before(text: str, end: int) -> Optional[str]:
+    """Nom de ville juste avant la position end (doit commencer par une lettre)."""
+    run = _CITY_BEFORE_RE.match(text[:end][::-1]).group()[::-1]
+    letter = _LETTER_RE.search(run)
+    if not letter:
+        return None
+    return run[letter.start():].strip()
+
+
+def extract_fields(text: str) -> ListingFields:
+    """
+    Extrait code postal, ville, prix, surface et pièces en un seul parcours.
+
+    Localisation par priorité: "Ville (12345)" puis "12345 Ville".
+
+    Args:
+        text: Texte de l'annonce (titre, description, carte...)
+
+    Returns:
+        ListingFields (champs à None / 0 si absents)
+    """
+    fields = ListingFields()
+    if not text:
+        return fields
+
+    city_after = None  # Premier "12345 Ville" (utilisé si aucun "Ville (12345)")
+
+    for match in _FIELDS_RE.finditer(text):
+        start = match.start()
+        if match.group('cp_paren'):
+            cp = match.group('cp_paren')
+            if fields.cp is None:
+                fields.cp = cp
+            if fields.loc_source is None:
+                ville = _city_before(text, start)
+                if ville:
+                    fields.ville, fields.loc_cp, fields.loc_source = ville, cp, 'pattern_ville_cp'
+            continue
+
+        if match.group('type') is not None:
+            if fields.pieces is None:
+                fields.pieces = int(match.group('type'))
+            continue
+
+        if match.group('cp') is not None:
+            cp = text[start:start + 5]
+            if fields.cp is None:
+                fields.cp = cp
+            if city_after is None and match.group('city_after'):
+                city_after = (match.group('city_after').strip(), cp)
+
+        if match.group('surface') is not None:
+            if fields.surface is None:
+                fields.surface = int(text[start:match.end('surface')])
+        elif match.group('pieces') is not None:
+            if fields.pieces is None:
+                fields.pieces = int(text[start:match.end('pieces')])
+        elif match.group('price') is not None:
+            if not fields.prix:
+                fields.prix = parse_price(text[start:match.end('price')])
+
+    if fields.loc_source is None and city_after:
+        fields.ville, fields.loc_cp = city_after
+        fields.loc_source = 'pattern_cp_ville'
+
+    return fields
+
+
+def parse_price(text) -> int:
+    """Prix en euros depuis du texte ("250 000 €" → 250000), 0 si absent."""
+    digits = _NON_DIGIT_RE.sub('', str(text))
+    return int(digits) if digits else 0
+
+
+def find_postal_code(text: str) -> Optional[str]:
+    """Premier code postal (5 chiffres) d'un texte, ou None."""
+    if not text:
+        return None
+    match = CP_RE.search(text)
+    return match.group(1) if match else None
@@ -3,10 +3,11 @@ Validation GPS des annonces.
 Vérifie que les annonces sont dans le rayon demandé.
 """
 
-import re
 from math import radians, cos, sin, asin, sqrt
 from typing import Optional, Tuple, List, Dict, Any
 from .geolocation import geo
+from .extraction import find_postal_code
+from .rejects import RejectRegistry
 
 
 def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -42,15 +43,7 @@ def extract_postal_code(text: str) -> Optional[str]:
     Returns:
         Code postal ou None
     """
-    if not text:
-        return None
-
-    # Pattern: 5 chiffres
-    match = re.search(r'\b(\d{5})\b', text)
-    if match:
-        return match.group(1)
-
-    return None
+    return find_postal_code(text)
 
 
 def validate_listing_location(
@@ -119,7 +112,8 @@ def filter_listings_by_radius(
     target_lat: float,
     target_lon: float,
     max_radius_km: int,
-    strict: bool = False
+    strict: bool = False,
+    rejects: Optional[RejectRegistry] = None
 ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
     """
     Filtre les annonces par distance GPS.
@@ -130,6 +124,7 @@ def filter_listings_by_radius(
         target_lon: Longitude cible
         max_radius_km: Rayon maximum en km
         strict: Si True, rejette aussi les annonces sans CP
+        rejects: Registre du job où compter les annonces hors zone (optionnel)
 
     Returns:
         Tuple (filtered_listings, stats)
@@ -169,9 +164,10 @@ def filter_listings_by_radius(
             else:
                 stats['rejected_distance'] += 1
 
-            loc = listing.get('localisation', 'N/A')[:40]
-            dist_str = f"{distance}km" if distance else "?"
-            print(f"  ❌ Hors zone: {loc} ({dist_str})")
+            if rejects is not None:
+                # Un motif par distance ('outside_radius_42km') fragmenterait les compteurs
+                motif = 'outside_radius' if reason.startswith('outside_radius') else reason
+                rejects.record('radius', motif, listing, detail=f"{distance}km" if distance else None)
 
     # Résumé
     if stats['rejected_distance'] > 0 or stats['rejected_no_cp'] > 0:
@@ -0,0 +1,73 @@
+"""
+Recherche compilée d'une liste de mots-clés (détection des agences).
+
+Les mots-clés sont fusionnés en une seule expression régulière, factorisée
+par préfixes communs (trie: "immo", "immobilier" -> immo(?:bilier)?), et
+bornée aux limites de mots: "immo" ne correspond plus dans "immobilière",
+ni "sas" dans "Sassenage". Le pluriel et le féminin simples sont acceptés
+("agences", "professionnelle"). Le texte est parcouru une seule fois,
+quel que soit le nombre de mots-clés, et le mot-clé trouvé est renvoyé
+pour l'audit des rejets.
+
+Usage:
+    matcher = KeywordMatcher(['agence', 'immo'])
+    matcher.search("Agence du centre")   # 'agence'
+    matcher.search_fields(titre, description)
+"""
+
+import re
+from typing import Dict, Iterable, Optional
+
+from config import AGENCY_KEYWORDS
+
+# Pluriel / féminin acceptés après un mot-clé
+_SUFFIX = r'(?:e?s)?'
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Alternation factorisée par préfixes ("sarl|sas" -> sa(?:rl|s)); espaces souples."""
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node: dict) -> str:
+        branches = [
+            (r'\s+' if char == ' ' else re.escape(char)) + emit(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{pattern})?" if '' in node else pattern
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """Mots-clés compilés en une expression bornée aux mots (insensible à la casse)."""
+
+    def __init__(self, keywords: Iterable[str], suffix: str = _SUFFIX):
+        # Forme canonique (minuscules, espaces simples) -> mot-clé d'origine
+        self._keywords = {' '.join(k.lower().split()): k for k in keywords if k.strip()}
+        # Texte passé en minuscules avant la recherche: plus rapide que re.I
+        self._pattern = re.compile(rf"\b({_trie_pattern(self._keywords)}){suffix}\b") if self._keywords else None
+
+    def search(self, text: str) -> Optional[str]:
+        """Premier mot-clé présent dans le texte, ou None."""
+        if not text or self._pattern is None:
+            return None
+        match = self._pattern.search(text.lower())
+        if match is None:
+            return None
+        return self._keywords.get(' '.join(match.group(1).split()))
+
+    def search_fields(self, *texts: Optional[str]) -> Optional[str]:
+        """Premier mot-clé présent dans l'un des textes (un seul parcours)."""
+        return self.search('\n'.join(t for t in texts if t))
+
+
+# Détection des agences (config.AGENCY_KEYWORDS)
+agency_matcher = KeywordMatcher(AGENCY_KEYWORDS)
@@ -0,0 +1,145 @@
+"""
+Enregistrement compact d'une annonce (Listing).
+
+Les annonces circulaient en dictionnaires d'une vingtaine de clés, dont
+les métadonnées du pipeline (_geo_*, _scraper...) jetées avant
+l'insertion. Une faute de frappe sur une clé passait inaperçue.
+
+- Listing: champs de l'annonce en __slots__ (pas de dictionnaire par
+  instance, attribut inconnu = AttributeError)
+- meta: métadonnées du pipeline, à part (jamais envoyées en base)
+- from_dict / to_dict: conversion depuis et vers les annonces des scrapers
+- to_row / from_row: ligne de la table listings (colonnes anglaises)
+
+Usage:
+    listing = Listing.from_dict(scraped)
+    listing.prix, listing.meta['_geo_confidence']
+    db_row = listing.to_row(user_id)
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .canonical_url import canonical_url
+
+# Champs de l'annonce (ordre des dictionnaires produits par les scrapers)
+FIELDS = (
+    'titre', 'date_publication', 'prix', 'localisation', 'lien', 'site_source',
+    'photos', 'telephone', 'surface', 'pieces', 'description', 'sources', 'url_key',
+)
+_FIELD_SET = frozenset(FIELDS)
+
+# Champ de l'annonce -> colonne de la table listings
+ROW_COLUMNS = {
+    'titre': 'title',
+    'prix': 'price',
+    'localisation': 'location',
+    'lien': 'url',
+    'url_key': 'url_key',
+    'site_source': 'source',
+    'photos': 'photos',
+    'telephone': 'phone',
+    'surface': 'surface',
+    'pieces': 'rooms',
+    'description': 'description',
+    'sources': 'sources',
+    'date_publication': 'published_date',
+}
+_FIELD_OF_COLUMN = {column: field for field, column in ROW_COLUMNS.items()}
+
+
+class Listing:
+    """Annonce immobilière (voir le module)."""
+
+    __slots__ = FIELDS + ('meta',)
+
+    def __init__(
+        self,
+        titre: str = '',
+        prix: int = 0,
+        localisation: str = '',
+        lien: str = '',
+        site_source: str = '',
+        date_publication: Optional[str] = None,
+        photos: Optional[List[str]] = None,
+        telephone: Optional[str] = None,
+        surface: Optional[int] = None,
+        pieces: Optional[int] = None,
+        description: str = '',
+        sources: Optional[List[Dict[str, Any]]] = None,
+        url_key: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None
+    ):
+        self.titre = titre
+        self.date_publication = date_publication
+        self.prix = prix
+        self.localisation = localisation
+        self.lien = lien
+        self.site_source = site_source
+        self.photos = photos if photos is not None else []
+        self.telephone = telephone
+        self.surface = surface
+        self.pieces = pieces
+        self.description = description
+        self.sources = sources
+        self.url_key = url_key
+        self.meta = meta
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Listing':
+        """Annonce depuis un dictionnaire de scraper (clés hors FIELDS -> meta)."""
+        listing = cls(**{key: value for key, value in data.items() if key in _FIELD_SET})
+        meta = {key: value for key, value in data.items() if key not in _FIELD_SET}
+        listing.meta = meta or None
+        return listing
+
+    def to_dict(self, meta: bool = False) -> Dict[str, Any]:
+        """Dictionnaire de l'annonce (avec les métadonnées du pipeline si meta=True)."""
+        data = {name: getattr(self, name) for name in FIELDS}
+        if meta and self.meta:
+            data.update(self.meta)
+        return data
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> 'Listing':
+        """Annonce depuis une ligne de la table listings (id, status, dates... -> meta)."""
+        listing = cls(**{_FIELD_OF_COLUMN[column]: value for column, value in row.items()
+                         if column in _FIELD_OF_COLUMN and value is not None})
+        meta = {column: value for column, value in row.items() if column not in _FIELD_OF_COLUMN}
+        listing.meta = meta or None
+        return listing
+
+    def to_row(self, user_id: str, now: Optional[str] = None) -> Dict[str, Any]:
+        """Ligne à insérer dans la table listings (métadonnées exclues)."""
+        now = now or datetime.now().isoformat()
+        row = {column: getattr(self, field) for field, column in ROW_COLUMNS.items()}
+        row.update({
+            'user_id': user_id,
+            'hash': hashlib.md5(f"{self.titre}_{self.prix}".encode()).hexdigest(),
+            'url_key': self.key,
+            'description': self.description or '',
+            'status': 'Nouveau',
+            'created_at': now,
+            'last_seen_at': now,
+        })
+        return row
+
+    @property
+    def key(self) -> str:
+        """Clé canonique de l'annonce (voir canonical_url.py)."""
+        return self.url_key or canonical_url(self.lien)
+
+    def source_links(self) -> List[str]:
+        """Liens de l'annonce et de ses quasi-doublons fusionnés."""
+        if not self.sources:
+            return [self.lien]
+        return [source['lien'] for source in self.sources]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Listing):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"Listing({self.site_source!r}, {self.titre!r}, {self.prix!r}, {self.lien!r})"
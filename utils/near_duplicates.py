@@ -0,0 +1,256 @@
+"""
+Regroupement des quasi-doublons entre sites (MinHash + LSH).
+
+Un même bien est publié sur pap, leboncoin et paruvendu avec des titres
+et des prix légèrement différents: la signature exacte (md5 de
+titre + prix + localisation) ne les rapproche pas.
+
+1. Titre, localisation et début de description sont normalisés (casse,
+   accents, ponctuation, "120m2" -> "120 m2") puis découpés en mots,
+   sans les mots vides ("avec", "pièces"...): l'ordre et la tournure
+   du titre changent d'un site à l'autre, pas son vocabulaire
+2. Chaque annonce reçoit une signature MinHash (NUM_PERM minimums)
+3. L'index LSH (BANDS bandes de ROWS valeurs) ne propose que les annonces
+   partageant une bande: pas de comparaison de toutes les paires
+4. Chaque candidat est confirmé: similarité estimée, prix et surface dans
+   les tolérances, même nombre de pièces, même département
+5. Chaque groupe devient une annonce canonique (la plus complète, champs
+   manquants complétés par les autres) qui liste toutes ses sources
+
+Usage:
+    merger = NearDuplicateMerger()
+    listings = merger.merge(listings)
+    listings[0]['sources']  # [{'site_source': 'pap.fr', 'lien': ..., 'prix': ...}, ...]
+"""
+
+import random
+import re
+import unicodedata
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .validator import extract_department
+
+# Mots ignorés (tournures des titres, unités)
+STOP_WORDS = frozenset({
+    'a', 'au', 'aux', 'avec', 'd', 'de', 'des', 'du', 'en', 'et', 'l', 'la', 'le', 'les',
+    'un', 'une', 'vend', 'vends', 'vente', 'piece', 'pieces', 'p', 'm', 'm2', 't',
+})
+# Caractères de description pris en compte (souvent vide sur les pages de résultats)
+DESCRIPTION_CHARS = 300
+
+# MinHash: 64 permutations en 16 bandes de 4 (seuil LSH ≈ (1/16)^(1/4) ≈ 0.5)
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Similarité de Jaccard estimée minimale d'un doublon confirmé
+SIMILARITY_THRESHOLD = 0.5
+
+# Tolérances de confirmation
+PRICE_TOLERANCE = 0.05  # 5% d'écart de prix
+SURFACE_TOLERANCE = 0.05  # 5% d'écart de surface (au moins 2 m²)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+_DIGIT_LETTER_RE = re.compile(r'(?<=\d)(?=[a-z])|(?<=[a-z])(?=\d)')
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Minuscules sans accents ni ponctuation, chiffres séparés des lettres, espaces simples."""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = _NON_ALNUM_RE.sub(' ', text)
+    return _DIGIT_LETTER_RE.sub(' ', text).strip()
+
+
+def shingle_hashes(text: str) -> set:
+    """Hashes 32 bits des mots significatifs d'un texte normalisé."""
+    return {zlib.crc32(word.encode()) for word in text.split() if word not in STOP_WORDS}
+
+
+class MinHasher:
+    """Signatures MinHash: NUM_PERM permutations (a·h + b) mod p, déterministes."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, hashes: Iterable[int]) -> Tuple[int, ...]:
+        hashes = list(hashes)
+        if not hashes:
+            return ()
+        p = _MERSENNE_PRIME
+        return tuple(min([(a * h + b) % p for h in hashes]) for a, b in self._perms)
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        """Similarité de Jaccard estimée (part des minimums égaux)."""
+        if not sig_a or not sig_b:
+            return 0.0
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class LSHIndex:
+    """Index par bandes de signature: candidats = annonces partageant au moins une bande."""
+
+    def __init__(self, bands: int = BANDS, rows: int = ROWS):
+        self.bands = bands
+        self.rows = rows
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(bands)]
+
+    def query_and_insert(self, key: int, signature: Tuple[int, ...]) -> set:
+        """Candidats déjà indexés, puis ajoute la signature."""
+        candidates = set()
+        if not signature:
+            return candidates
+        for band, buckets in enumerate(self._buckets):
+            start = band * self.rows
+            bucket = buckets.setdefault(signature[start:start + self.rows], [])
+            candidates.update(bucket)
+            bucket.append(key)
+        return candidates
+
+
+def _within(a: Optional[float], b: Optional[float], tolerance: float, minimum: float = 0) -> bool:
+    """Valeurs proches (vrai si l'une est inconnue)."""
+    if not a or not b:
+        return True
+    return abs(a - b) <= max(tolerance * max(a, b), minimum)
+
+
+def _richness(listing: Dict[str, Any]) -> tuple:
+    """Annonce la plus complète d'abord: téléphone, photos, description, surface."""
+    return (
+        bool(listing.get('telephone')),
+        len(listing.get('photos') or []),
+        len(listing.get('description') or ''),
+        bool(listing.get('surface')),
+    )
+
+
+class NearDuplicateMerger:
+    """
+    Fusionne les quasi-doublons d'une liste d'annonces (voir le module).
+
+    Usage:
+        merger = NearDuplicateMerger()
+        merged = merger.merge(listings)
+        merger.get_stats()  # {'listings', 'candidates', 'confirmed', 'clusters', 'merged'}
+    """
+
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        price_tolerance: float = PRICE_TOLERANCE,
+        surface_tolerance: float = SURFACE_TOLERANCE,
+        num_perm: int = NUM_PERM,
+        bands: int = BANDS
+    ):
+        self.threshold = threshold
+        self.price_tolerance = price_tolerance
+        self.surface_tolerance = surface_tolerance
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self._stats = {'listings': 0, 'candidates': 0, 'confirmed': 0, 'clusters': 0, 'merged': 0}
+
+    def listing_text(self, listing: Dict[str, Any]) -> str:
+        """Texte comparé: titre, localisation et début de description normalisés."""
+        description = (listing.get('description') or '')[:DESCRIPTION_CHARS]
+        return normalize_text(f"{listing.get('titre', '')} {listing.get('localisation', '')} {description}")
+
+    def confirm(self, a: Dict[str, Any], b: Dict[str, Any], similarity: float) -> bool:
+        """Doublon confirmé: textes proches, prix et surface dans les tolérances, mêmes pièces et département."""
+        if similarity < self.threshold:
+            return False
+        if not _within(a.get('prix'), b.get('prix'), self.price_tolerance):
+            return False
+        if not _within(a.get('surface'), b.get('surface'), self.surface_tolerance, minimum=2):
+            return False
+        if a.get('pieces') and b.get('pieces') and a['pieces'] != b['pieces']:
+            return False
+        dept_a = extract_department(a.get('localisation', ''))
+        dept_b = extract_department(b.get('localisation', ''))
+        return not (dept_a and dept_b and dept_a != dept_b)
+
+    def clusters(self, listings: List[Dict[str, Any]]) -> List[List[int]]:
+        """
+        Groupes d'indices de quasi-doublons (chaque annonce dans exactement un groupe).
+
+        Une annonce rejoint le groupe candidat le plus similaire si elle est
+        confirmée contre la première annonce de ce groupe: pas de chaînage
+        A≈B≈C qui regrouperait des biens de plus en plus différents.
+        """
+        index = LSHIndex(self.bands, self.hasher.num_perm // self.bands)
+        signatures = []
+        seed_of: List[int] = []  # Première annonce du groupe de chaque annonce
+        groups: Dict[int, List[int]] = {}
+
+        for i, listing in enumerate(listings):
+            signature = self.hasher.signature(shingle_hashes(self.listing_text(listing)))
+            signatures.append(signature)
+            candidates = index.query_and_insert(i, signature)
+            self._stats['candidates'] += len(candidates)
+
+            # Groupes candidats, du plus similaire au moins similaire (comparés à leur première annonce)
+            seed = i
+            similarities = {s: MinHasher.similarity(signature, signatures[s]) for s in {seed_of[j] for j in candidates}}
+            for candidate_seed in sorted(similarities, key=similarities.get, reverse=True):
+                if self.confirm(listing, listings[candidate_seed], similarities[candidate_seed]):
+                    self._stats['confirmed'] += 1
+                    seed = candidate_seed
+                    break
+
+            seed_of.append(seed)
+            groups.setdefault(seed, []).append(i)
+
+        return list(groups.values())
+
+    @staticmethod
+    def canonical(group: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Annonce canonique d'un groupe: la plus complète, complétée par les autres, avec toutes les sources."""
+        best = max(group, key=_richness)
+        merged = dict(best)
+        for other in group:
+            for field in ('telephone', 'surface', 'pieces', 'description'):
+                if not merged.get(field) and other.get(field):
+                    merged[field] = other[field]
+
+        photos = []
+        for listing in [best] + [l for l in group if l is not best]:
+            photos.extend(p for p in listing.get('photos') or [] if p not in photos)
+        merged['photos'] = photos
+
+        merged['sources'] = [
+            {'site_source': l.get('site_source'), 'lien': l.get('lien'), 'prix': l.get('prix')}
+            for l in group
+        ]
+        return merged
+
+    def merge(self, listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Une annonce par bien, dans l'ordre de première apparition.
+
+        Les annonces sans doublon sont renvoyées telles quelles; les autres
+        sont remplacées par l'annonce canonique de leur groupe.
+        """
+        merged = []
+        for group in self.clusters(listings):
+            if len(group) == 1:
+                merged.append(listings[group[0]])
+            else:
+                merged.append(self.canonical([listings[i] for i in group]))
+                self._stats['clusters'] += 1
+                self._stats['merged'] += len(group) - 1
+
+        self._stats['listings'] += len(listings)
+        return merged
+
+    def get_stats(self) -> Dict[str, int]:
+        """Annonces traitées, candidats LSH, doublons confirmés, groupes fusionnés."""
+        return dict(self._stats)
@@ -0,0 +1,112 @@
+"""
+Hash perceptuel des photos et recherche par distance de Hamming.
+
+Un même bien publié sur plusieurs sites réutilise les mêmes photos,
+redimensionnées ou recompressées: leurs hash perceptuels (64 bits)
+diffèrent de quelques bits seulement.
+
+- dhash: gradient horizontal d'une vignette 9x8 en niveaux de gris
+  (robuste aux changements de taille, de compression et de luminosité)
+- ahash: pixels d'une vignette 8x8 comparés à la moyenne
+- BKTree: recherche des hash à distance <= N sans tout parcourir
+
+Pillow est optionnel (PIL_AVAILABLE).
+
+Usage:
+    tree = BKTree()
+    tree.add(dhash(data), 'https://www.pap.fr/annonces/r1')
+    tree.find(dhash(other), max_distance=6)  # [(distance, 'https://...')]
+"""
+
+import io
+from typing import Any, List, Optional, Tuple
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+HASH_SIZE = 8  # 64 bits
+
+
+def _thumbnail(data: bytes, width: int, height: int):
+    """Vignette en niveaux de gris (décodage JPEG réduit quand c'est possible)."""
+    image = Image.open(io.BytesIO(data))
+    image.draft('L', (width * 8, height * 8))
+    return image.convert('L').resize((width, height), Image.BILINEAR)
+
+
+def dhash(data: bytes, size: int = HASH_SIZE) -> int:
+    """Hash de gradient: bit à 1 si un pixel est plus clair que son voisin de droite."""
+    pixels = _thumbnail(data, size + 1, size).tobytes()
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def ahash(data: bytes, size: int = HASH_SIZE) -> int:
+    """Hash moyen: bit à 1 si un pixel est plus clair que la moyenne de la vignette."""
+    pixels = _thumbnail(data, size, size).tobytes()
+    mean = sum(pixels) / len(pixels)
+    value = 0
+    for pixel in pixels:
+        value = (value << 1) | (pixel > mean)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    """Nombre de bits différents entre deux hash."""
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """
+    Arbre BK sur la distance de Hamming.
+
+    Chaque nœud range ses enfants par distance au nœud; une recherche à
+    distance <= N n'explore que les enfants dont la distance est dans
+    [d - N, d + N] (inégalité triangulaire).
+    """
+
+    def __init__(self):
+        self._root: Optional[list] = None  # [hash, valeur, {distance: nœud}]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item: Any):
+        """Ajoute un hash et la valeur associée (URL de l'annonce...)."""
+        self._size += 1
+        if self._root is None:
+            self._root = [value, item, {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, item, {}]
+                return
+            node = child
+
+    def find(self, value: int, max_distance: int) -> List[Tuple[int, Any]]:
+        """Valeurs dont le hash est à distance <= max_distance, les plus proches d'abord."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                found.append((distance, node[1]))
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda match: match[0])
+        return found
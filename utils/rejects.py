@@ -0,0 +1,141 @@
+"""
+Comptage des annonces rejetées, par étape, par site et par motif.
+
+Les rejets étaient affichés un par un ("❌ Exclu: ...", "❌ Hors zone: ...")
+ou perdus (motif de _should_reject_listing ignoré): lent sous gunicorn
+avec stdout non bufferisé et impossible à agréger. Un registre par job
+reçoit les rejets des scrapers et des filtres:
+- compteurs (étape, site, motif)
+- quelques exemples par compteur (échantillonnage réservoir: représentatifs
+  du job entier, pas seulement des premières pages)
+
+Un motif "motif:détail" (ex. "wrong_department:13!=69") est compté sous
+"motif", le détail est gardé dans l'exemple.
+
+Usage:
+    rejects = RejectRegistry()
+    rejects.record('scraper', 'no_price', listing, site='pap')
+    rejects.get_stats()  # {'total', 'by_stage', 'by_site', 'examples'}
+"""
+
+import os
+import random
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Exemples gardés par (étape, site, motif)
+REJECT_EXAMPLES = int(os.getenv('REJECT_EXAMPLES', 3))
+
+# Longueur maximale des champs d'un exemple
+_EXAMPLE_CHARS = 80
+
+
+def _site_of(listing: Optional[Dict[str, Any]]) -> str:
+    """Site d'une annonce (clé du scraper, sinon site_source)."""
+    if not listing:
+        return 'inconnu'
+    return listing.get('_scraper') or listing.get('site_source') or 'inconnu'
+
+
+class RejectRegistry:
+    """
+    Rejets d'un job de scraping (voir le module). Utilisable depuis plusieurs threads.
+
+    Usage:
+        rejects = RejectRegistry()
+        scraper.track_rejects(rejects)
+        pipeline = ListingPipeline(ville, departement, rejects=rejects)
+        results['rejects'] = rejects.get_stats()
+    """
+
+    def __init__(self, max_examples: int = REJECT_EXAMPLES, seed: int = 0):
+        self.max_examples = max_examples
+        self._counts: Dict[Tuple[str, str, str], int] = {}
+        self._examples: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        stage: str,
+        reason: str,
+        listing: Optional[Dict[str, Any]] = None,
+        site: Optional[str] = None,
+        detail: Optional[str] = None
+    ):
+        """Compte un rejet (et le garde peut-être comme exemple)."""
+        reason, _, suffix = reason.partition(':')
+        key = (stage, site or _site_of(listing), reason)
+        with self._lock:
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+            if listing is None or self.max_examples <= 0:
+                return
+            # Réservoir: le n-ième rejet remplace un exemple avec une probabilité k/n
+            examples = self._examples.setdefault(key, [])
+            if len(examples) < self.max_examples:
+                examples.append(self._example(listing, detail or suffix))
+            else:
+                slot = self._rng.randrange(count)
+                if slot < self.max_examples:
+                    examples[slot] = self._example(listing, detail or suffix)
+
+    def record_count(self, stage: str, reason: str, count: int, site: str = 'inconnu'):
+        """Compte des rejets en bloc (sans exemple)."""
+        if count <= 0:
+            return
+        key = (stage, site, reason)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + count
+
+    @staticmethod
+    def _example(listing: Dict[str, Any], detail: Optional[str]) -> Dict[str, Any]:
+        example = {
+            'titre': str(listing.get('titre') or '')[:_EXAMPLE_CHARS],
+            'localisation': str(listing.get('localisation') or '')[:_EXAMPLE_CHARS],
+            'prix': listing.get('prix'),
+            'lien': listing.get('lien'),
+        }
+        if detail:
+            example['detail'] = detail
+        return example
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            return sum(self._counts.values())
+
+    def summary(self) -> str:
+        """Rejets par étape et motif sur une ligne ("étape/motif: nombre")."""
+        by_reason: Dict[str, int] = {}
+        with self._lock:
+            for (stage, _, reason), count in self._counts.items():
+                name = f"{stage}/{reason}"
+                by_reason[name] = by_reason.get(name, 0) + count
+        if not by_reason:
+            return "aucun rejet"
+        return ', '.join(f"{name}: {count}" for name, count in sorted(by_reason.items(), key=lambda item: -item[1]))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Rejets du job.
+
+        Returns:
+            {'total': n,
+             'by_stage': {étape: {motif: n}},
+             'by_site': {site: {étape: {motif: n}}},
+             'examples': {étape: {motif: [exemples, tous sites confondus]}}}
+        """
+        by_stage: Dict[str, Dict[str, int]] = {}
+        by_site: Dict[str, Dict[str, Dict[str, int]]] = {}
+        examples: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        with self._lock:
+            for (stage, site, reason), count in sorted(self._counts.items()):
+                stage_counts = by_stage.setdefault(stage, {})
+                stage_counts[reason] = stage_counts.get(reason, 0) + count
+                by_site.setdefault(site, {}).setdefault(stage, {})[reason] = count
+                samples = self._examples.get((stage, site, reason))
+                if samples:
+                    examples.setdefault(stage, {}).setdefault(reason, []).extend(dict(s, site=site) for s in samples)
+            total = sum(self._counts.values())
+        return {'total': total, 'by_stage': by_stage, 'by_site': by_site, 'examples': examples}
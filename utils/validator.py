@@ -1,6 +1,13 @@
-from typing import Dict, List, Any, Set
+from typing import Dict, List, Any, Optional, Set
+from collections import Counter
 import hashlib
-from config import AGENCY_KEYWORDS
+from .extraction import find_postal_code
+from .keywords import agency_matcher
+from .canonical_url import listing_key
+from .rejects import RejectRegistry
+
+# Champs obligatoires d'une annonce
+REQUIRED_FIELDS = ('titre', 'date_publication', 'prix', 'localisation', 'lien', 'site_source')
 
 
 def validate_listing(listing: Dict[str, Any]) -> bool:
@@ -21,29 +28,43 @@ def validate_listing(listing: Dict[str, Any]) -> bool:
     Returns:
         True si valide, False sinon
     """
-    required_fields = ['titre', 'date_publication', 'prix', 'localisation', 'lien', 'site_source']
+    reason = validation_error(listing)
+    if reason is None:
+        return True
+
+    if reason.startswith('missing_'):
+        print(f"⚠️  Annonce invalide: champ '{reason[8:]}' manquant")
+    elif reason == 'price_not_positive':
+        print(f"⚠️  Annonce invalide: prix doit être positif ({int(listing['prix'])})")
+    else:
+        print(f"⚠️  Annonce invalide: prix invalide ({listing['prix']})")
+    return False
 
-    for field in required_fields:
-        if field not in listing or not listing[field]:
-            print(f"⚠️  Annonce invalide: champ '{field}' manquant")
-            return False
+
+def validation_error(listing: Dict[str, Any]) -> Optional[str]:
+    """
+    Motif de rejet d'une annonce (version silencieuse de validate_listing).
+
+    Returns:
+        None si valide, sinon 'missing_<champ>', 'price_not_positive' ou 'price_invalid'
+    """
+    for field in REQUIRED_FIELDS:
+        if not listing.get(field):
+            return f'missing_{field}'
 
     # Validation du prix (doit être un nombre positif)
     try:
-        prix = int(listing['prix'])
-        if prix <= 0:
-            print(f"⚠️  Annonce invalide: prix doit être positif ({prix})")
-            return False
+        if int(listing['prix']) <= 0:
+            return 'price_not_positive'
     except (ValueError, TypeError):
-        print(f"⚠️  Annonce invalide: prix invalide ({listing['prix']})")
-        return False
+        return 'price_invalid'
 
-    return True
+    return None
 
 
 def deduplicate_by_url(listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    Déduplique les annonces par URL exacte.
+    Déduplique les annonces par URL canonique (voir canonical_url.py).
 
     Args:
         listings: Liste des annonces
@@ -55,7 +76,7 @@ def deduplicate_by_url(listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     unique_listings = []
 
     for listing in listings:
-        url = listing.get('lien', '')
+        url = listing_key(listing)
         if url and url not in seen_urls:
             seen_urls.add(url)
             unique_listings.append(listing)
@@ -99,7 +120,7 @@ def is_agency(listing: Dict[str, Any]) -> bool:
     """
     Détecte si une annonce provient d'une agence immobilière.
 
-    Recherche les mots-clés d'agence dans:
+    Recherche les mots-clés d'agence (mots entiers, voir utils/keywords.py) dans:
     - Titre
     - Description (si présente)
 
@@ -109,15 +130,17 @@ def is_agency(listing: Dict[str, Any]) -> bool:
     Returns:
         True si agence détectée, False si particulier
     """
-    titre = listing.get('titre', '').lower()
-    description = listing.get('description', '').lower()
+    return agency_keyword(listing) is not None
 
-    # Vérifier les mots-clés d'agence
-    for keyword in AGENCY_KEYWORDS:
-        if keyword in titre or keyword in description:
-            return True
 
-    return False
+def agency_keyword(listing: Dict[str, Any]) -> Optional[str]:
+    """
+    Mot-clé d'agence trouvé dans le titre ou la description (mots entiers).
+
+    Returns:
+        Mot-clé de config.AGENCY_KEYWORDS, ou None pour un particulier
+    """
+    return agency_matcher.search_fields(listing.get('titre'), listing.get('description'))
 
 
 def filter_agencies(listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -167,12 +190,9 @@ def extract_department(text: str) -> str:
     Returns:
         Code département (2 ou 3 caractères) ou None
     """
-    import re
-
     # Chercher un code postal français (5 chiffres)
-    match = re.search(r'\b(\d{5})\b', text)
-    if match:
-        cp = match.group(1)
+    cp = find_postal_code(text)
+    if cp:
         # DOM-TOM: 97xxx, 98xxx
         if cp.startswith('97') or cp.startswith('98'):
             return cp[:3]
@@ -185,7 +205,12 @@ def extract_department(text: str) -> str:
     return None
 
 
-def filter_by_location(listings: List[Dict[str, Any]], target_location: str, departement: str = None) -> List[Dict[str, Any]]:
+def filter_by_location(
+    listings: List[Dict[str, Any]],
+    target_location: str,
+    departement: str = None,
+    rejects: Optional[RejectRegistry] = None
+) -> List[Dict[str, Any]]:
     """
     Filtre les annonces par localisation (département).
 
@@ -193,12 +218,11 @@ def filter_by_location(listings: List[Dict[str, Any]], target_location: str, dep
         listings: Liste des annonces
         target_location: Localisation recherchée (ville ou code postal)
         departement: Code département cible (optionnel, sera extrait de target_location si absent)
+        rejects: Registre du job où compter les annonces exclues (optionnel)
 
     Returns:
         Liste des annonces correspondant au département recherché
     """
-    import re
-
     # Extraire le département cible
     if not departement:
         departement = extract_department(target_location)
@@ -227,6 +251,8 @@ def filter_by_location(listings: List[Dict[str, Any]], target_location: str, dep
             # Pour la métropole, on garde par bénéfice du doute
             if is_dom_tom:
                 excluded += 1
+                if rejects is not None:
+                    rejects.record('location', 'no_department', listing)
                 continue
             else:
                 filtered.append(listing)
@@ -237,7 +263,8 @@ def filter_by_location(listings: List[Dict[str, Any]], target_location: str, dep
             filtered.append(listing)
         else:
             excluded += 1
-            print(f"  ❌ Exclu: {localisation} (dept {listing_dept} != {departement})")
+            if rejects is not None:
+                rejects.record('location', 'out_of_department', listing, detail=f"{listing_dept}!={departement}")
 
     if excluded > 0:
         print(f"🚫 {excluded} annonces hors département {departement} exclues")
@@ -246,3 +273,116 @@ def filter_by_location(listings: List[Dict[str, Any]], target_location: str, dep
         print(f"❓ {no_dept_count} annonces sans département détecté - {action}")
 
     return filtered
+
+
+class ListingPipeline:
+    """
+    Validation, filtre agences, filtre département et dédoublonnage en un passage.
+
+    Chaque annonce passe toutes les vérifications une seule fois, dans
+    l'ordre de la chaîne validate_listing → filter_agencies →
+    filter_by_location → deduplicate_by_url → deduplicate_by_signature
+    (mêmes annonces retenues, même ordre). Les rejets sont comptés par
+    motif au lieu d'être affichés un par un (et, avec un RejectRegistry,
+    par site avec des exemples).
+
+    Usage:
+        pipeline = ListingPipeline(ville, departement)
+        final = pipeline.run(all_listings)
+        pipeline.stages   # {'total', 'valid', 'particuliers', 'location_filtered', 'final'}
+        pipeline.rejects  # Counter({'agency': 3, 'duplicate_url': 5, ...})
+    """
+
+    def __init__(self, target_location: str = None, departement: str = None, rejects: Optional[RejectRegistry] = None):
+        # Département cible (None = pas de filtrage géographique)
+        self.departement = departement or (extract_department(target_location) if target_location else None)
+        self.is_dom_tom = bool(self.departement) and self.departement.startswith(('97', '98'))
+
+        self.seen_urls: Set[str] = set()
+        self.seen_signatures: Set[str] = set()
+        self.stages = Counter()
+        self.rejects = Counter()
+        self.no_department = 0
+        self.agency_keywords = Counter()  # Mot-clé ayant écarté chaque agence (audit)
+        self.registry = rejects  # Registre du job: rejets par site avec exemples (optionnel)
+
+    def run(self, listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Annonces retenues, dans leur ordre d'arrivée.
+
+        Peut être appelé plusieurs fois (lots successifs): les clés de
+        dédoublonnage et les compteurs sont cumulés.
+        """
+        kept = []
+        rejects = {}
+        valid = particuliers = located = 0
+        departement = self.departement
+        seen_urls = self.seen_urls
+        seen_signatures = self.seen_signatures
+        registry = self.registry
+
+        for listing in listings:
+            detail = None
+            reason = validation_error(listing)
+            if reason is None:
+                valid += 1
+                keyword = agency_keyword(listing)
+                if keyword is not None:
+                    reason = 'agency'
+                    detail = keyword
+                    self.agency_keywords[keyword] += 1
+                else:
+                    particuliers += 1
+                    if departement:
+                        listing_dept = extract_department(listing.get('localisation', ''))
+                        if not listing_dept:
+                            self.no_department += 1
+                            # DOM-TOM: exclues (faux positifs), métropole: bénéfice du doute
+                            if self.is_dom_tom:
+                                reason = 'no_department'
+                        elif listing_dept != departement:
+                            reason = 'out_of_department'
+                            detail = f"{listing_dept}!={departement}"
+
+            if reason is None:
+                located += 1
+                url = listing_key(listing)
+                if url in seen_urls:
+                    reason = 'duplicate_url'
+                else:
+                    seen_urls.add(url)
+                    signature = _generate_signature(listing)
+                    if signature in seen_signatures:
+                        reason = 'duplicate_signature'
+                    else:
+                        seen_signatures.add(signature)
+                        listing['url_key'] = url
+                        kept.append(listing)
+                        continue
+
+            rejects[reason] = rejects.get(reason, 0) + 1
+            if registry is not None:
+                registry.record('pipeline', reason, listing, detail=detail)
+
+        self.stages.update({
+            'total': len(listings), 'valid': valid, 'particuliers': particuliers,
+            'location_filtered': located, 'final': len(kept),
+        })
+        self.rejects.update(rejects)
+        return kept
+
+    def summary(self) -> str:
+        """Résumé des rejets sur une ligne (motif: nombre)."""
+        if not self.rejects:
+            return "aucun rejet"
+        return ', '.join(f"{reason}: {count}" for reason, count in self.rejects.most_common())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Annonces par étape, rejets par motif et département filtré."""
+        return {
+            'stages': dict(self.stages),
+            'rejects': dict(self.rejects),
+            'departement': self.departement,
+            'no_department': self.no_department,
+            'agency_keywords': dict(self.agency_keywords),
+        }